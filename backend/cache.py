@@ -0,0 +1,312 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from email.utils import parsedate_to_datetime
+
+import orjson
+
+CACHE_HIT = "hit"
+CACHE_REVALIDATED = "revalidated"
+CACHE_MISS = "miss"
+
+# request headers that make a response specific to whoever sent it, their values are part of the cache key
+_CREDENTIAL_HEADERS = ("authorization", "cookie")
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    status_code: int
+    headers: list[tuple[str, str]]
+    size: int
+    stored_at: float
+    max_age: float | None = None
+    no_cache: bool = False
+    etag: str | None = None
+    last_modified: str | None = None
+    # lower-cased names of the request headers listed in the response's Vary header, with the values they had
+    vary: dict[str, str | None] | None = None
+
+    @property
+    def fresh(self) -> bool:
+        if self.no_cache or self.max_age is None:
+            return False
+        return time.time() - self.stored_at < self.max_age
+
+    @property
+    def revalidatable(self) -> bool:
+        return self.etag is not None or self.last_modified is not None
+
+    def conditional_headers(self) -> dict[str, str]:
+        """
+        Get the headers that ask the server whether this entry is still valid
+        :return: Header dictionary
+        """
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def matches(self, request_headers: dict[str, str]) -> bool:
+        """
+        Check whether a request can be answered with this entry
+        :param request_headers: Lower-cased request headers
+        :return: True if the request has the same values as the stored one for every header the response varies on
+        """
+        return not self.vary or all(request_headers.get(k) == v for k, v in self.vary.items())
+
+
+def parse_cache_control(headers: dict[str, str]) -> dict[str, str | None]:
+    """
+    Parses the Cache-Control header into its directives
+    :param headers: Response headers
+    :return: Dictionary of lower-cased directive names to their value, None for directives without one
+    """
+    value = next((v for k, v in headers.items() if k.lower() == "cache-control"), "")
+    directives = {}
+    for directive in value.split(","):
+        name, _, argument = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+class ResponseCache:
+    """
+    Disk-backed HTTP cache for GET responses. Bodies are stored one file per entry, the metadata lives in an orjson
+    index that keeps least-recently-used order. Entries are evicted oldest-first once `max_bytes` is exceeded.
+    Files are written and deleted on a background thread, a body is served from memory until it has been written.
+    The order lookups leave is only written with the next change to the index, or when the cache is closed.
+    """
+    _index_name = "index.json"
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        # variables
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._size = 0
+        # bodies not written yet, by key
+        self._pending: dict[str, bytes | memoryview] = {}
+        self._pending_lock = threading.Lock()
+        # lookups changed the order since the index was last written
+        self._order_changed = False
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache")
+        self._load_index()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @staticmethod
+    def key(method: str, url: str, request_headers: dict[str, str] | None = None) -> str:
+        """
+        Get the cache key of a request. Requests sent with credentials are only answered with responses to the same
+        credentials, which are hashed into the key rather than stored.
+        :param method: HTTP method
+        :param url: Full URL
+        :param request_headers: Optional, lower-cased request headers
+        :return: String
+        """
+        key = f"{method.upper()} {url}"
+        credentials = [request_headers.get(x, "") for x in _CREDENTIAL_HEADERS] if request_headers else []
+        if any(credentials):
+            key += " " + hashlib.sha256("\n".join(credentials).encode()).hexdigest()
+        return key
+
+    def lookup(self, key: str, request_headers: dict[str, str] | None = None) -> CacheEntry | None:
+        """
+        Get the entry for a key, marking it as recently used
+        :param key: Cache key, see `ResponseCache.key`
+        :param request_headers: Optional, lower-cased request headers, matched against the headers the entry varies on
+        :return: CacheEntry or None
+        """
+        entry = self._entries.get(key)
+        if entry is None or not entry.matches(request_headers or {}):
+            return None
+        if key not in self._pending and not os.path.exists(self._body_path(key)):
+            self._remove(key)
+            self._save_index()
+            return None
+        if next(reversed(self._entries)) != key:
+            self._entries.move_to_end(key)
+            self._order_changed = True
+        return entry
+
+    def read_body(self, entry: CacheEntry) -> bytes:
+        """
+        Reads the stored body of an entry
+        :param entry: Entry returned by `lookup`
+        :return: Bytes
+        """
+        with self._pending_lock:
+            pending = self._pending.get(entry.key)
+        if pending is not None:
+            return bytes(pending)
+        with open(self._body_path(entry.key), "rb") as f:
+            return f.read()
+
+    def store(self, key: str, status_code: int, headers: list[tuple[str, str]], body: bytes | memoryview,
+              request_headers: dict[str, str] | None = None) -> CacheEntry | None:
+        """
+        Stores a response if its headers allow it
+        :param key: Cache key, see `ResponseCache.key`
+        :param status_code: HTTP status of the response
+        :param headers: Raw response headers
+        :param body: Response body
+        :param request_headers: Optional, lower-cased headers of the request, kept for those the response varies on
+        :return: The new entry, None if the response isn't cacheable
+        """
+        header_dict = {k: v for k, v in headers}
+        directives = parse_cache_control(header_dict)
+        if status_code != 200 or "no-store" in directives or len(body) > self.max_bytes:
+            return None
+
+        lowered = {k.lower(): v for k, v in headers}
+        vary = [x.strip().lower() for x in lowered.get("vary", "").split(",") if x.strip()]
+        # varies on something other than request headers
+        if "*" in vary:
+            return None
+        entry = CacheEntry(
+            key=key,
+            status_code=status_code,
+            headers=headers,
+            size=len(body),
+            stored_at=time.time(),
+            max_age=_max_age(directives, lowered),
+            no_cache="no-cache" in directives,
+            etag=lowered.get("etag"),
+            last_modified=lowered.get("last-modified"),
+            vary={x: (request_headers or {}).get(x) for x in vary} or None
+        )
+        if not entry.fresh and not entry.revalidatable:
+            return None
+
+        if key in self._entries:
+            self._remove(key)
+        with self._pending_lock:
+            self._pending[key] = body
+        self._writer.submit(self._write_body, key, body)
+        self._entries[key] = entry
+        self._size += entry.size
+        self._evict()
+        self._save_index()
+        return entry
+
+    def refresh(self, entry: CacheEntry, headers: list[tuple[str, str]]) -> None:
+        """
+        Updates an entry after the server confirmed it with a 304, using the freshness information it sent
+        :param entry: Entry that was revalidated
+        :param headers: Headers of the 304 response
+        :return: None
+        """
+        lowered = {k.lower(): v for k, v in headers}
+        directives = parse_cache_control(lowered)
+        entry.stored_at = time.time()
+        if directives or "expires" in lowered:
+            entry.max_age = _max_age(directives, lowered)
+            entry.no_cache = "no-cache" in directives
+        entry.etag = lowered.get("etag", entry.etag)
+        entry.last_modified = lowered.get("last-modified", entry.last_modified)
+        self._save_index()
+
+    def clear(self) -> None:
+        for key in list(self._entries):
+            self._remove(key)
+        self._save_index()
+
+    def close(self) -> None:
+        """
+        Writes the index if lookups changed its order and waits for the files still being written
+        :return: None
+        """
+        if self._order_changed:
+            self._save_index()
+        self._writer.shutdown(wait=True)
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._size -= entry.size
+        with self._pending_lock:
+            self._pending.pop(key, None)
+        self._writer.submit(self._delete_body, key)
+
+    def _write_body(self, key: str, body: bytes | memoryview) -> None:
+        path = self._body_path(key)
+        with self._pending_lock:
+            # removed, or replaced by a newer body, before it got written
+            if self._pending.get(key) is not body:
+                return
+        with open(path + ".tmp", "wb") as f:
+            f.write(body)
+        os.replace(path + ".tmp", path)
+        with self._pending_lock:
+            if self._pending.get(key) is body:
+                del self._pending[key]
+
+    def _delete_body(self, key: str) -> None:
+        try:
+            os.remove(self._body_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + ".body")
+
+    def _load_index(self) -> None:
+        try:
+            with open(os.path.join(self.directory, self._index_name), "rb") as f:
+                records = orjson.loads(f.read())
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            return
+        for record in records:
+            entry = CacheEntry(**record)
+            entry.headers = [tuple(x) for x in entry.headers]
+            self._entries[entry.key] = entry
+            self._size += entry.size
+
+    def _save_index(self) -> None:
+        """
+        Writes the index in the background, after the files queued before it
+        :return: None
+        """
+        self._order_changed = False
+        self._writer.submit(self._write_index, orjson.dumps([asdict(x) for x in self._entries.values()]))
+
+    def _write_index(self, index: bytes) -> None:
+        path = os.path.join(self.directory, self._index_name)
+        with open(path + ".tmp", "wb") as f:
+            f.write(index)
+        os.replace(path + ".tmp", path)
+
+
+def _max_age(directives: dict[str, str | None], headers: dict[str, str]) -> float | None:
+    """
+    Get how long a response stays fresh, from `Cache-Control: max-age` or `Expires`
+    :param directives: Parsed Cache-Control directives
+    :param headers: Lower-cased response headers
+    :return: Seconds, or None if the response must always be revalidated
+    """
+    if directives.get("max-age") is not None:
+        try:
+            return float(directives["max-age"])
+        except ValueError:
+            return None
+    if "expires" in headers:
+        try:
+            return parsedate_to_datetime(headers["expires"]).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return None
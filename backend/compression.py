@@ -0,0 +1,94 @@
+import gzip
+import zlib
+
+import zstandard
+
+# brotli isn't a requirement, responses are only advertised and decoded as br when it is installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+REQUEST_ENCODINGS = ("gzip", "zstd")
+_decode_errors = (zlib.error, zstandard.ZstdError) + ((brotli.error,) if brotli is not None else ())
+
+
+def accept_encoding() -> str:
+    """
+    Get the value of the Accept-Encoding header for the decoders available
+    :return: String such as `zstd, br, gzip, deflate`
+    """
+    encodings = ["zstd", "br", "gzip", "deflate"] if brotli is not None else ["zstd", "gzip", "deflate"]
+    return ", ".join(encodings)
+
+
+def compress(payload: bytes, encoding: str) -> bytes:
+    """
+    Compresses a request body
+    :param payload: Request body
+    :param encoding: One of REQUEST_ENCODINGS
+    :return: Compressed bytes
+    """
+    if encoding == "gzip":
+        return gzip.compress(payload, compresslevel=6)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(payload)
+    raise ValueError(f"Unsupported request encoding: {encoding}")
+
+
+class StreamDecoder:
+    """Incrementally decodes a response body as its chunks arrive"""
+    def __init__(self, encoding: str):
+        encoding = encoding.strip().lower()
+        if encoding in ("gzip", "x-gzip"):
+            self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            self._decoder = zlib.decompressobj()
+        elif encoding == "zstd":
+            self._decoder = zstandard.ZstdDecompressor().decompressobj()
+        elif encoding == "br" and brotli is not None:
+            self._decoder = brotli.Decompressor()
+        else:
+            raise ValueError(f"Unsupported content encoding: {encoding}")
+        self.encoding = encoding
+
+    def decompress(self, chunk: bytes) -> bytes:
+        """
+        Decodes the next chunk of the body
+        :param chunk: Compressed bytes
+        :return: Decoded bytes, may be empty while the decoder waits for more input
+        :raises ValueError: The body is corrupt
+        """
+        try:
+            if self.encoding == "br":
+                return self._decoder.process(chunk)
+            return self._decoder.decompress(chunk)
+        except _decode_errors as e:
+            raise ValueError(f"Corrupt {self.encoding} body: {e}") from e
+
+    def flush(self) -> bytes:
+        """
+        Decodes whatever the decoder still holds once the body has ended
+        :return: Decoded bytes
+        :raises ValueError: The body is corrupt
+        """
+        if self.encoding not in ("gzip", "x-gzip", "deflate"):
+            return b""
+        try:
+            return self._decoder.flush()
+        except zlib.error as e:
+            raise ValueError(f"Corrupt {self.encoding} body: {e}") from e
+
+
+def stream_decoder(content_encoding: str) -> StreamDecoder | None:
+    """
+    Builds a decoder for a Content-Encoding header
+    :param content_encoding: Value of the header, may be empty
+    :return: StreamDecoder, None for identity or unsupported encodings
+    """
+    if not content_encoding or content_encoding.strip().lower() == "identity":
+        return None
+    try:
+        return StreamDecoder(content_encoding)
+    except ValueError:
+        return None
@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtNetwork import QNetworkAccessManager, QNetworkRequest
+
+
+# responses larger than this are streamed to disk instead of being held in memory
+DEFAULT_DOWNLOAD_THRESHOLD = 32 * 1024 * 1024
+
+
+@dataclass
+class ConnectionSettings:
+    http2: bool = True
+    keep_alive: bool = True
+    pipelining: bool = False
+    prewarm: bool = False
+    # give up on a request when no data has moved for this long, 0 never gives up
+    timeout_ms: int = 30_000
+    # responses larger than this many bytes are streamed to disk
+    download_threshold: int = DEFAULT_DOWNLOAD_THRESHOLD
+
+    def apply(self, qt_request: QNetworkRequest) -> None:
+        """
+        Applies these settings to a Qt request
+        :param qt_request: Request to configure
+        :return: None
+        """
+        qt_request.setAttribute(QNetworkRequest.Attribute.Http2AllowedAttribute, self.http2)
+        qt_request.setAttribute(QNetworkRequest.Attribute.HttpPipeliningAllowedAttribute, self.pipelining)
+        if not self.keep_alive:
+            qt_request.setRawHeader(b"Connection", b"close")
+        qt_request.setTransferTimeout(self.timeout_ms)
+
+
+@dataclass
+class HostConnectionStats:
+    requests: int = 0
+    connections_opened: int = 0
+    http2: int = 0
+    encrypted: int = 0
+
+    @property
+    def reused(self) -> int:
+        return self.requests - self.connections_opened
+
+
+class ConnectionTracker(QObject):
+    """
+    Counts, per host, how many requests opened a new connection and how many reused one. Qt doesn't expose its
+    connection pool, a request is counted as opening a connection when its reply reported socketStartedConnecting.
+    """
+    changed = Signal()
+
+    def __init__(self):
+        super().__init__()
+        self.hosts: dict[str, HostConnectionStats] = {}
+
+    def record(self, url: str, opened_connection: bool, http2: bool, encrypted: bool) -> None:
+        """
+        Records a finished request
+        :param url: URL the request was sent to
+        :param opened_connection: Whether the request had to open a new connection
+        :param http2: Whether HTTP/2 was used
+        :param encrypted: Whether the connection was encrypted
+        :return: None
+        """
+        stats = self.hosts.setdefault(_host_key(url), HostConnectionStats())
+        stats.requests += 1
+        stats.connections_opened += opened_connection
+        stats.http2 += http2
+        stats.encrypted += encrypted
+        self.changed.emit()
+
+    def clear(self) -> None:
+        self.hosts.clear()
+        self.changed.emit()
+
+
+def prewarm(nam: QNetworkAccessManager, url: str) -> None:
+    """
+    Opens a connection to the host of `url` ahead of the first request, so it doesn't pay for DNS, TCP and TLS
+    :param nam: Network access manager that will send the requests
+    :param url: Any URL on the host
+    :return: None
+    """
+    parts = urlsplit(url)
+    if not parts.hostname:
+        return
+    if parts.scheme == "https":
+        nam.connectToHostEncrypted(parts.hostname, parts.port or 443)
+    else:
+        nam.connectToHost(parts.hostname, parts.port or 80)
+
+
+def _host_key(url: str) -> str:
+    """
+    Get the scheme, host and port a URL connects to
+    :param url: Any URL
+    :return: String such as `https://api.mysite.com:443`
+    """
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    return f"{parts.scheme}://{parts.hostname}:{port}"
@@ -0,0 +1,165 @@
+import codecs
+from typing import Any
+
+import orjson
+
+# how a request body is encoded, see RequestSpec
+BODY_JSON = "json"
+BODY_RAW = "raw"
+BODY_FORM = "form"
+BODY_MULTIPART = "multipart"
+BODY_FILE = "file"
+
+# how a response body is shown, picked from its Content-Type
+VIEW_JSON = "json"
+VIEW_TEXT = "text"
+VIEW_IMAGE = "image"
+VIEW_BINARY = "binary"
+
+# media types outside text/* that are text all the same
+_TEXT_MEDIA_TYPES = {
+    "application/javascript",
+    "application/xml",
+    "application/x-www-form-urlencoded",
+    "application/graphql",
+    "application/yaml",
+    "application/x-yaml",
+    "application/sql",
+}
+# how much of a body without a Content-Type is looked at to guess what it is
+_SNIFF_LENGTH = 4096
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def media_type(content_type: str | None) -> str:
+    """
+    Get the media type of a Content-Type, without its parameters
+    :param content_type: Value of the Content-Type header, may be empty
+    :return: Lowercase media type such as `application/json`, empty if there is none
+    """
+    return (content_type or "").split(";")[0].strip().lower()
+
+
+def content_charset(content_type: str | None) -> str | None:
+    """
+    Get the charset parameter of a Content-Type, if it names a codec Python knows
+    :param content_type: Value of the Content-Type header, may be empty
+    :return: Charset, None if there is none
+    """
+    for parameter in (content_type or "").split(";")[1:]:
+        name, _, value = parameter.partition("=")
+        if name.strip().lower() == "charset":
+            charset = value.strip().strip('"')
+            try:
+                return codecs.lookup(charset).name
+            except LookupError:
+                return None
+    return None
+
+
+def body_view(content_type: str | None, body: memoryview | bytes) -> str:
+    """
+    Decides how a body should be shown. A body without a Content-Type is sniffed.
+    :param content_type: Value of the Content-Type header, may be empty
+    :param body: The body, or its first few KiB
+    :return: VIEW_JSON, VIEW_TEXT, VIEW_IMAGE or VIEW_BINARY
+    """
+    media = media_type(content_type)
+    if media == "application/json" or media.endswith("+json"):
+        return VIEW_JSON
+    if media.startswith("text/") or media in _TEXT_MEDIA_TYPES or media.endswith("+xml"):
+        return VIEW_TEXT
+    if media.startswith("image/") and media != "image/svg+xml":
+        return VIEW_IMAGE
+    if media:
+        return VIEW_BINARY
+
+    head = bytes(body[:_SNIFF_LENGTH])
+    if head.lstrip()[:1] in (b"{", b"["):
+        return VIEW_JSON
+    # text with a byte order mark, UTF-16 and UTF-32 are full of NUL bytes and never decode as UTF-8
+    if head.startswith(tuple(bom for bom, _ in _BOMS)):
+        return VIEW_TEXT
+    if b"\0" in head:
+        return VIEW_BINARY
+    return VIEW_TEXT if _is_utf8(head, len(body) <= _SNIFF_LENGTH) else VIEW_BINARY
+
+
+def _is_utf8(head: bytes, complete: bool) -> bool:
+    """
+    Checks whether the start of a body is UTF-8
+    :param head: The first few KiB of the body
+    :param complete: True if head is the whole body, otherwise it may end in the middle of a character
+    :return: True if it decodes
+    """
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=complete)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def detect_charset(content_type: str | None, body: memoryview | bytes) -> str:
+    """
+    Get the charset of a text body: the one its Content-Type names, a byte order mark, UTF-8 if it decodes as such,
+    and Windows-1252 otherwise, which decodes any bytes
+    :param content_type: Value of the Content-Type header, may be empty
+    :param body: The body, or its first few KiB
+    :return: Codec name
+    """
+    charset = content_charset(content_type)
+    if charset is not None:
+        return charset
+    head = bytes(body[:_SNIFF_LENGTH])
+    for bom, codec in _BOMS:
+        if head.startswith(bom):
+            return codec
+    return "utf-8" if _is_utf8(head, len(body) <= _SNIFF_LENGTH) else "cp1252"
+
+
+def decode_text(body: memoryview | bytes, charset: str) -> str:
+    """
+    Decodes a text body, bytes that don't fit the charset are replaced
+    :param body: Bytes
+    :param charset: Codec name, as returned by detect_charset
+    :return: String
+    """
+    return codecs.decode(body, charset, errors="replace")
+
+
+def parse_body(body: memoryview | bytes, content_type: str | None) -> tuple[Any, str | None]:
+    """
+    Parses a body that should be JSON according to its Content-Type, or that looks like it when there is none
+    :param body: Bytes
+    :param content_type: Value of the Content-Type header, may be empty
+    :return: Tuple of the parsed JSON, None if it isn't JSON, and why parsing failed, None if it didn't fail
+    """
+    if not len(body) or body_view(content_type, body) != VIEW_JSON:
+        return None, None
+    try:
+        return orjson.loads(body), None
+    except orjson.JSONDecodeError as e:
+        return None, str(e)
+
+
+def hex_dump(body: memoryview | bytes, offset: int = 0) -> str:
+    """
+    Formats bytes as a hex dump, 16 bytes per line with their offset and printable ASCII
+    :param body: Bytes to format
+    :param offset: Offset of the first byte, shown at the start of each line
+    :return: String
+    """
+    lines = []
+    body = bytes(body)
+    for start in range(0, len(body), 16):
+        line = body[start:start + 16]
+        hex_ = " ".join(f"{x:02x}" for x in line)
+        text = "".join(chr(x) if 32 <= x < 127 else "." for x in line)
+        lines.append(f"{offset + start:08x}  {hex_:<47}  |{text}|")
+    return "\n".join(lines)
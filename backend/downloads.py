@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+from typing import IO
+
+from PySide6.QtCore import QLockFile
+
+# every process downloads into a directory of its own, named with this prefix
+_DIRECTORY_PREFIX = "restcutie-downloads-"
+_LOCK_NAME = "lock"
+
+
+class DownloadDirectory:
+    """
+    The directory a process streams large response bodies into. It holds a lock for as long as the process runs, a
+    directory whose lock is stale was left behind by a process that didn't get to clean up and can be swept.
+    """
+    def __init__(self, root: str | None = None):
+        """
+        :param root: Optional, directory to create it in. The system temporary directory is used if omitted.
+        """
+        self.path = tempfile.mkdtemp(prefix=_DIRECTORY_PREFIX, dir=root)
+        self._lock = _lock_file(self.path)
+        self._lock.tryLock(0)
+
+    def new_file(self) -> IO[bytes]:
+        """
+        Creates a file for a downloaded body, it is deleted by Response.release or with the directory
+        :return: File opened for reading and writing
+        """
+        return tempfile.NamedTemporaryFile(prefix="body-", suffix=".body", dir=self.path, delete=False)
+
+    def remove(self) -> None:
+        """
+        Deletes the directory and the bodies left in it, bodies still mapped on Windows are left for the next sweep
+        :return: None
+        """
+        self._lock.unlock()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def _lock_file(path: str) -> QLockFile:
+    lock = QLockFile(os.path.join(path, _LOCK_NAME))
+    # a lock only goes stale when its process is gone, however long that process has been running
+    lock.setStaleLockTime(0)
+    return lock
+
+
+def sweep_stale_downloads(root: str | None = None) -> int:
+    """
+    Deletes the download directories of processes that exited without cleaning up, e.g. because they crashed
+    :param root: Optional, directory to look in. The system temporary directory is used if omitted.
+    :return: Amount of directories deleted
+    """
+    root = root or tempfile.gettempdir()
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return 0
+    removed = 0
+    for name in names:
+        path = os.path.join(root, name)
+        if not name.startswith(_DIRECTORY_PREFIX) or not os.path.isdir(path):
+            continue
+        lock = _lock_file(path)
+        # still held by a running process
+        if not lock.tryLock(0):
+            continue
+        lock.unlock()
+        shutil.rmtree(path, ignore_errors=True)
+        removed += 1
+    return removed
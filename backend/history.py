@@ -0,0 +1,298 @@
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass
+
+import orjson
+import zstandard
+
+import global_objects
+from backend.content import BODY_JSON, parse_body
+from backend.network import RequestSpec, Response
+
+# only the start of very large bodies is made searchable, the full body is still stored
+_MAX_INDEXED_BODY = 1024 * 1024
+# bodies larger than the history's size limit only have at most this much of their start stored
+_TRUNCATED_BODY = 1024 * 1024
+# bodies are compressed this much at a time
+_COMPRESS_CHUNK = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    method TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status INTEGER,
+    latency_ms REAL,
+    size INTEGER NOT NULL,
+    request_headers BLOB NOT NULL,
+    response_headers BLOB NOT NULL,
+    request_url TEXT,
+    query_params BLOB,
+    body_type TEXT NOT NULL DEFAULT 'json'
+);
+CREATE INDEX IF NOT EXISTS history_timestamp ON history (timestamp);
+CREATE INDEX IF NOT EXISTS history_url ON history (url);
+CREATE INDEX IF NOT EXISTS history_method ON history (method);
+CREATE INDEX IF NOT EXISTS history_status ON history (status);
+CREATE INDEX IF NOT EXISTS history_latency ON history (latency_ms);
+CREATE TABLE IF NOT EXISTS history_bodies (
+    id INTEGER PRIMARY KEY REFERENCES history (id) ON DELETE CASCADE,
+    request_body BLOB,
+    response_body BLOB,
+    raw_request_body INTEGER NOT NULL DEFAULT 0,
+    truncated INTEGER NOT NULL DEFAULT 0
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS history_search USING fts5 (url, headers, body, content='');
+"""
+
+# columns added after the tables were first created, added to older databases when they are opened. Their rows
+# predate query parameters and body types and were sent with the URL they were recorded with.
+_ADDED_COLUMNS = {
+    "history": (
+        ("request_url", "TEXT"),
+        ("query_params", "BLOB"),
+        ("body_type", f"TEXT NOT NULL DEFAULT '{BODY_JSON}'"),
+    ),
+    "history_bodies": (
+        ("raw_request_body", "INTEGER NOT NULL DEFAULT 0"),
+        ("truncated", "INTEGER NOT NULL DEFAULT 0"),
+    ),
+}
+
+
+@dataclass
+class HistoryRow:
+    id: int
+    timestamp: float
+    method: str
+    url: str
+    status: int | None
+    latency_ms: float | None
+    size: int
+
+
+@dataclass
+class HistoryQuery:
+    text: str = ""
+    method: str | None = None
+    status: int | None = None
+
+    def where(self) -> tuple[str, list]:
+        """
+        Builds the WHERE clause for this query
+        :return: Tuple of the SQL clause and its parameters
+        """
+        clauses = []
+        parameters = []
+        if self.text.strip():
+            clauses.append("id IN (SELECT rowid FROM history_search WHERE history_search MATCH ?)")
+            parameters.append(_match_expression(self.text))
+        if self.method:
+            clauses.append("method = ?")
+            parameters.append(self.method)
+        if self.status is not None:
+            clauses.append("status = ?")
+            parameters.append(self.status)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", parameters
+
+
+class HistoryStore:
+    """
+    Records every request and its response in SQLite. Rows are indexed for filtering and sorting, bodies are zstd
+    compressed in their own table and bodies, headers and URLs are searchable through FTS5. Writes happen on a
+    background thread with their own connection so recording a large response never blocks the GUI.
+    """
+    def __init__(self, path: str, max_body_size: int | None = None):
+        """
+        :param path: Path of the SQLite database
+        :param max_body_size: Optional, only the start of larger response bodies is stored. The download threshold
+            of the connection settings is used if omitted.
+        """
+        self.path = path
+        self.max_body_size = max_body_size
+        self._connection = self._connect()
+        self._connection.executescript(_SCHEMA)
+        self._add_columns()
+
+        # variables
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history")
+        self._writer_connection: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        return connection
+
+    def _add_columns(self) -> None:
+        with self._connection:
+            for table, columns in _ADDED_COLUMNS.items():
+                existing = {x[1] for x in self._connection.execute(f"PRAGMA table_info({table})")}
+                for name, definition in columns:
+                    if name not in existing:
+                        self._connection.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+    def record(self, spec: RequestSpec, response: Response) -> Future:
+        """
+        Records a request and its response in the background
+        :param spec: Request that was sent
+        :param response: Response it received
+        :return: Future resolving to the id of the new row
+        """
+        # the body is copied now, the response may be released as soon as this returns, and a body downloaded to
+        # disk is never read into memory as a whole
+        response_body = response.body_bytes()
+        max_body_size = self.max_body_size if self.max_body_size is not None \
+            else global_objects.connection_settings.download_threshold
+        truncated = len(response_body) > max_body_size
+        if truncated:
+            response_body = bytes(response_body[:min(max_body_size, _TRUNCATED_BODY)])
+        elif len(response_body):
+            response_body = bytes(response_body)
+        elif response.response_body is not None:
+            # a response built from its parsed body alone, such as one saved with a session
+            response_body = orjson.dumps(response.response_body)
+        else:
+            response_body = b""
+        return self._writer.submit(self._write, spec, response, response_body, truncated, time.time())
+
+    def _write(self, spec: RequestSpec, response: Response, response_body: bytes, truncated: bool,
+               timestamp: float) -> int:
+        if self._writer_connection is None:
+            self._writer_connection = self._connect()
+        connection = self._writer_connection
+
+        request_headers = orjson.dumps(spec.headers or {})
+        response_headers = orjson.dumps(response.response_headers)
+        query_params = orjson.dumps(spec.query_params) if spec.query_params else None
+        request_body = None
+        # bytes bodies are stored as they are, anything else as JSON
+        raw_request_body = isinstance(spec.body, bytes)
+        if raw_request_body:
+            request_body = spec.body
+        elif spec.body is not None:
+            request_body = orjson.dumps(spec.body)
+
+        with connection:
+            cursor = connection.execute(
+                "INSERT INTO history (timestamp, method, url, status, latency_ms, size, request_headers, "
+                "response_headers, request_url, query_params, body_type) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (timestamp, response.request_method, response.request_url, response.status_code,
+                 response.timings.total_ms, response.body_size, request_headers, response_headers, spec.url,
+                 query_params, spec.body_type)
+            )
+            row_id = cursor.lastrowid
+            connection.execute(
+                "INSERT INTO history_bodies (id, request_body, response_body, raw_request_body, truncated) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (row_id, _compress(request_body) if request_body is not None else None, _compress(response_body),
+                 raw_request_body, truncated)
+            )
+            connection.execute(
+                "INSERT INTO history_search (rowid, url, headers, body) VALUES (?, ?, ?, ?)",
+                (row_id, response.request_url, (request_headers + b"\n" + response_headers).decode(errors="replace"),
+                 response_body[:_MAX_INDEXED_BODY].decode(errors="replace"))
+            )
+        return row_id
+
+    def count(self, query: HistoryQuery) -> int:
+        where, parameters = query.where()
+        return self._connection.execute(f"SELECT COUNT(*) FROM history{where}", parameters).fetchone()[0]
+
+    def page(self, query: HistoryQuery, offset: int, limit: int) -> list[HistoryRow]:
+        """
+        Get one page of rows matching a query, newest first
+        :param query: Filters to apply
+        :param offset: Amount of rows to skip
+        :param limit: Maximum amount of rows to return
+        :return: List of HistoryRow
+        """
+        where, parameters = query.where()
+        rows = self._connection.execute(
+            f"SELECT id, timestamp, method, url, status, latency_ms, size FROM history{where} "
+            f"ORDER BY timestamp DESC LIMIT ? OFFSET ?",
+            parameters + [limit, offset]
+        )
+        return [HistoryRow(*x) for x in rows]
+
+    def load(self, row_id: int) -> tuple[RequestSpec, Response]:
+        """
+        Loads a recorded request and response, decompressing their bodies
+        :param row_id: Id of the row
+        :return: Tuple of RequestSpec and Response
+        """
+        row = self._connection.execute(
+            "SELECT h.method, h.url, h.status, h.size, h.request_headers, h.response_headers, h.request_url, "
+            "h.query_params, h.body_type, b.request_body, b.response_body, b.raw_request_body, b.truncated "
+            "FROM history h JOIN history_bodies b ON b.id = h.id WHERE h.id = ?",
+            (row_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(row_id)
+        (method, url, status, size, request_headers, response_headers, request_url, query_params, body_type,
+         request_body, response_body, raw_request_body, truncated) = row
+        decompressor = zstandard.ZstdDecompressor()
+        response_body = memoryview(decompressor.decompress(response_body))
+        response_headers = orjson.loads(response_headers)
+        content_type = next((v for k, v in response_headers.items() if k.lower() == "content-type"), None)
+        if truncated:
+            parsed_body = None
+            body_error = f"Only the first {len(response_body):,} of {size:,} bytes of this body were recorded"
+        else:
+            parsed_body, body_error = parse_body(response_body, content_type)
+
+        if request_body is not None:
+            request_body = decompressor.decompress(request_body)
+            if not raw_request_body:
+                request_body = orjson.loads(request_body)
+
+        spec = RequestSpec(
+            method=method,
+            # older rows only have the URL the request was sent to, query parameters included
+            url=request_url if request_url is not None else url,
+            query_params=orjson.loads(query_params) if query_params is not None else None,
+            headers=orjson.loads(request_headers),
+            body=request_body,
+            body_type=body_type
+        )
+        response = Response(
+            status_code=status,
+            response_body=parsed_body,
+            response_headers=response_headers,
+            request_url=url,
+            request_method=method,
+            body_size=size,
+            raw_body=response_body,
+            body_error=body_error
+        )
+        return spec, response
+
+    def close(self) -> None:
+        self._writer.shutdown(wait=True)
+        if self._writer_connection is not None:
+            self._writer_connection.close()
+        self._connection.close()
+
+
+def _compress(data: bytes) -> bytes:
+    """
+    Compresses a body a chunk at a time, so zstd never holds more than one chunk of input on top of its output
+    :param data: Bytes
+    :return: A zstd frame that records its content size
+    """
+    compressor = zstandard.ZstdCompressor(level=3).compressobj(size=len(data))
+    view = memoryview(data)
+    chunks = [compressor.compress(view[x:x + _COMPRESS_CHUNK]) for x in range(0, len(view), _COMPRESS_CHUNK)]
+    chunks.append(compressor.flush())
+    return b"".join(chunks)
+
+
+def _match_expression(text: str) -> str:
+    """
+    Quotes every word of a search so FTS5 treats them as plain terms, not query syntax
+    :param text: Search text as typed
+    :return: FTS5 MATCH expression
+    """
+    return " ".join('"' + x.replace('"', '""') + '"' for x in text.split())
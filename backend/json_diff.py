@@ -0,0 +1,337 @@
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from typing import Any
+
+import orjson
+from PySide6.QtCore import QObject, Signal, QRunnable
+
+from backend.content import parse_body, decode_text, detect_charset
+from backend.network import Response
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+# an object or array with changes below it
+MODIFIED = "modified"
+
+# a diff stops collecting once it has this many changes
+MAX_CHANGES = 100_000
+# how many nodes are visited between checks for cancellation
+_CANCEL_CHECK_INTERVAL = 4096
+
+
+class DiffCancelled(Exception):
+    pass
+
+
+@dataclass(slots=True)
+class DiffNode:
+    key: str
+    kind: str
+    before: Any = None
+    after: Any = None
+    children: list["DiffNode"] = field(default_factory=list)
+    # amount of added, removed and changed values at or below this node
+    changes: int = 0
+
+
+@dataclass
+class ResponseDiff:
+    """Differences between two responses, the root has a child for each of status, headers and body that differ"""
+    root: DiffNode
+    truncated: bool = False
+
+    @property
+    def changes(self) -> int:
+        return self.root.changes
+
+
+class _Fingerprints:
+    """
+    Fingerprints of the values of one diff, equal for identical subtrees whatever the order of their object keys.
+    A container's fingerprint is a digest of its children's, so every node is hashed once however many of its
+    ancestors are compared. Containers are remembered by id, the documents outlive the diff.
+    """
+    def __init__(self, is_cancelled):
+        self.is_cancelled = is_cancelled
+        self._digests: dict[int, bytes] = {}
+        self._visited = 0
+
+    def get(self, value: Any) -> Any:
+        """
+        Get the fingerprint of a value
+        :param value: Any JSON value
+        :return: Digest of a container, (class, value) of a scalar so 1, 1.0 and true differ
+        :raises DiffCancelled: is_cancelled returned True
+        """
+        if not isinstance(value, (dict, list)):
+            return value.__class__, value
+        digest = self._digests.get(id(value))
+        if digest is None:
+            self._hash(value)
+            digest = self._digests[id(value)]
+        return digest
+
+    def _hash(self, root: dict | list) -> None:
+        # children are hashed before their parent, without recursing so deep documents don't overflow the stack
+        stack = [(root, False)]
+        while stack:
+            node, children_hashed = stack.pop()
+            if id(node) in self._digests:
+                continue
+            if not children_hashed:
+                self._visited += 1
+                if self._visited % _CANCEL_CHECK_INTERVAL == 0 and self.is_cancelled():
+                    raise DiffCancelled()
+                stack.append((node, True))
+                children = node.values() if isinstance(node, dict) else node
+                stack.extend((x, False) for x in children if isinstance(x, (dict, list)))
+                continue
+            digest = hashlib.blake2b(digest_size=16)
+            if isinstance(node, dict):
+                digest.update(b"{")
+                for key in sorted(node, key=repr):
+                    self._update(digest, key)
+                    self._update(digest, node[key])
+            else:
+                digest.update(b"[")
+                for value in node:
+                    self._update(digest, value)
+            self._digests[id(node)] = digest.digest()
+
+    def _update(self, digest, value: Any) -> None:
+        if isinstance(value, (dict, list)):
+            digest.update(b"c" + self._digests[id(value)])
+        else:
+            # the length keeps one scalar from running into the next
+            text = repr(value).encode()
+            digest.update(b"s" + len(text).to_bytes(8, "little") + text)
+
+
+class _Diff:
+    """One diff of two documents, only descending into subtrees whose fingerprints differ"""
+    def __init__(self, array_key: str | None, is_cancelled):
+        self.array_key = array_key
+        self.is_cancelled = is_cancelled
+        self.changes = 0
+        self._visited = 0
+        self._fingerprints = _Fingerprints(is_cancelled)
+
+    @property
+    def truncated(self) -> bool:
+        return self.changes >= MAX_CHANGES
+
+    def run(self, key: str, before: Any, after: Any) -> DiffNode | None:
+        """
+        Diffs two documents
+        :param key: Key of the resulting node
+        :param before: Parsed JSON
+        :param after: Parsed JSON
+        :return: DiffNode, None if they are identical
+        """
+        root = DiffNode(key, MODIFIED)
+        pending = [(root, key, before, after)]
+        while pending and not self.truncated:
+            self._visited += 1
+            if self._visited % _CANCEL_CHECK_INTERVAL == 0 and self.is_cancelled():
+                raise DiffCancelled()
+            parent, key, before, after = pending.pop()
+            if before is after or self._fingerprints.get(before) == self._fingerprints.get(after):
+                continue
+            if isinstance(before, dict) and isinstance(after, dict):
+                node = DiffNode(key, MODIFIED)
+                for child_key, value in before.items():
+                    if child_key in after:
+                        pending.append((node, str(child_key), value, after[child_key]))
+                    else:
+                        self._add(node, DiffNode(str(child_key), REMOVED, before=value))
+                for child_key, value in after.items():
+                    if child_key not in before:
+                        self._add(node, DiffNode(str(child_key), ADDED, after=value))
+            elif isinstance(before, list) and isinstance(after, list):
+                node = DiffNode(key, MODIFIED)
+                pending += self._pair_items(node, before, after)
+            else:
+                node = DiffNode(key, CHANGED, before=before, after=after)
+                self.changes += 1
+            parent.children.append(node)
+        _count_changes(root)
+        return root.children[0] if root.children else None
+
+    def _add(self, parent: DiffNode, node: DiffNode) -> None:
+        if not self.truncated:
+            parent.children.append(node)
+            self.changes += 1
+
+    def _pair_items(self, node: DiffNode, before: list, after: list) -> list[tuple]:
+        """
+        Matches up the items of two arrays, by the value of `array_key` if every item has a unique one, otherwise
+        by index. Unmatched items are added to the node as added or removed.
+        :param node: Node of the array
+        :param before: Array
+        :param after: Array
+        :return: List of (node, key, before, after) still to diff
+        """
+        before_ids = self._ids(before)
+        after_ids = self._ids(after)
+        if before_ids is None or after_ids is None:
+            pairs = [(node, f"[{x}]", before[x], after[x]) for x in range(min(len(before), len(after)))]
+            for index in range(len(after), len(before)):
+                self._add(node, DiffNode(f"[{index}]", REMOVED, before=before[index]))
+            for index in range(len(before), len(after)):
+                self._add(node, DiffNode(f"[{index}]", ADDED, after=after[index]))
+            return pairs
+
+        pairs = []
+        for id_, item in before_ids.items():
+            key = f"[{self.array_key}={orjson.dumps(id_).decode()}]"
+            if id_ in after_ids:
+                pairs.append((node, key, item, after_ids[id_]))
+            else:
+                self._add(node, DiffNode(key, REMOVED, before=item))
+        for id_, item in after_ids.items():
+            if id_ not in before_ids:
+                self._add(node, DiffNode(f"[{self.array_key}={orjson.dumps(id_).decode()}]", ADDED, after=item))
+        return pairs
+
+    def _ids(self, items: list) -> dict | None:
+        """
+        Get the items of an array by the value of `array_key`
+        :param items: Array
+        :return: Dictionary of id to item, None if the array can't be matched by id
+        """
+        if self.array_key is None:
+            return None
+        ids = {}
+        for item in items:
+            if not isinstance(item, dict) or self.array_key not in item:
+                return None
+            id_ = item[self.array_key]
+            if isinstance(id_, (dict, list)) or id_ in ids:
+                return None
+            ids[id_] = item
+        return ids
+
+
+def _count_changes(root: DiffNode) -> None:
+    """
+    Sets `changes` on every node and drops objects and arrays that turned out to have no changes, such as arrays
+    whose items only moved
+    :param root: Root of the diff
+    :return: None
+    """
+    stack = [(root, False)]
+    while stack:
+        node, children_counted = stack.pop()
+        if not children_counted:
+            stack.append((node, True))
+            stack.extend((x, False) for x in node.children)
+            continue
+        if node.kind != MODIFIED:
+            node.changes = 1
+            continue
+        node.children = [x for x in node.children if x.changes]
+        node.children.sort(key=_sort_key)
+        node.changes = sum(x.changes for x in node.children)
+
+
+def _sort_key(node: DiffNode) -> tuple:
+    # array indexes in numeric order, before object keys
+    if node.key.startswith("[") and node.key[1:-1].isdigit():
+        return 0, int(node.key[1:-1]), ""
+    return 1, 0, node.key
+
+
+def diff_json(before: Any, after: Any, array_key: str | None = None, is_cancelled=lambda: False) -> DiffNode | None:
+    """
+    Diffs two parsed JSON documents structurally
+    :param before: Parsed JSON
+    :param after: Parsed JSON
+    :param array_key: Optional, match array items by this field instead of by index
+    :param is_cancelled: Optional, polled while the diff runs
+    :return: DiffNode keyed "$", None if the documents are identical
+    :raises DiffCancelled: is_cancelled returned True
+    """
+    return _Diff(array_key, is_cancelled).run("$", before, after)
+
+
+def _body(response: Response) -> Any:
+    """
+    Get the parsed body of a response, a body on disk is parsed from its memory map
+    :param response: Response
+    :return: Parsed JSON, the text if it isn't JSON
+    """
+    if response.response_body is not None:
+        return response.response_body
+    body = response.body_bytes()
+    if not len(body):
+        return None
+    parsed, _ = parse_body(body, response.content_type)
+    if parsed is not None:
+        return parsed
+    return decode_text(body, detect_charset(response.content_type, body))
+
+
+def diff_responses(before: Response, after: Response, array_key: str | None = None,
+                   is_cancelled=lambda: False) -> ResponseDiff:
+    """
+    Diffs the status, headers and body of two responses. Header names are compared case-insensitively.
+    :param before: Response
+    :param after: Response
+    :param array_key: Optional, match array items in the body by this field instead of by index
+    :param is_cancelled: Optional, polled while the diff runs
+    :return: ResponseDiff
+    :raises DiffCancelled: is_cancelled returned True
+    """
+    root = DiffNode("", MODIFIED)
+    if before.status_code != after.status_code:
+        root.children.append(DiffNode("status", CHANGED, before.status_code, after.status_code, changes=1))
+
+    headers = _Diff(None, is_cancelled).run(
+        "headers",
+        {k.lower(): v for k, v in before.response_headers.items()},
+        {k.lower(): v for k, v in after.response_headers.items()}
+    )
+    if headers is not None:
+        root.children.append(headers)
+
+    body_diff = _Diff(array_key, is_cancelled)
+    body = body_diff.run("body", _body(before), _body(after))
+    if body is not None:
+        root.children.append(body)
+    root.changes = sum(x.changes for x in root.children)
+    return ResponseDiff(root, body_diff.truncated)
+
+
+class _DiffSignals(QObject):
+    finished = Signal(int, object)
+
+
+class DiffTask(QRunnable):
+    """Diffs two responses on a QThreadPool worker, a cancelled task emits nothing"""
+    def __init__(self, generation: int, before: Response, after: Response, array_key: str | None = None):
+        """
+        :param generation: Identifies the diff, it is emitted with the result
+        :param before: Response
+        :param after: Response
+        :param array_key: Optional, match array items in the body by this field instead of by index
+        """
+        super().__init__()
+        self.signals = _DiffSignals()
+        self.generation = generation
+        self._before = before
+        self._after = after
+        self._array_key = array_key
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def run(self) -> None:
+        try:
+            diff = diff_responses(self._before, self._after, self._array_key, self._cancelled.is_set)
+        except DiffCancelled:
+            return
+        if not self._cancelled.is_set():
+            self.signals.finished.emit(self.generation, diff)
@@ -0,0 +1,292 @@
+import csv
+import math
+import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass, asdict
+
+import orjson
+from PySide6.QtCore import QObject, Signal, QTimer
+from PySide6.QtNetwork import QNetworkRequest, QNetworkReply
+
+import global_objects
+from backend.network import RequestSpec, StreamedBody, build_qt_request
+from backend.variables import Environment, RequestTemplate
+
+
+@dataclass
+class LoadTestSettings:
+    total_requests: int | None = 1000
+    duration_seconds: float | None = None
+    concurrency: int = 16
+    target_rps: float | None = None
+
+
+@dataclass
+class LoadTestSummary:
+    completed: int
+    errors: int
+    elapsed_seconds: float
+    requests_per_second: float
+    bytes_per_second: float
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    max_ms: float
+    statuses: dict[str, int]
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram, percentiles are accurate to about 1% without keeping samples sorted"""
+    _growth = math.log(1.01)
+    _buckets = 2048
+
+    def __init__(self):
+        self._counts = array("I", bytes(4 * self._buckets))
+        self.count = 0
+        self.max_ms = 0.0
+
+    def add(self, latency_ms: float) -> None:
+        microseconds = max(1.0, latency_ms * 1000)
+        bucket = min(int(math.log(microseconds) / self._growth), self._buckets - 1)
+        self._counts[bucket] += 1
+        self.count += 1
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def percentile(self, percent: float) -> float:
+        """
+        Get the latency below which `percent` of the samples fall
+        :param percent: Percentile, 0 to 100
+        :return: Latency in milliseconds
+        """
+        if not self.count:
+            return 0.0
+        target = math.ceil(self.count * percent / 100)
+        seen = 0
+        for bucket, count in enumerate(self._counts):
+            seen += count
+            if seen >= target:
+                return min(math.exp((bucket + 1) * self._growth) / 1000, self.max_ms)
+        return self.max_ms
+
+
+class LoadTestResults:
+    """Compact, array-backed store of per-request timings"""
+    def __init__(self):
+        self.offsets_ms = array("d")
+        self.latencies_ms = array("d")
+        self.statuses = array("H")
+        self.sizes = array("Q")
+        self.histogram = LatencyHistogram()
+        self.started = time.perf_counter()
+        self.stopped: float | None = None
+
+    def add(self, started: float, latency_ms: float, status: int, size: int) -> None:
+        """
+        Records a completed request
+        :param started: perf_counter value at which the request was sent
+        :param latency_ms: Time until the reply finished
+        :param status: HTTP status, 0 if the request failed before receiving one
+        :param size: Bytes received
+        :return: None
+        """
+        self.offsets_ms.append((started - self.started) * 1000)
+        self.latencies_ms.append(latency_ms)
+        self.statuses.append(status)
+        self.sizes.append(size)
+        self.histogram.add(latency_ms)
+
+    def summary(self) -> LoadTestSummary:
+        """
+        Summarizes the results recorded so far
+        :return: LoadTestSummary
+        """
+        elapsed = (self.stopped or time.perf_counter()) - self.started
+        statuses = Counter(self.statuses)
+        errors = sum(count for status, count in statuses.items() if status == 0 or status >= 400)
+        return LoadTestSummary(
+            completed=len(self.latencies_ms),
+            errors=errors,
+            elapsed_seconds=elapsed,
+            requests_per_second=len(self.latencies_ms) / elapsed if elapsed else 0.0,
+            bytes_per_second=sum(self.sizes) / elapsed if elapsed else 0.0,
+            p50_ms=self.histogram.percentile(50),
+            p90_ms=self.histogram.percentile(90),
+            p99_ms=self.histogram.percentile(99),
+            max_ms=self.histogram.max_ms,
+            statuses={str(status) if status else "error": count for status, count in sorted(statuses.items())}
+        )
+
+    def export_csv(self, path: str) -> None:
+        """
+        Writes one row per request to a CSV file
+        :param path: Destination file
+        :return: None
+        """
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["offset_ms", "latency_ms", "status", "bytes"])
+            writer.writerows(zip(self.offsets_ms, self.latencies_ms, self.statuses, self.sizes))
+
+    def export_json(self, path: str) -> None:
+        """
+        Writes the summary and per-request timings to a JSON file
+        :param path: Destination file
+        :return: None
+        """
+        with open(path, "wb") as f:
+            f.write(orjson.dumps({
+                "summary": asdict(self.summary()),
+                "requests": {
+                    "offset_ms": list(self.offsets_ms),
+                    "latency_ms": list(self.latencies_ms),
+                    "status": list(self.statuses),
+                    "bytes": list(self.sizes),
+                }
+            }))
+
+
+class LoadTest(QObject):
+    """
+    Drives a single request repeatedly through the shared QNetworkAccessManager. Bodies are counted and discarded,
+    never parsed, so the client measures the server rather than itself.
+    """
+    progress = Signal(LoadTestSummary)
+    finished = Signal(LoadTestSummary)
+
+    _tick_ms = 10
+    _progress_ms = 250
+
+    def __init__(self, parent: QObject, spec: RequestSpec, settings: LoadTestSettings,
+                 environment: Environment | None = None):
+        super().__init__(parent)
+        self.spec = spec
+        self.settings = settings
+        self.results = LoadTestResults()
+
+        # build the request once, every send reuses it unless it uses dynamic values such as {{$uuid}}
+        self._template = RequestTemplate(spec)
+        self._environment = environment
+        rendered = self._template.render(environment)
+        self._url = rendered.url
+        self._qt_request, self._payload = build_qt_request(rendered)
+        self._method = spec.method.encode()
+
+        # variables
+        self._in_flight: dict[QNetworkReply, list] = {}
+        self._sent = 0
+        self._stopping = False
+        self._tick = QTimer(self)
+        self._tick.setInterval(self._tick_ms)
+        self._tick.timeout.connect(self._fill)
+        self._progress = QTimer(self)
+        self._progress.setInterval(self._progress_ms)
+        self._progress.timeout.connect(lambda: self.progress.emit(self.results.summary()))
+
+    def start(self) -> None:
+        self.results = LoadTestResults()
+        self._sent = 0
+        self._stopping = False
+        self._tick.start()
+        self._progress.start()
+        self._fill()
+
+    def stop(self) -> None:
+        """
+        Stops sending, the test finishes once the requests in flight complete
+        :return: None
+        """
+        if self._stopping:
+            return
+        self._stopping = True
+        self._tick.stop()
+        if not self._in_flight:
+            self._finish()
+
+    def _budget(self) -> int:
+        """
+        Get how many requests may be sent right now, given the limits in self.settings
+        :return: Amount of requests
+        """
+        settings = self.settings
+        elapsed = time.perf_counter() - self.results.started
+        if settings.duration_seconds is not None and elapsed >= settings.duration_seconds:
+            return 0
+        budget = settings.concurrency - len(self._in_flight)
+        if settings.total_requests is not None:
+            budget = min(budget, settings.total_requests - self._sent)
+        if settings.target_rps:
+            budget = min(budget, int(elapsed * settings.target_rps) + 1 - self._sent)
+        return budget
+
+    def _fill(self) -> None:
+        if self._stopping:
+            return
+        budget = self._budget()
+        for _ in range(budget):
+            self._send()
+
+        # nothing left to send and nothing in flight, the test is over
+        if budget <= 0 and not self._in_flight and self._limits_reached():
+            self.stop()
+
+    def _limits_reached(self) -> bool:
+        settings = self.settings
+        if settings.total_requests is not None and self._sent >= settings.total_requests:
+            return True
+        elapsed = time.perf_counter() - self.results.started
+        return settings.duration_seconds is not None and elapsed >= settings.duration_seconds
+
+    def _send(self) -> None:
+        if self._template.dynamic:
+            qt_request, payload = build_qt_request(self._template.render(self._environment))
+        else:
+            qt_request, payload = self._qt_request, self._payload
+        device = None
+        if isinstance(payload, StreamedBody):
+            try:
+                device = payload = payload.open(self)
+            except OSError:
+                # counted as a request that got no response
+                self.results.add(time.perf_counter(), 0.0, 0, 0)
+                self._sent += 1
+                return
+        reply = global_objects.get_nam().sendCustomRequest(qt_request, self._method, payload)
+        # [started, bytes received, opened a connection, file or multipart body being sent]
+        self._in_flight[reply] = [time.perf_counter(), 0, False, device]
+        reply.socketStartedConnecting.connect(lambda: self._opened_connection(reply))
+        reply.readyRead.connect(lambda: self._read(reply))
+        reply.finished.connect(lambda: self._complete(reply))
+        self._sent += 1
+
+    def _opened_connection(self, reply: QNetworkReply) -> None:
+        self._in_flight[reply][2] = True
+
+    def _read(self, reply: QNetworkReply) -> None:
+        self._in_flight[reply][1] += len(reply.readAll())
+
+    def _complete(self, reply: QNetworkReply) -> None:
+        started, size, opened_connection, device = self._in_flight.pop(reply)
+        if device is not None:
+            device.deleteLater()
+        size += len(reply.readAll())
+        status = reply.attribute(QNetworkRequest.Attribute.HttpStatusCodeAttribute) or 0
+        self.results.add(started, (time.perf_counter() - started) * 1000, status, size)
+        global_objects.get_connection_tracker().record(
+            url=self._url,
+            opened_connection=opened_connection,
+            http2=bool(reply.attribute(QNetworkRequest.Attribute.Http2WasUsedAttribute)),
+            encrypted=bool(reply.attribute(QNetworkRequest.Attribute.ConnectionEncryptedAttribute))
+        )
+        reply.deleteLater()
+
+        if self._stopping:
+            if not self._in_flight:
+                self._finish()
+            return
+        self._fill()
+
+    def _finish(self) -> None:
+        self._progress.stop()
+        self.results.stopped = time.perf_counter()
+        self.finished.emit(self.results.summary())
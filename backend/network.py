@@ -1,21 +1,356 @@
-from copy import deepcopy
-from dataclasses import dataclass
-from urllib.parse import urlencode, quote
+import mimetypes
+import mmap
+import os
+import re
+import time
+from dataclasses import dataclass, field, astuple
+from urllib.parse import quote, urlsplit, urlunsplit
 
-from PySide6.QtCore import QObject, Signal, QByteArray
-from PySide6.QtNetwork import QNetworkRequest, QNetworkReply
+from PySide6.QtCore import QObject, Signal, QRunnable, QThreadPool, QUrl, QTimer, QFile, QIODevice
+from PySide6.QtNetwork import QNetworkRequest, QNetworkReply, QHttpMultiPart, QHttpPart
 from orjson import orjson
 
 import global_objects
+from backend.cache import ResponseCache, CacheEntry, CACHE_HIT, CACHE_REVALIDATED, CACHE_MISS
+from backend.compression import compress, accept_encoding, stream_decoder, StreamDecoder
+from backend.connections import ConnectionSettings, DEFAULT_DOWNLOAD_THRESHOLD
+from backend.content import BODY_JSON, BODY_RAW, BODY_FORM, BODY_MULTIPART, BODY_FILE, parse_body
+from backend.retry import RetryPolicy
+from backend.streaming import ResponseStream, response_stream
+
+# content types that are always streamed to disk, regardless of size
+DEFAULT_DOWNLOAD_CONTENT_TYPES = ("application/octet-stream", "application/zip", "application/gzip", "text/csv")
+
+# a percent-encoded byte, left alone when encoding query parameters
+_encoded_byte = re.compile(r"(%[0-9A-Fa-f]{2})")
+
+
+@dataclass
+class ResponseTimings:
+    """
+    Monotonic (time.perf_counter) timestamps for the stages of a request. Stages Qt didn't report, e.g. connecting
+    when an open connection was reused, are left as None.
+    """
+    sent: float | None = None
+    # the Qt request was built and handed to the network access manager
+    dispatched: float | None = None
+    connecting: float | None = None
+    encrypted: float | None = None
+    request_sent: float | None = None
+    first_byte: float | None = None
+    finished: float | None = None
+    parsed: float | None = None
+    # the first time a view was built for the response
+    render_started: float | None = None
+    headers_rendered: float | None = None
+    rendered: float | None = None
+
+    def stages(self) -> list[tuple[str, float, float]]:
+        """
+        Get the stages of the request as offsets from when it was sent
+        :return: List of (name, start ms, end ms)
+        """
+        if self.sent is None:
+            return []
+        boundaries = [("Prepare", self.sent, self.dispatched)]
+        queued = self.dispatched or self.sent
+        # Qt reports DNS, TCP and TLS as one span, it only tells us when connecting starts and when TLS is done
+        send_start = queued
+        if self.connecting is not None:
+            boundaries.append(("Queued", queued, self.connecting))
+            if self.encrypted is not None:
+                boundaries.append(("Connect (DNS, TCP, TLS)", self.connecting, self.encrypted))
+                send_start = self.encrypted
+            else:
+                boundaries.append(("Connect (DNS, TCP)", self.connecting, self.request_sent))
+                send_start = None
+        if send_start is not None:
+            boundaries.append(("Send", send_start, self.request_sent))
+        boundaries += [
+            ("Waiting (TTFB)", self.request_sent or self.sent, self.first_byte),
+            ("Download", self.first_byte, self.finished),
+            ("Parse", self.finished, self.parsed),
+        ]
+        if self.headers_rendered is not None:
+            boundaries += [
+                ("Render headers", self.render_started, self.headers_rendered),
+                ("Render body", self.headers_rendered, self.rendered),
+            ]
+        else:
+            boundaries.append(("Render", self.parsed or self.finished, self.rendered))
+        return [
+            (name, (start - self.sent) * 1000, (end - self.sent) * 1000)
+            for name, start, end in boundaries if start is not None and end is not None
+        ]
+
+    @property
+    def total_ms(self) -> float | None:
+        end = self.rendered or self.parsed or self.finished
+        if self.sent is None or end is None:
+            return None
+        return (end - self.sent) * 1000
 
 
 @dataclass
 class Response:
     status_code: int
-    response_body: dict | list | str
+    # parsed JSON, None if the body isn't JSON
+    response_body: dict | list | str | None
     response_headers: dict
     request_url: str
     request_method: str
+    body_path: str | None = None
+    body_mmap: mmap.mmap | None = None
+    # body_path is a temporary file owned by this response, release() deletes it
+    temporary_body: bool = False
+    body_size: int = 0
+    wire_size: int = 0
+    timings: ResponseTimings = field(default_factory=ResponseTimings)
+    http2: bool = False
+    connection_reused: bool = False
+    cache_status: str | None = None
+    # the decoded body as received, a zero-copy view of the buffer it was read into
+    raw_body: memoryview | None = None
+    # why a body that should be JSON couldn't be parsed
+    body_error: str | None = None
+
+    @property
+    def content_type(self) -> str | None:
+        for key, value in self.response_headers.items():
+            if key.lower() == "content-type":
+                return value
+        return None
+
+    def body_bytes(self) -> memoryview:
+        """
+        Get the raw body, whether it is held in memory or was streamed to disk, without copying it
+        :return: memoryview, empty if there is no body
+        """
+        if self.raw_body is not None:
+            return self.raw_body
+        if self.body_mmap is not None:
+            return memoryview(self.body_mmap)
+        return memoryview(b"")
+
+    def release(self) -> None:
+        """
+        Closes the memory map of a body downloaded to disk and deletes its file if it is temporary. The body can't be
+        read afterwards, calling it again does nothing.
+        :return: None
+        """
+        if self.body_mmap is not None:
+            try:
+                self.body_mmap.close()
+            except BufferError:
+                # a view of the body is still alive, the mapping goes once it is collected
+                pass
+            self.body_mmap = None
+        if self.body_path is not None and self.temporary_body:
+            try:
+                os.remove(self.body_path)
+            except OSError:
+                # still mapped on Windows, the download directory is swept on exit or on the next start
+                pass
+            self.body_path = None
+            self.temporary_body = False
+
+
+@dataclass
+class RequestSpec:
+    """
+    Everything needed to send a request, detached from the widgets it was assembled in. What `body` holds depends on
+    `body_type`: any JSON value for BODY_JSON (bytes are sent as they are, None sends no body), a string or bytes for
+    BODY_RAW, a dictionary of fields for BODY_FORM and BODY_MULTIPART, where a multipart value of `@path` uploads
+    that file, and the path of the file to upload for BODY_FILE.
+    """
+    method: str
+    url: str
+    query_params: dict | None = None
+    headers: dict | None = None
+    body: dict | list | str | bytes | None = None
+    body_encoding: str | None = None
+    accept_compressed: bool = True
+    body_type: str = BODY_JSON
+    # the Qt request and payload built for this spec, a spec must not be changed once it has been sent
+    _prepared: tuple | None = field(default=None, init=False, repr=False, compare=False)
+
+
+ERROR_NETWORK = "network"
+ERROR_TIMEOUT = "timeout"
+ERROR_CANCELLED = "cancelled"
+ERROR_DECODE = "decode"
+ERROR_BODY = "body"
+
+
+@dataclass
+class RequestError:
+    """Why a request produced no response"""
+    kind: str
+    message: str
+    request_url: str
+    request_method: str
+    attempts: int = 1
+    # the QNetworkReply.NetworkError, for network errors and timeouts
+    network_error: int | None = None
+
+    def __str__(self) -> str:
+        attempts = f" after {self.attempts} attempts" if self.attempts > 1 else ""
+        return f"{self.request_method} {self.request_url} failed{attempts}: {self.message}"
+
+
+def encode_query(query_params: dict) -> str:
+    """
+    Encodes query parameters, a list value repeats its key once per item. Values that are already percent-encoded are
+    left as they are, so `a%20b` is sent as typed rather than as `a%2520b`.
+    :param query_params: Keys and their values
+    :return: Query string, without the leading `?`
+    """
+    items = []
+    for key, values in query_params.items():
+        for value in values if isinstance(values, list) else [values]:
+            items.append(_quote(str(key)) + "=" + _quote(str(value)))
+    return "&".join(items)
+
+
+def _quote(text: str) -> str:
+    parts = _encoded_byte.split(text)
+    # odd parts are the percent-encoded bytes split out of the text
+    return "".join(x if i % 2 else quote(x, safe="") for i, x in enumerate(parts))
+
+
+def build_url(url: str, query_params: dict | None) -> QUrl:
+    """
+    Appends query parameters to a URL, after any query it already has and before its fragment
+    :param url: URL as typed
+    :param query_params: Optional, keys and their values
+    :return: QUrl
+    """
+    if not query_params:
+        return QUrl(url)
+    scheme, netloc, path, query, fragment = urlsplit(url)
+    query = "&".join(x for x in (query, encode_query(query_params)) if x)
+    return QUrl(urlunsplit((scheme, netloc, path, query, fragment)))
+
+
+class StreamedBody:
+    """A request body read from disk while it is sent, so large uploads are never loaded into memory"""
+    def __init__(self, body_type: str, body: str | dict):
+        """
+        :param body_type: BODY_FILE or BODY_MULTIPART
+        :param body: Path of the file, or the multipart fields
+        """
+        self.body_type = body_type
+        self.body = body
+
+    def open(self, parent: QObject) -> QIODevice | QHttpMultiPart:
+        """
+        Opens the body for one attempt, every attempt needs a device of its own
+        :param parent: Owner of the device, it must outlive the reply
+        :return: QFile or QHttpMultiPart
+        :raises OSError: A file can't be opened
+        """
+        if self.body_type == BODY_FILE:
+            return _open_file(self.body, parent)
+        multipart = QHttpMultiPart(QHttpMultiPart.ContentType.FormDataType, parent)
+        for name, values in self.body.items():
+            for value in values if isinstance(values, list) else [values]:
+                value = str(value)
+                part = QHttpPart()
+                disposition = f'form-data; name="{_quote_header(name)}"'
+                if value.startswith("@"):
+                    path = value[1:]
+                    disposition += f'; filename="{_quote_header(os.path.basename(path))}"'
+                    part.setHeader(QNetworkRequest.KnownHeaders.ContentTypeHeader, _guess_type(path))
+                    part.setBodyDevice(_open_file(path, multipart))
+                else:
+                    part.setBody(value.encode())
+                part.setHeader(QNetworkRequest.KnownHeaders.ContentDispositionHeader, disposition)
+                multipart.append(part)
+        return multipart
+
+
+def _open_file(path: str, parent: QObject) -> QFile:
+    file = QFile(path, parent)
+    if not file.open(QIODevice.OpenModeFlag.ReadOnly):
+        message = file.errorString()
+        file.deleteLater()
+        raise OSError(f"{path}: {message}")
+    return file
+
+
+def _quote_header(text: str) -> str:
+    return str(text).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _guess_type(path: str) -> str:
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def _has_header(headers: dict | None, name: str) -> bool:
+    return any(key.lower() == name for key in headers or {})
+
+
+def encode_body(spec: RequestSpec) -> tuple[bytes | StreamedBody, str | None]:
+    """
+    Encodes the body of a request according to its body type
+    :param spec: Request whose body to encode
+    :return: Tuple of the payload, bytes or a StreamedBody, and the Content-Type it implies, None if Qt sets it
+    """
+    if spec.body_type == BODY_FILE:
+        return StreamedBody(BODY_FILE, spec.body), _guess_type(spec.body)
+    if spec.body_type == BODY_MULTIPART:
+        # QHttpMultiPart sets the Content-Type with its boundary
+        return StreamedBody(BODY_MULTIPART, spec.body or {}), None
+    if spec.body_type == BODY_FORM:
+        return encode_query(spec.body or {}).encode(), "application/x-www-form-urlencoded"
+    if spec.body_type == BODY_RAW:
+        if isinstance(spec.body, bytes):
+            return spec.body, "application/octet-stream"
+        return (spec.body or "").encode(), "text/plain; charset=utf-8"
+    if spec.body is None:
+        return b"", None
+    if isinstance(spec.body, bytes):
+        return spec.body, "application/json"
+    return orjson.dumps(spec.body), "application/json"
+
+
+def build_qt_request(spec: RequestSpec, connection_settings: ConnectionSettings | None = None) \
+        -> tuple[QNetworkRequest, bytes | StreamedBody]:
+    """
+    Builds the Qt request object and the encoded payload for a RequestSpec. The result is kept with the spec, sending
+    the same spec again reuses it as long as the connection settings haven't changed.
+    :param spec: Request to build
+    :param connection_settings: Optional, HTTP/2 and keep-alive settings. The global settings are used if omitted.
+    :return: Tuple of the QNetworkRequest and the payload to send with it, the request is shared and must be copied
+        before it is changed. File and multipart payloads are a StreamedBody to open for each send.
+    """
+    connection_settings = connection_settings or global_objects.connection_settings
+    settings_key = astuple(connection_settings)
+    if spec._prepared is not None and spec._prepared[0] == settings_key:
+        return spec._prepared[1], spec._prepared[2]
+
+    qt_request = QNetworkRequest(build_url(spec.url, spec.query_params))
+    if spec.headers:
+        for key, values in spec.headers.items():
+            if not key:
+                continue
+            # a repeated header is sent once, its values joined as RFC 9110 allows
+            value = ", ".join(str(x) for x in values) if isinstance(values, list) else str(values)
+            qt_request.setRawHeader(key.encode(), value.encode())
+    connection_settings.apply(qt_request)
+
+    # advertising the encodings ourselves stops Qt from decoding, Request decodes the stream as it arrives
+    if spec.accept_compressed:
+        qt_request.setRawHeader(b"Accept-Encoding", accept_encoding().encode())
+    payload, content_type = encode_body(spec)
+    if content_type is not None and not _has_header(spec.headers, "content-type"):
+        qt_request.setRawHeader(b"Content-Type", content_type.encode())
+    # streamed bodies are sent as they are, compressing them would mean reading them into memory
+    if spec.body_encoding and isinstance(payload, bytes) and payload:
+        payload = compress(payload, spec.body_encoding)
+        qt_request.setRawHeader(b"Content-Encoding", spec.body_encoding.encode())
+    spec._prepared = (settings_key, qt_request, payload)
+    return qt_request, payload
 
 
 class WrappedQNetworkReply(QObject):
@@ -25,17 +360,140 @@ class WrappedQNetworkReply(QObject):
         self.network_reply = network_reply
 
 
+class _ResponseBuffer:
+    """Accumulates the chunks of a reply into a single buffer, preallocated from `Content-Length` when known"""
+    def __init__(self, expected_size: int | None = None):
+        self._buffer = bytearray(expected_size) if expected_size else bytearray()
+        self._length = 0
+
+    def write(self, chunk: bytes) -> None:
+        """
+        Copies a chunk into the buffer, growing it if the server sent more than it announced
+        :param chunk: Bytes read from the reply
+        :return: None
+        """
+        end = self._length + len(chunk)
+        if end > len(self._buffer):
+            del self._buffer[self._length:]
+            self._buffer += chunk
+        else:
+            self._buffer[self._length:end] = chunk
+        self._length = end
+
+    def __len__(self) -> int:
+        return self._length
+
+    def view(self) -> memoryview:
+        """
+        Get a zero-copy view over the bytes written so far
+        :return: memoryview
+        """
+        return memoryview(self._buffer)[:self._length]
+
+    def getvalue(self) -> bytes:
+        """
+        Get the bytes written so far
+        :return: Bytes
+        """
+        return bytes(self.view())
+
+
+class _ParseResponseSignals(QObject):
+    parsed = Signal(object, dict, object)
+
+
+class _ParseResponseTask(QRunnable):
+    """
+    Decodes the raw headers of a buffered payload on a QThreadPool worker, and parses the payload if its Content-Type
+    says it is JSON. Other bodies are left as bytes, to be decoded for display when they are shown.
+    """
+    def __init__(self, payload: memoryview | bytes, raw_headers: list[tuple[bytes, bytes]]):
+        super().__init__()
+        self.signals = _ParseResponseSignals()
+        self._payload = payload
+        self._raw_headers = raw_headers
+
+    def run(self) -> None:
+        # parse the response headers
+        parsed_headers = {}
+        content_type = None
+        for key, value in self._raw_headers:
+            parsed_headers[key.decode("latin-1")] = value.decode("latin-1")
+            if key.lower() == b"content-type":
+                content_type = value.decode("latin-1")
+
+        parsed_payload, error = parse_body(self._payload, content_type)
+        self.signals.parsed.emit(parsed_payload, parsed_headers, error)
+
+
 class Request(QObject):
     response = Signal(Response)
-    error = Signal()
+    error = Signal(RequestError)
+    # a ResponseStream, emitted instead of `response` when the reply is streamed
+    stream = Signal(object)
 
-    def __init__(self, parent: QObject):
+    def __init__(self, parent: QObject, download_threshold: int | None = None,
+                 download_content_types: tuple[str, ...] = DEFAULT_DOWNLOAD_CONTENT_TYPES,
+                 download_path: str | None = None, connection_settings: ConnectionSettings | None = None,
+                 cache: ResponseCache | None = None, stream_mode: str | None = None, timeout_ms: int | None = None,
+                 retry_policy: RetryPolicy | None = None):
+        """
+        :param parent: Parent QObject
+        :param download_threshold: Optional, responses larger than this many bytes are streamed to disk. The threshold
+            of the connection settings is used if omitted.
+        :param download_content_types: Content types that are always streamed to disk
+        :param download_path: Optional, file to stream downloads into. A temporary file in the download directory,
+            owned by the response, is used if omitted.
+        :param connection_settings: Optional, HTTP/2 and keep-alive settings. The global settings are used if omitted.
+        :param cache: Optional, cache for GET responses. The global cache, if enabled, is used if omitted.
+        :param stream_mode: Optional, STREAM_AUTO to hand SSE and NDJSON replies to a ResponseStream as their events
+            arrive, STREAM_ALWAYS to do so for any reply. Replies are buffered until they finish if omitted.
+        :param timeout_ms: Optional, give up when no data has moved for this long, 0 never gives up. The timeout of the
+            connection settings is used if omitted.
+        :param retry_policy: Optional, when to send a failed request again. The global policy is used if omitted.
+        """
         super().__init__(parent)
+        self.download_threshold = download_threshold
+        self.download_content_types = download_content_types
+        self.download_path = download_path
+        self.connection_settings = connection_settings
+        self.cache = cache if cache is not None else global_objects.response_cache
+        self.stream_mode = stream_mode
+        self.timeout_ms = timeout_ms
+        self.retry_policy = retry_policy or global_objects.retry_policy
 
         # variables
         self._qt_reply: WrappedQNetworkReply | None = None
+        self._spec: RequestSpec | None = None
+        self._attempt = 0
+        self._retry_timer: QTimer | None = None
+        self._cancelled = False
+        self._method = ""
+        self._status_code: int | None = None
+        self._request_url = ""
+        self._cache_key: str | None = None
+        self._cache_entry: CacheEntry | None = None
+        self._cache_request_headers: dict[str, str] | None = None
+        self._cache_status: str | None = None
+        self._buffer: _ResponseBuffer | None = None
+        self._download_file = None
+        self._body_size = 0
+        self._timings = ResponseTimings()
+        self._http2 = False
+        self._accept_compressed = True
+        self._decoder: StreamDecoder | None = None
+        self._decode_failed = False
+        self._wire_size = 0
+        self._parse_task: _ParseResponseTask | None = None
+        self._body_device: QIODevice | QHttpMultiPart | None = None
+        self._raw_body: memoryview | None = None
+        # times replies that may turn out to be streams, see _send_attempt
+        self._idle_timer = QTimer(self)
+        self._idle_timer.setSingleShot(True)
+        self._idle_timer.timeout.connect(self._idle_timeout)
 
-    def custom(self, method: str, url: str, query_params: dict | None, headers: dict | None, body: dict | list | str | None):
+    def custom(self, method: str, url: str, query_params: dict | None, headers: dict | None, body: dict | list | str | None,
+               body_encoding: str | None = None, accept_compressed: bool = True, body_type: str = BODY_JSON):
         """
         Send a custom request
         :param method: HTTP Method
@@ -43,58 +501,491 @@ class Request(QObject):
         :param query_params: Optional, Query parameters
         :param headers: Optional, HTTP Headers
         :param body: Optional, Request body
+        :param body_encoding: Optional, compress the body with "gzip" or "zstd"
+        :param accept_compressed: Advertise and decode zstd, br, gzip and deflate responses
+        :param body_type: How the body is encoded, see RequestSpec
+        :return: None
+        """
+        self.send(RequestSpec(method, url, query_params, headers, body, body_encoding, accept_compressed, body_type))
+
+    def send(self, spec: RequestSpec):
+        """
+        Send a request described by a RequestSpec, sending the same spec again skips building the Qt request
+        :param spec: Request to send
         :return: None
         """
-        # iterate over the query params, append them to our url
-        appended_url = deepcopy(url)
-        if type(query_params) is dict:
-            for x in query_params.keys():
-                appended_url += f"?{quote(x)}={quote(query_params[x])}"
+        self._spec = spec
+        self._attempt = 0
+        self._cancelled = False
+        self._send_attempt()
+
+    @property
+    def in_flight(self) -> bool:
+        if self._cancelled:
+            return False
+        return self._qt_reply is not None or self._parse_task is not None or self._retry_timer is not None
 
-        # build the qt network request object
-        qt_request = QNetworkRequest(appended_url)
-        if type(headers) is dict:
-            for x in headers.keys():
-                qt_request.setHeader(x, headers[x])
+    def cancel(self) -> None:
+        """
+        Aborts the request, whether it is waiting on the server, being parsed or waiting to be retried. `error` is
+        emitted with ERROR_CANCELLED.
+        :return: None
+        """
+        if not self.in_flight:
+            return
+        self._cancelled = True
+        if self._qt_reply is not None:
+            # the reply finishes with an error, _build_emit_response reports the cancellation
+            self._qt_reply.network_reply.abort()
+            return
+        if self._retry_timer is not None:
+            self._retry_timer.stop()
+            self._retry_timer.deleteLater()
+            self._retry_timer = None
+        # a running parse can't be interrupted, its result is dropped when it arrives
+        self._emit_error(ERROR_CANCELLED, "Cancelled")
+
+    def _send_attempt(self) -> None:
+        """
+        Sends self._spec, once per attempt
+        :return: None
+        """
+        spec = self._spec
+        method = spec.method
+        self._attempt += 1
+        if self._retry_timer is not None:
+            self._retry_timer.deleteLater()
+            self._retry_timer = None
+        self._status_code = None
+        self._timings = ResponseTimings(sent=time.perf_counter())
+        qt_request, payload = build_qt_request(spec, self.connection_settings)
+        timeout_ms = self.timeout_ms if self.timeout_ms is not None else qt_request.transferTimeout()
+        if self.stream_mode is not None:
+            # Qt's transfer timeout would also end a stream that is quiet between events, and it can't be changed once
+            # the reply is known to be one. Such replies are timed by self._idle_timer until they are handed over.
+            qt_request = QNetworkRequest(qt_request)
+            qt_request.setTransferTimeout(0)
+        elif self.timeout_ms is not None:
+            # the prepared request is shared with the spec, only this send gets the timeout
+            qt_request = QNetworkRequest(qt_request)
+            qt_request.setTransferTimeout(self.timeout_ms)
+        self._method = method
+        self._request_url = qt_request.url().toString()
+        self._buffer = None
+        self._download_file = None
+        self._accept_compressed = spec.accept_compressed
+        self._decoder = None
+        self._decode_failed = False
+        self._wire_size = 0
+
+        # answer from the cache when we can, otherwise ask the server whether our copy is still valid
+        self._cache_key = None
+        self._cache_entry = None
+        self._cache_status = None
+        self._cache_request_headers = None
+        if self.cache is not None and method.upper() == "GET":
+            self._cache_request_headers = {
+                bytes(x).decode("latin-1").lower(): bytes(qt_request.rawHeader(x)).decode("latin-1")
+                for x in qt_request.rawHeaderList()
+            }
+            self._cache_key = self.cache.key(method, self._request_url, self._cache_request_headers)
+            self._cache_entry = self.cache.lookup(self._cache_key, self._cache_request_headers)
+            if self._cache_entry is not None and self._cache_entry.fresh:
+                self._serve_from_cache(CACHE_HIT, [])
+                return
+            if self._cache_entry is not None and self._cache_entry.revalidatable:
+                # as above, only this send gets the conditional headers
+                qt_request = QNetworkRequest(qt_request)
+                for key, value in self._cache_entry.conditional_headers().items():
+                    qt_request.setRawHeader(key.encode(), value.encode())
+
+        # file and multipart bodies are opened for every attempt, the last attempt's device is released with it
+        if isinstance(payload, StreamedBody):
+            self._release_body_device()
+            try:
+                self._body_device = payload = payload.open(self)
+            except OSError as e:
+                self._emit_error(ERROR_BODY, f"The request body could not be read: {e}")
+                return
 
         # send the request (we cant use named parameters here... why?)
-        qt_reply = global_objects.nam.sendCustomRequest(
-            qt_request,
-            method.encode(),
-            orjson.dumps(body),
-        )
-        qt_reply.errorOccurred.connect(self._emit_error)
-        qt_reply.readyRead.connect(self._build_emit_response)
+        qt_reply = global_objects.get_nam().sendCustomRequest(qt_request, method.encode(), payload)
+        qt_reply.socketStartedConnecting.connect(lambda: self._mark("connecting"))
+        qt_reply.encrypted.connect(lambda: self._mark("encrypted"))
+        qt_reply.requestSent.connect(lambda: self._mark("request_sent"))
+        qt_reply.metaDataChanged.connect(lambda: self._mark("first_byte"))
+        qt_reply.readyRead.connect(self._read_chunk)
+        qt_reply.finished.connect(self._build_emit_response)
         self._qt_reply = WrappedQNetworkReply(qt_reply, method)
+        self._mark("dispatched")
+        if self.stream_mode is not None and timeout_ms > 0:
+            qt_reply.uploadProgress.connect(lambda *_: self._idle_timer.start())
+            self._idle_timer.start(timeout_ms)
+
+    def _emit_error(self, kind: str, message: str, network_error: int | None = None) -> None:
+        self.error.emit(RequestError(
+            kind=kind,
+            message=message,
+            request_url=self._request_url,
+            request_method=self._method,
+            attempts=self._attempt,
+            network_error=network_error
+        ))
+
+    def _idle_timeout(self) -> None:
+        # aborted as Qt's transfer timeout would, the reply finishes with OperationCanceledError and is reported as a
+        # timeout or retried
+        if self._qt_reply is not None:
+            self._qt_reply.network_reply.abort()
+
+    def _release_reply(self) -> None:
+        """
+        Lets Qt free the reply now that everything has been read from it
+        :return: None
+        """
+        self._idle_timer.stop()
+        if self._qt_reply is not None:
+            self._qt_reply.network_reply.deleteLater()
+            self._qt_reply.deleteLater()
+            self._qt_reply = None
+        self._release_body_device()
+
+    def _release_body_device(self) -> None:
+        if self._body_device is not None:
+            self._body_device.deleteLater()
+            self._body_device = None
+
+    def _discard_body(self) -> None:
+        self._buffer = None
+        if self._download_file is not None:
+            self._download_file.close()
+            os.remove(self._download_file.name)
+            self._download_file = None
+
+    def _retry(self, retry_after: str | None = None) -> None:
+        """
+        Sends the request again once the retry policy's delay has passed
+        :param retry_after: Optional, the Retry-After header of the failed attempt
+        :return: None
+        """
+        self._release_reply()
+        self._discard_body()
+        self._retry_timer = QTimer(self)
+        self._retry_timer.setSingleShot(True)
+        self._retry_timer.timeout.connect(self._send_attempt)
+        self._retry_timer.start(self.retry_policy.delay_ms(self._attempt, retry_after))
+
+    def _mark(self, stage: str) -> None:
+        """
+        Records the time a stage of the request was reached, only the first time it is reached counts
+        :param stage: Name of the ResponseTimings field
+        :return: None
+        """
+        if getattr(self._timings, stage) is None:
+            setattr(self._timings, stage, time.perf_counter())
+
+    @property
+    def _download_threshold(self) -> int:
+        if self.download_threshold is not None:
+            return self.download_threshold
+        return (self.connection_settings or global_objects.connection_settings).download_threshold
+
+    def _should_download(self, content_length: int | None) -> bool:
+        """
+        Decides whether the reply should be streamed to disk, based on its announced size and content type
+        :param content_length: Value of the Content-Length header, if any
+        :return: True if the reply should be streamed to disk
+        """
+        if content_length is not None and content_length > self._download_threshold:
+            return True
+        content_type = self._qt_reply.network_reply.header(QNetworkRequest.KnownHeaders.ContentTypeHeader) or ""
+        return content_type.split(";")[0].strip().lower() in self.download_content_types
+
+    def _start_download(self) -> None:
+        """
+        Opens the download file and moves anything already buffered into it
+        :return: None
+        """
+        if self.download_path:
+            self._download_file = open(self.download_path, "w+b")
+        else:
+            self._download_file = global_objects.get_download_directory().new_file()
+        if self._buffer is not None:
+            self._download_file.write(self._buffer.view())
+            self._buffer = None
+
+    def _read_chunk(self, final: bool = False) -> None:
+        """
+        Called when self._qt_reply is ready to read, copies whatever is available into the response buffer, or into
+        the download file once the reply is known to be too large to keep in memory
+        :param final: The reply has finished, whatever it is it is read as a whole rather than handed to a stream
+        :return: None
+        """
+        reply = self._qt_reply.network_reply
+        self._mark("first_byte")
+        if self._idle_timer.isActive():
+            self._idle_timer.start()
+        if self._buffer is None and self._download_file is None:
+            content_length = reply.header(QNetworkRequest.KnownHeaders.ContentLengthHeader)
+            if self._accept_compressed:
+                self._decoder = stream_decoder(reply.rawHeader(b"Content-Encoding").data().decode("latin-1"))
+            stream = None
+            if not final:
+                stream = response_stream(self, reply, self.stream_mode, self._decoder, self._method)
+            if stream is not None:
+                self._start_stream(stream)
+                return
+            if self._should_download(content_length):
+                self._start_download()
+            else:
+                # Content-Length is the compressed size, it says nothing about the decoded size
+                self._buffer = _ResponseBuffer(content_length if self._decoder is None else None)
+
+        chunk = reply.readAll().data()
+        self._wire_size += len(chunk)
+        if self._decoder is not None:
+            try:
+                chunk = self._decoder.decompress(chunk)
+            except ValueError:
+                self._decoder = None
+                self._decode_failed = True
+                reply.abort()
+                return
+        if not self._decode_failed:
+            self._write_body(chunk)
+
+    def _start_stream(self, stream: ResponseStream) -> None:
+        """
+        Hands the reply over to a ResponseStream, which parses its events from here on
+        :param stream: Stream that took over the reply
+        :return: None
+        """
+        reply = self._qt_reply.network_reply
+        reply.readyRead.disconnect(self._read_chunk)
+        reply.finished.disconnect(self._build_emit_response)
+        # a stream may be quiet for as long as it likes
+        self._idle_timer.stop()
+        self._record_connection()
+        # the stream owns the reply from here on
+        self._qt_reply.deleteLater()
+        self._qt_reply = None
+        self.stream.emit(stream)
+        stream.feed(reply.readAll().data())
+
+    def _write_body(self, chunk: bytes) -> None:
+        """
+        Writes decoded bytes to the response buffer, or to the download file once the reply is too large for memory
+        :param chunk: Decoded bytes
+        :return: None
+        """
+        if self._download_file is not None:
+            self._download_file.write(chunk)
+            return
+        self._buffer.write(chunk)
 
-    def _emit_error(self) -> None:
-        self.error.emit()
+        # chunked replies don't announce their size, spill to disk once they outgrow the threshold
+        if len(self._buffer) > self._download_threshold:
+            self._start_download()
 
     def _build_emit_response(self) -> None:
         """
-        Called when self._qt_reply is ready to read, puts the response into a Response object and emits it as the
-        `response` signal
+        Called when self._qt_reply has finished, hands the buffered payload to a worker thread for parsing. The
+        `response` signal is emitted from `_emit_parsed_response` once the worker is done.
         :return: None
         """
-        # try to parse the response payload as JSON
-        try:
-            parsed_payload = orjson.loads(self._qt_reply.network_reply.readAll().data())
-        except orjson.JSONDecodeError as e:
-            self.error.emit()
+        reply = self._qt_reply.network_reply
+        self._mark("finished")
+
+        # the reply never got as far as an HTTP status, HTTP error statuses still produce a response
+        self._status_code = reply.attribute(QNetworkRequest.Attribute.HttpStatusCodeAttribute)
+        if self._cancelled:
+            self._release_reply()
+            self._discard_body()
+            self._emit_error(ERROR_CANCELLED, "Cancelled")
+            return
+        if self._decode_failed:
+            self._emit_decode_error()
+            return
+        if self._status_code is None:
+            network_error = reply.error()
+            message = reply.errorString()
+            if self.retry_policy.should_retry(self._method, self._attempt, None):
+                self._retry()
+                return
+            self._release_reply()
+            self._discard_body()
+            timed_out = network_error in (QNetworkReply.NetworkError.OperationCanceledError,
+                                          QNetworkReply.NetworkError.TimeoutError)
+            self._emit_error(ERROR_TIMEOUT if timed_out else ERROR_NETWORK, message, network_error.value)
+            return
+        if self.retry_policy.should_retry(self._method, self._attempt, self._status_code):
+            self._retry(reply.rawHeader(b"Retry-After").data().decode("latin-1") or None)
             return
+        self._request_url = reply.url().toString()
+
+        # drain anything that arrived after the last readyRead, a stream that finished before its first read is read
+        # as a whole
+        self._read_chunk(final=True)
+        if self._decoder is not None:
+            try:
+                self._write_body(self._decoder.flush())
+            except ValueError:
+                self._decode_failed = True
+        # the last chunk or the end of the compressed stream may be what is corrupt
+        if self._decode_failed:
+            self._emit_decode_error()
+            return
+        self._record_connection()
+
+        # the server confirmed our cached copy is still valid
+        raw_headers = [(key.data(), value.data()) for key, value in reply.rawHeaderPairs()]
+        if self._download_file is None:
+            self._release_reply()
+        if self._status_code == 304 and self._cache_entry is not None:
+            self._serve_from_cache(CACHE_REVALIDATED, raw_headers)
+            return
+
+        # downloaded bodies are never parsed, the response carries a memory-mapped view of the file instead
+        if self._download_file is not None:
+            self._emit_downloaded_response()
+            return
+
+        if self._cache_key is not None:
+            stored = self.cache.store(
+                self._cache_key,
+                self._status_code,
+                [(key.decode("latin-1"), value.decode("latin-1")) for key, value in raw_headers],
+                self._buffer.view(),
+                self._cache_request_headers
+            )
+            self._cache_status = CACHE_MISS if stored is not None else None
+
+        # the headers were copied out on this thread, QNetworkReply must not be touched from the worker. The body is
+        # handed over as a view of the buffer, it is never written to again.
+        self._start_parse(self._buffer.view(), raw_headers)
+
+    def _emit_decode_error(self) -> None:
+        self._release_reply()
+        self._discard_body()
+        self._emit_error(ERROR_DECODE, "The response body could not be decoded")
+
+    def _start_parse(self, payload: memoryview | bytes, raw_headers: list[tuple[bytes, bytes]]) -> None:
+        """
+        Hands a payload to a worker thread for parsing, `_emit_parsed_response` is called once it is done
+        :param payload: Response body
+        :param raw_headers: Response headers
+        :return: None
+        """
+        self._body_size = len(payload)
+        self._raw_body = memoryview(payload)
+        self._parse_task = _ParseResponseTask(payload, raw_headers)
+        self._parse_task.signals.parsed.connect(self._emit_parsed_response)
+        QThreadPool.globalInstance().start(self._parse_task)
+
+    def _serve_from_cache(self, cache_status: str, raw_headers: list[tuple[bytes, bytes]]) -> None:
+        """
+        Answers the request with the cached copy in self._cache_entry
+        :param cache_status: CACHE_HIT, or CACHE_REVALIDATED when the server answered with a 304
+        :param raw_headers: Headers of the 304 response, they refresh the freshness of the cached copy
+        :return: None
+        """
+        entry = self._cache_entry
+        if cache_status == CACHE_REVALIDATED:
+            self.cache.refresh(entry, [(key.decode("latin-1"), value.decode("latin-1")) for key, value in raw_headers])
+        else:
+            self._mark("finished")
+        self._status_code = entry.status_code
+        self._cache_status = cache_status
+        self._start_parse(
+            self.cache.read_body(entry),
+            [(key.encode("latin-1"), value.encode("latin-1")) for key, value in entry.headers]
+        )
+
+    def _record_connection(self) -> None:
+        """
+        Reports how the reply was carried to the connection tracker
+        :return: None
+        """
+        reply = self._qt_reply.network_reply
+        self._http2 = bool(reply.attribute(QNetworkRequest.Attribute.Http2WasUsedAttribute))
+        global_objects.get_connection_tracker().record(
+            url=reply.url().toString(),
+            opened_connection=not self._connection_reused,
+            http2=self._http2,
+            encrypted=bool(reply.attribute(QNetworkRequest.Attribute.ConnectionEncryptedAttribute))
+        )
+
+    @property
+    def _connection_reused(self) -> bool:
+        return self._timings.connecting is None
+
+    def _emit_downloaded_response(self) -> None:
+        """
+        Closes the download file, maps it into memory and emits it as the `response` signal
+        :return: None
+        """
+        reply = self._qt_reply.network_reply
+        self._download_file.flush()
+        body_path = self._download_file.name
+        body_size = os.fstat(self._download_file.fileno()).st_size
+        body_mmap = None
+        if body_size > 0:
+            body_mmap = mmap.mmap(self._download_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._download_file.close()
+        self._download_file = None
 
-        # parse the response headers
         parsed_headers = {}
-        for x in self._qt_reply.network_reply.rawHeaderPairs():
-            x: tuple[QByteArray, QByteArray]
-            parsed_headers[x[0].toStdString()] = x[1].toStdString()
+        for key, value in reply.rawHeaderPairs():
+            parsed_headers[key.data().decode("latin-1")] = value.data().decode("latin-1")
+        self._release_reply()
+
+        response = Response(
+            status_code=self._status_code,
+            response_body=None,
+            response_headers=parsed_headers,
+            request_url=self._request_url,
+            request_method=self._method,
+            body_path=body_path,
+            body_mmap=body_mmap,
+            body_size=body_size,
+            temporary_body=not self.download_path,
+            wire_size=self._wire_size,
+            timings=self._timings,
+            http2=self._http2,
+            connection_reused=self._connection_reused
+        )
+        self.response.emit(response)
 
-        # build and emit the response object
+    def _emit_parsed_response(self, parsed_payload: dict | list | str | None, parsed_headers: dict,
+                              body_error: str | None) -> None:
+        """
+        Called when the parse worker is done, puts the response into a Response object and emits it as the
+        `response` signal
+        :param parsed_payload: Decoded JSON body, None if it isn't JSON
+        :param parsed_headers: Decoded response headers
+        :param body_error: Why a JSON body couldn't be parsed
+        :return: None
+        """
+        raw_body, self._raw_body = self._raw_body, None
+        # cancelled while the worker was parsing
+        if self._cancelled:
+            self._parse_task = None
+            return
+        self._mark("parsed")
         response = Response(
-            status_code=self._qt_reply.network_reply.attribute(QNetworkRequest.Attribute.HttpStatusCodeAttribute),
+            status_code=self._status_code,
             response_body=parsed_payload,
             response_headers=parsed_headers,
-            request_url=self._qt_reply.network_reply.url().toString(),
-            request_method=self._qt_reply.method
+            request_url=self._request_url,
+            request_method=self._method,
+            body_size=self._body_size,
+            wire_size=self._wire_size,
+            timings=self._timings,
+            http2=self._http2,
+            connection_reused=self._connection_reused,
+            cache_status=self._cache_status,
+            raw_body=raw_body,
+            body_error=body_error
         )
-        self.response.emit(response)
\ No newline at end of file
+        self._parse_task = None
+        self.response.emit(response)
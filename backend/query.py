@@ -0,0 +1,454 @@
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any
+
+from PySide6.QtCore import QObject, Signal, QRunnable
+
+# a query stops collecting once it has this many matches
+MAX_MATCHES = 100_000
+# how many nodes are visited between checks for cancellation
+_CANCEL_CHECK_INTERVAL = 4096
+
+_name = re.compile(r"[A-Za-z_$][\w$-]*")
+_number = re.compile(r"-?\d+(\.\d+)?([eE][+-]?\d+)?")
+_operators = ("==", "!=", "<=", ">=", "<", ">")
+_literals = {"true": True, "false": False, "null": None}
+
+Path = tuple[str | int, ...]
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+class QueryCancelled(Exception):
+    pass
+
+
+class _Parser:
+    """
+    Parses a JSONPath expression into steps. jq-style shorthand is accepted too: a leading `.` stands for `$` and
+    `[]` for `[*]`, so `.items[].id` and `$.items[*].id` are the same query.
+    """
+    def __init__(self, expression: str):
+        self.text = expression.strip()
+        self.position = 0
+
+    def parse(self) -> tuple:
+        if self.text.startswith("$"):
+            self.position = 1
+        elif not self.text.startswith("."):
+            raise QuerySyntaxError("A query starts with $ or .")
+        steps = []
+        while not self._done():
+            steps.append(self._step())
+        return tuple(steps)
+
+    def _done(self) -> bool:
+        return self.position >= len(self.text)
+
+    def _peek(self, token: str) -> bool:
+        return self.text.startswith(token, self.position)
+
+    def _expect(self, token: str) -> None:
+        if not self._peek(token):
+            raise QuerySyntaxError(f"Expected {token!r} at {self.position + 1}")
+        self.position += len(token)
+
+    def _skip_spaces(self) -> None:
+        while not self._done() and self.text[self.position] == " ":
+            self.position += 1
+
+    def _step(self) -> tuple:
+        if self._peek(".."):
+            self.position += 2
+            step = self._bracket() if self._peek("[") else self._member()
+            return "descend", step
+        if self._peek("."):
+            self.position += 1
+            # `.[0]` in jq is `[0]`, a bare `.` after `$` selects the document itself
+            if self._peek("["):
+                return self._bracket()
+            if self._done():
+                return "self", None
+            return self._member()
+        if self._peek("["):
+            return self._bracket()
+        raise QuerySyntaxError(f"Unexpected {self.text[self.position]!r} at {self.position + 1}")
+
+    def _member(self) -> tuple:
+        if self._peek("*"):
+            self.position += 1
+            return "wildcard", None
+        match = _name.match(self.text, self.position)
+        if match is None:
+            raise QuerySyntaxError(f"Expected a name at {self.position + 1}")
+        self.position = match.end()
+        return "child", match.group(0)
+
+    def _bracket(self) -> tuple:
+        self._expect("[")
+        self._skip_spaces()
+        if self._peek("]"):
+            step = "wildcard", None
+        elif self._peek("*"):
+            self.position += 1
+            step = "wildcard", None
+        elif self._peek("?"):
+            self.position += 1
+            self._skip_spaces()
+            self._expect("(")
+            step = "filter", self._filter()
+            self._skip_spaces()
+            self._expect(")")
+        elif self._peek("'") or self._peek('"'):
+            names = [self._string()]
+            self._skip_spaces()
+            while self._peek(","):
+                self.position += 1
+                self._skip_spaces()
+                names.append(self._string())
+                self._skip_spaces()
+            step = ("child", names[0]) if len(names) == 1 else ("names", tuple(names))
+        else:
+            step = self._index_or_slice()
+        self._skip_spaces()
+        self._expect("]")
+        return step
+
+    def _index_or_slice(self) -> tuple:
+        parts = [""]
+        while not self._done() and not self._peek("]"):
+            character = self.text[self.position]
+            if character == ":":
+                parts.append("")
+            elif character.isdigit() or character == "-":
+                parts[-1] += character
+            elif character != " ":
+                raise QuerySyntaxError(f"Unexpected {character!r} at {self.position + 1}")
+            self.position += 1
+        try:
+            numbers = [int(x) if x else None for x in parts]
+        except ValueError:
+            raise QuerySyntaxError("Malformed index") from None
+        if len(numbers) == 1:
+            if numbers[0] is None:
+                raise QuerySyntaxError("Empty index")
+            return "index", numbers[0]
+        if len(numbers) > 3:
+            raise QuerySyntaxError("A slice has at most three parts")
+        return "slice", tuple(numbers + [None] * (3 - len(numbers)))
+
+    def _string(self) -> str:
+        quote = self.text[self.position]
+        end = self.text.find(quote, self.position + 1)
+        if end == -1:
+            raise QuerySyntaxError(f"Unterminated string at {self.position + 1}")
+        value = self.text[self.position + 1:end]
+        self.position = end + 1
+        return value
+
+    def _filter(self) -> tuple:
+        self._expect("@")
+        relative = []
+        while self._peek(".") or self._peek("["):
+            if self._peek("["):
+                step = self._bracket()
+            else:
+                self.position += 1
+                step = self._member()
+            if step[0] not in ("child", "index"):
+                raise QuerySyntaxError("Filters only support names and indexes after @")
+            relative.append(step[1])
+        self._skip_spaces()
+        for operator in _operators:
+            if self._peek(operator):
+                self.position += len(operator)
+                self._skip_spaces()
+                return tuple(relative), operator, self._literal()
+        return tuple(relative), None, None
+
+    def _literal(self) -> Any:
+        if self._peek("'") or self._peek('"'):
+            return self._string()
+        for word, value in _literals.items():
+            if self._peek(word):
+                self.position += len(word)
+                return value
+        match = _number.match(self.text, self.position)
+        if match is None:
+            raise QuerySyntaxError(f"Expected a value at {self.position + 1}")
+        self.position = match.end()
+        return float(match.group(0)) if match.group(1) or match.group(2) else int(match.group(0))
+
+
+@lru_cache(maxsize=128)
+def compile_query(expression: str) -> tuple:
+    """
+    Parses a query, the steps of recent expressions are cached
+    :param expression: JSONPath or jq-style expression
+    :return: Tuple of steps
+    :raises QuerySyntaxError: The expression is malformed
+    """
+    return _Parser(expression).parse()
+
+
+class PathIndex:
+    """
+    Every node of a document with its parent and key, and the nodes of each object key. Built once per document, it
+    answers `$..name` without walking the document again. Nodes are numbered in document order.
+    """
+    def __init__(self, document: Any, is_cancelled=lambda: False):
+        self.parents = array("q")
+        self.keys: list[str | int | None] = []
+        self.by_key: dict[str, array] = {}
+        stack = [(-1, None, document)]
+        while stack:
+            if len(self.keys) % _CANCEL_CHECK_INTERVAL == 0 and is_cancelled():
+                raise QueryCancelled()
+            parent, key, value = stack.pop()
+            node = len(self.keys)
+            self.parents.append(parent)
+            self.keys.append(key)
+            if isinstance(key, str):
+                nodes = self.by_key.get(key)
+                if nodes is None:
+                    nodes = self.by_key[key] = array("q")
+                nodes.append(node)
+            # pushed in reverse so they are popped, and numbered, in document order
+            if isinstance(value, dict):
+                stack.extend((node, k, v) for k, v in reversed(value.items()))
+            elif isinstance(value, list):
+                stack.extend((node, i, value[i]) for i in range(len(value) - 1, -1, -1))
+
+    def path(self, node: int) -> Path:
+        parts = []
+        while node > 0:
+            parts.append(self.keys[node])
+            node = self.parents[node]
+        return tuple(reversed(parts))
+
+
+def value_at(document: Any, path: Path) -> Any:
+    for part in path:
+        document = document[part]
+    return document
+
+
+def format_path(path: Path) -> str:
+    """
+    Formats a path as JSONPath
+    :param path: Keys and indexes from the root
+    :return: String such as `$.items[0]['content type']`
+    """
+    parts = ["$"]
+    for part in path:
+        if isinstance(part, int):
+            parts.append(f"[{part}]")
+        elif _name.fullmatch(part):
+            parts.append(f".{part}")
+        else:
+            parts.append("['" + part.replace("'", "\\'") + "']")
+    return "".join(parts)
+
+
+class _Evaluation:
+    """One run of a query, counts visited nodes so it can notice cancellation promptly"""
+    def __init__(self, document: Any, index: PathIndex | None, is_cancelled):
+        self.document = document
+        self.index = index
+        self.is_cancelled = is_cancelled
+        self._visited = 0
+
+    def _visit(self) -> None:
+        self._visited += 1
+        if self._visited % _CANCEL_CHECK_INTERVAL == 0 and self.is_cancelled():
+            raise QueryCancelled()
+
+    def run(self, steps: tuple) -> list[tuple[Path, Any]]:
+        current = [((), self.document)]
+        for position, step in enumerate(steps):
+            if position == 0 and step[0] == "descend" and step[1][0] == "child" and self.index is not None:
+                current = self._indexed_descend(step[1][1])
+            else:
+                current = self._apply(step, current)
+            if len(current) > MAX_MATCHES:
+                del current[MAX_MATCHES:]
+        return current
+
+    def _indexed_descend(self, name: str) -> list[tuple[Path, Any]]:
+        matches = []
+        for node in self.index.by_key.get(name, ())[:MAX_MATCHES]:
+            self._visit()
+            path = self.index.path(node)
+            matches.append((path, value_at(self.document, path)))
+        return matches
+
+    def _apply(self, step: tuple, current: list[tuple[Path, Any]]) -> list[tuple[Path, Any]]:
+        kind, argument = step
+        matches = []
+        for path, value in current:
+            self._visit()
+            if kind == "self":
+                matches.append((path, value))
+            elif kind == "child":
+                if isinstance(value, dict) and argument in value:
+                    matches.append((path + (argument,), value[argument]))
+            elif kind == "names":
+                if isinstance(value, dict):
+                    matches += [(path + (x,), value[x]) for x in argument if x in value]
+            elif kind == "index":
+                if isinstance(value, list) and -len(value) <= argument < len(value):
+                    index = argument % len(value)
+                    matches.append((path + (index,), value[index]))
+            elif kind == "slice":
+                if isinstance(value, list):
+                    matches += [(path + (x,), value[x]) for x in range(*slice(*argument).indices(len(value)))]
+            elif kind == "wildcard":
+                matches += _children(path, value)
+            elif kind == "filter":
+                matches += [x for x in _children(path, value) if _matches_filter(x[1], argument)]
+            elif kind == "descend":
+                matches += self._apply(argument, self._descendants(path, value))
+            if len(matches) > MAX_MATCHES:
+                break
+        return matches
+
+    def _descendants(self, path: Path, value: Any) -> list[tuple[Path, Any]]:
+        """
+        Get a node and everything below it, in document order
+        :param path: Path of the node
+        :param value: The node
+        :return: List of (path, value)
+        """
+        nodes = []
+        stack = [(path, value)]
+        while stack:
+            self._visit()
+            path, value = stack.pop()
+            nodes.append((path, value))
+            stack.extend(reversed(_children(path, value)))
+        return nodes
+
+
+def _children(path: Path, value: Any) -> list[tuple[Path, Any]]:
+    if isinstance(value, dict):
+        return [(path + (k,), v) for k, v in value.items()]
+    if isinstance(value, list):
+        return [(path + (i,), v) for i, v in enumerate(value)]
+    return []
+
+
+def _matches_filter(value: Any, filter_: tuple) -> bool:
+    relative, operator, literal = filter_
+    try:
+        for part in relative:
+            value = value[part]
+    except (KeyError, IndexError, TypeError):
+        return False
+    if operator is None:
+        return True
+    try:
+        if operator == "==":
+            return value == literal
+        if operator == "!=":
+            return value != literal
+        if operator == "<":
+            return value < literal
+        if operator == "<=":
+            return value <= literal
+        if operator == ">":
+            return value > literal
+        return value >= literal
+    except TypeError:
+        return False
+
+
+def evaluate(document: Any, expression: str, index: PathIndex | None = None,
+             is_cancelled=lambda: False) -> list[tuple[Path, Any]]:
+    """
+    Runs a query against a parsed JSON document
+    :param document: Parsed JSON
+    :param expression: JSONPath or jq-style expression
+    :param index: Optional, PathIndex of the document, speeds up queries starting with `$..name`
+    :param is_cancelled: Optional, polled while the query runs
+    :return: List of (path, value), at most MAX_MATCHES
+    :raises QuerySyntaxError: The expression is malformed
+    :raises QueryCancelled: is_cancelled returned True
+    """
+    return _Evaluation(document, index, is_cancelled).run(compile_query(expression))
+
+
+class QueryCache:
+    """
+    What the queries of one document share: its PathIndex once a query has built it, and the matches of recent
+    expressions so going back to an earlier query doesn't run it again
+    """
+    max_results = 16
+
+    def __init__(self, document: Any):
+        self.document = document
+        self.index: PathIndex | None = None
+        self._results: OrderedDict[tuple, list[tuple[Path, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def results(self, steps: tuple) -> list[tuple[Path, Any]] | None:
+        with self._lock:
+            matches = self._results.get(steps)
+            if matches is not None:
+                self._results.move_to_end(steps)
+            return matches
+
+    def keep(self, steps: tuple, matches: list[tuple[Path, Any]]) -> None:
+        with self._lock:
+            self._results[steps] = matches
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+
+
+class _QuerySignals(QObject):
+    finished = Signal(int, list)
+    failed = Signal(int, str)
+
+
+class QueryTask(QRunnable):
+    """
+    Runs a query on a QThreadPool worker. A task is cancelled when the expression changes, a cancelled task emits
+    nothing. The path index is built by the first query that can use it and kept in the QueryCache.
+    """
+    def __init__(self, generation: int, cache: QueryCache, expression: str):
+        """
+        :param generation: Identifies the query, it is emitted with the results
+        :param cache: Cache of the document to query
+        :param expression: Query to run
+        """
+        super().__init__()
+        self.signals = _QuerySignals()
+        self.generation = generation
+        self._cache = cache
+        self._expression = expression
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def run(self) -> None:
+        try:
+            steps = compile_query(self._expression)
+            matches = self._cache.results(steps)
+            if matches is None:
+                if self._cache.index is None and steps and steps[0][0] == "descend":
+                    self._cache.index = PathIndex(self._cache.document, self._cancelled.is_set)
+                evaluation = _Evaluation(self._cache.document, self._cache.index, self._cancelled.is_set)
+                matches = evaluation.run(steps)
+                self._cache.keep(steps, matches)
+        except QueryCancelled:
+            return
+        except QuerySyntaxError as e:
+            self.signals.failed.emit(self.generation, str(e))
+            return
+        if not self._cancelled.is_set():
+            self.signals.finished.emit(self.generation, matches)
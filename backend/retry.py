@@ -0,0 +1,45 @@
+import random
+from dataclasses import dataclass
+
+# methods RFC 9110 defines as idempotent, only these are ever retried
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE")
+
+
+@dataclass
+class RetryPolicy:
+    """
+    When and how soon a failed request is sent again. Delays grow exponentially from `base_delay_ms`, capped at
+    `max_delay_ms`, and with `jitter` a random delay up to that bound is used so clients don't retry in lockstep.
+    """
+    max_attempts: int = 1
+    base_delay_ms: int = 200
+    max_delay_ms: int = 10_000
+    jitter: bool = True
+    retry_statuses: tuple[int, ...] = (429, 502, 503, 504)
+    retry_network_errors: bool = True
+
+    def should_retry(self, method: str, attempt: int, status_code: int | None) -> bool:
+        """
+        Decides whether a request should be sent again
+        :param method: HTTP method of the request
+        :param attempt: Attempts made so far, starting at 1
+        :param status_code: Status of the response, None if the request failed without one
+        :return: True if it should be retried
+        """
+        if attempt >= self.max_attempts or method.upper() not in IDEMPOTENT_METHODS:
+            return False
+        if status_code is None:
+            return self.retry_network_errors
+        return status_code in self.retry_statuses
+
+    def delay_ms(self, attempt: int, retry_after: str | None = None) -> int:
+        """
+        Get how long to wait before the next attempt
+        :param attempt: Attempts made so far, starting at 1
+        :param retry_after: Optional, the Retry-After header of the response. Only the delay-seconds form is honoured.
+        :return: Delay in milliseconds
+        """
+        if retry_after is not None and retry_after.strip().isdigit():
+            return min(int(retry_after.strip()) * 1000, self.max_delay_ms)
+        delay = min(self.base_delay_ms * 2 ** (attempt - 1), self.max_delay_ms)
+        return random.randint(0, delay) if self.jitter else delay
@@ -0,0 +1,142 @@
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from PySide6.QtCore import QObject, Signal
+
+from backend.network import Request, RequestSpec, Response, RequestError
+from backend.retry import RetryPolicy
+from backend.variables import Environment, RequestTemplate
+
+
+@dataclass
+class RunResult:
+    index: int
+    spec: RequestSpec
+    status_code: int | None
+    elapsed_ms: float
+    size: int
+    response: Response | None
+    error: RequestError | None = None
+
+
+class CollectionRunner(QObject):
+    """
+    Sends a collection of requests, keeping at most `concurrency` of them in flight at once. Each request's
+    placeholders are filled just before it is sent, so values extracted from earlier responses are available to later
+    requests.
+    """
+    result = Signal(RunResult)
+    finished = Signal()
+
+    def __init__(self, parent: QObject, specs: list[RequestSpec], concurrency: int = 8,
+                 variables: list[dict] | None = None, environment: Environment | None = None,
+                 timeout_ms: int | None = None, retry_policy: RetryPolicy | None = None):
+        """
+        :param parent: Parent QObject
+        :param specs: Requests to send, in order
+        :param concurrency: Maximum amount of requests in flight
+        :param variables: Optional, one variable set per request in `specs`
+        :param environment: Optional, environment to fill placeholders from and capture extracted values into
+        :param timeout_ms: Optional, per-request timeout, see Request
+        :param retry_policy: Optional, per-request retry policy, see Request
+        """
+        super().__init__(parent)
+        self.concurrency = max(1, concurrency)
+
+        # variables
+        self._queue = deque(enumerate(specs))
+        self._variables = variables
+        self._environment = environment
+        self._timeout_ms = timeout_ms
+        self._retry_policy = retry_policy
+        # requests of a collection often share one body, it is only compiled once
+        self._body_cache = {}
+        self._in_flight: dict[int, tuple[Request, float]] = {}
+        self._stopped = False
+
+    @property
+    def running(self) -> bool:
+        return bool(self._in_flight) or (bool(self._queue) and not self._stopped)
+
+    def start(self) -> None:
+        """
+        Fills the concurrency window, the rest of the collection is sent as requests complete
+        :return: None
+        """
+        self._stopped = False
+        self._fill()
+
+    def stop(self) -> None:
+        """
+        Stops sending queued requests, requests already in flight still report their results
+        :return: None
+        """
+        self._stopped = True
+        self._queue.clear()
+        if not self._in_flight:
+            self.finished.emit()
+
+    def cancel(self) -> None:
+        """
+        Stops sending queued requests and cancels the ones in flight, which report their results as cancelled
+        :return: None
+        """
+        self._stopped = True
+        self._queue.clear()
+        if not self._in_flight:
+            self.finished.emit()
+            return
+        # the last cancelled request to complete emits finished
+        for request, _ in list(self._in_flight.values()):
+            request.cancel()
+
+    def _fill(self) -> None:
+        while not self._stopped and self._queue and len(self._in_flight) < self.concurrency:
+            index, spec = self._queue.popleft()
+            variables = self._variables[index] if self._variables is not None and index < len(self._variables) \
+                else None
+            spec = RequestTemplate(spec, self._body_cache).render(self._environment, variables)
+            self._send(index, spec)
+
+    def _send(self, index: int, spec: RequestSpec) -> None:
+        """
+        Sends a single request of the collection
+        :param index: Position of the request in the collection
+        :param spec: Request to send
+        :return: None
+        """
+        request = Request(self, timeout_ms=self._timeout_ms, retry_policy=self._retry_policy)
+        request.response.connect(lambda response: self._complete(index, spec, response))
+        request.error.connect(lambda error: self._complete(index, spec, None, error))
+        self._in_flight[index] = (request, time.perf_counter())
+        request.send(spec)
+
+    def _complete(self, index: int, spec: RequestSpec, response: Response | None,
+                  error: RequestError | None = None) -> None:
+        """
+        Called when a request of the collection completes, reports it and sends the next one
+        :param index: Position of the request in the collection
+        :param spec: Request that was sent
+        :param response: The response, None if the request failed
+        :param error: Why the request failed, if it did
+        :return: None
+        """
+        if index not in self._in_flight:
+            return
+        request, started = self._in_flight.pop(index)
+        request.deleteLater()
+        if response is not None and self._environment is not None:
+            self._environment.capture(response)
+        self.result.emit(RunResult(
+            index=index,
+            spec=spec,
+            status_code=response.status_code if response else None,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+            size=response.body_size if response else 0,
+            response=response,
+            error=error
+        ))
+        self._fill()
+        if not self._in_flight and not self._queue:
+            self.finished.emit()
@@ -0,0 +1,242 @@
+import os
+import struct
+from dataclasses import dataclass, field, asdict
+
+import orjson
+import zstandard
+
+from backend.content import BODY_JSON, BODY_FORM, BODY_MULTIPART, VIEW_TEXT, body_view, decode_text, detect_charset
+from backend.network import Response, RequestSpec
+
+# file layout:
+#   magic (8 bytes) | flags (u8) | index length (u32, little endian) | index (orjson) | records
+# the index lists every entry's name, method and url with the offset and length of its record, relative to the end
+# of the index. Records are orjson, each compressed on its own so any one of them can be read without the others.
+_MAGIC = b"RCSESH01"
+_HEADER = struct.Struct("<8sBI")
+_FLAG_ZSTD = 0x01
+
+MAX_SAVED_RESPONSES = 5
+
+
+class SessionFormatError(Exception):
+    pass
+
+
+@dataclass
+class SessionEntry:
+    name: str
+    method: str = "GET"
+    base_url: str = ""
+    path: str = ""
+    headers: dict = field(default_factory=dict)
+    query_params: dict = field(default_factory=dict)
+    # the text of a JSON or raw body, or the path of a file body
+    body: str = ""
+    body_encoding: str | None = None
+    body_type: str = BODY_JSON
+    # the fields of a form or multipart body
+    body_fields: dict = field(default_factory=dict)
+    expected_status: int | None = None
+    responses: list[dict] = field(default_factory=list)
+
+    @property
+    def url(self) -> str:
+        return self.base_url + self.path
+
+    def to_spec(self) -> RequestSpec:
+        """
+        Builds the request this entry describes, a JSON body that doesn't parse is sent exactly as it was typed
+        :return: RequestSpec
+        """
+        body = None
+        if self.body_type in (BODY_FORM, BODY_MULTIPART):
+            body = self.body_fields
+        elif self.body_type != BODY_JSON:
+            body = self.body
+        elif self.body.strip():
+            try:
+                body = orjson.loads(self.body)
+            except orjson.JSONDecodeError:
+                body = self.body.encode()
+        return RequestSpec(
+            method=self.method,
+            url=self.url,
+            query_params=self.query_params,
+            headers=self.headers,
+            body=body,
+            body_encoding=self.body_encoding,
+            body_type=self.body_type
+        )
+
+    def save_response(self, response: Response) -> None:
+        """
+        Keeps a response with this entry, only the most recent MAX_SAVED_RESPONSES are kept
+        :param response: Response to keep
+        :return: None
+        """
+        body = response.response_body
+        raw_body = response.raw_body
+        if body is None and raw_body is not None and body_view(response.content_type, raw_body) == VIEW_TEXT:
+            body = decode_text(raw_body, detect_charset(response.content_type, raw_body))
+        self.responses.append({
+            "status_code": response.status_code,
+            "response_body": body,
+            "response_headers": response.response_headers,
+            "request_url": response.request_url,
+            "request_method": response.request_method,
+        })
+        del self.responses[:-MAX_SAVED_RESPONSES]
+
+
+@dataclass
+class _IndexEntry:
+    name: str
+    method: str
+    url: str
+    offset: int
+    length: int
+
+
+class _SessionReader:
+    """Reads individual records out of a session file, the file stays open until the session is closed"""
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        header = self._file.read(_HEADER.size)
+        if len(header) != _HEADER.size or not header.startswith(_MAGIC):
+            self._file.close()
+            raise SessionFormatError(f"{path} is not a session file")
+        _, flags, index_length = _HEADER.unpack(header)
+        self.compressed = bool(flags & _FLAG_ZSTD)
+        try:
+            self.index = [_IndexEntry(**x) for x in orjson.loads(self._file.read(index_length))]
+        except (orjson.JSONDecodeError, TypeError) as e:
+            self._file.close()
+            raise SessionFormatError(f"{path} has a corrupt index") from e
+        self._records_start = _HEADER.size + index_length
+        self._decompressor = zstandard.ZstdDecompressor() if self.compressed else None
+
+    def read_raw(self, index_entry: _IndexEntry) -> bytes:
+        """
+        Reads a record as stored on disk
+        :param index_entry: Entry of the record to read
+        :return: Bytes, compressed if the file is
+        """
+        self._file.seek(self._records_start + index_entry.offset)
+        return self._file.read(index_entry.length)
+
+    def read(self, index_entry: _IndexEntry) -> SessionEntry:
+        """
+        Reads and decodes a record
+        :param index_entry: Entry of the record to read
+        :return: SessionEntry
+        """
+        record = self.read_raw(index_entry)
+        if self._decompressor is not None:
+            record = self._decompressor.decompress(record)
+        return SessionEntry(**orjson.loads(record))
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class Session:
+    """
+    An ordered collection of saved requests. Opening a session only reads its index, each entry is read from disk the
+    first time it is asked for. Entries that were never read are copied to the new file as-is when saving.
+    """
+    def __init__(self):
+        self._entries: list[SessionEntry | _IndexEntry] = []
+        self._reader: _SessionReader | None = None
+
+    @classmethod
+    def open(cls, path: str) -> "Session":
+        """
+        Opens a session file, reading only its index
+        :param path: Path of the .sesh file
+        :return: Session
+        """
+        session = cls()
+        session._reader = _SessionReader(path)
+        session._entries = list(session._reader.index)
+        return session
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def summary(self, index: int) -> tuple[str, str, str]:
+        """
+        Get the name, method and url of an entry without reading it from disk
+        :param index: Position of the entry
+        :return: Tuple of name, method and url
+        """
+        entry = self._entries[index]
+        return entry.name, entry.method, entry.url
+
+    def get(self, index: int) -> SessionEntry:
+        """
+        Get an entry, reading it from disk the first time
+        :param index: Position of the entry
+        :return: SessionEntry
+        """
+        entry = self._entries[index]
+        if isinstance(entry, _IndexEntry):
+            entry = self._reader.read(entry)
+            self._entries[index] = entry
+        return entry
+
+    def append(self, entry: SessionEntry) -> int:
+        self._entries.append(entry)
+        return len(self._entries) - 1
+
+    def replace(self, index: int, entry: SessionEntry) -> None:
+        self._entries[index] = entry
+
+    def remove(self, index: int) -> None:
+        del self._entries[index]
+
+    def save(self, path: str, compress: bool = True) -> None:
+        """
+        Writes the session to a file, the file is replaced atomically so it can be the one the session was opened from
+        :param path: Path of the .sesh file
+        :param compress: Compress each record with zstd
+        :return: None
+        """
+        compressor = zstandard.ZstdCompressor(level=3) if compress else None
+        index = []
+        records = []
+        offset = 0
+        for entry in self._entries:
+            if isinstance(entry, _IndexEntry) and self._reader.compressed == compress:
+                # never read, copy the stored record as-is
+                record = self._reader.read_raw(entry)
+            else:
+                if isinstance(entry, _IndexEntry):
+                    entry = self._reader.read(entry)
+                record = orjson.dumps(asdict(entry))
+                if compressor is not None:
+                    record = compressor.compress(record)
+            index.append(_IndexEntry(entry.name, entry.method, entry.url, offset, len(record)))
+            records.append(record)
+            offset += len(record)
+
+        encoded_index = orjson.dumps([asdict(x) for x in index])
+        with open(path + ".tmp", "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _FLAG_ZSTD if compress else 0, len(encoded_index)))
+            f.write(encoded_index)
+            f.writelines(records)
+
+        # the new file replaces the one we may be reading from, point the reader at it
+        if self._reader is not None:
+            self._reader.close()
+        os.replace(path + ".tmp", path)
+        self._reader = _SessionReader(path)
+        self._entries = [
+            entry if isinstance(entry, SessionEntry) else index_entry
+            for entry, index_entry in zip(self._entries, self._reader.index)
+        ]
+
+    def close(self) -> None:
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
@@ -0,0 +1,154 @@
+import argparse
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+from backend.compression import compress, REQUEST_ENCODINGS
+
+# chunked replies are written in chunks of this many bytes
+_CHUNK_SIZE = 64 * 1024
+_RECORD = b'{"id":%d,"name":"restcutie","active":true,"score":0.5,"tags":["a","b","c"]}'
+
+
+def canned_payload(size: int) -> bytes:
+    """
+    Builds a JSON array of records that serializes to roughly `size` bytes. The records are formatted straight into
+    one buffer, a payload of hundreds of MiB never exists as Python objects.
+    :param size: Approximate size of the payload in bytes
+    :return: Encoded JSON
+    """
+    count = max(1, size // (len(_RECORD % 0) + 1))
+    payload = bytearray(b"[")
+    for x in range(count):
+        if x:
+            payload += b","
+        payload += _RECORD % x
+    payload += b"]"
+    return bytes(payload)
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """
+    Answers every method with canned JSON. The path selects the behaviour:
+    `/bytes/<n>` returns a payload of about n bytes, `/status/<code>` answers with that status and
+    `/delay/<ms>` sleeps before answering. Anything else returns a small payload.
+    The query string selects how it is sent: `chunked=1` uses chunked transfer encoding and `encoding=gzip` or
+    `encoding=zstd` compresses the payload.
+    """
+    protocol_version = "HTTP/1.1"
+    _route = re.compile(r"^/(bytes|status|delay)/(\d+)")
+
+    def _handle(self) -> None:
+        # drain the request body so keep-alive connections stay usable
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        encoding = query.get("encoding", [None])[0]
+        if encoding not in REQUEST_ENCODINGS:
+            encoding = None
+        chunked = query.get("chunked", ["0"])[0] == "1"
+
+        status = 200
+        size = 1024
+        match = self._route.match(url.path)
+        if match is not None:
+            kind, value = match.group(1), int(match.group(2))
+            if kind == "bytes":
+                size = value
+            elif kind == "status":
+                status = value
+            elif kind == "delay":
+                time.sleep(value / 1000)
+        payload = self.server.payload_cache(size, encoding)
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        if not chunked:
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        view = memoryview(payload)
+        for start in range(0, len(view), _CHUNK_SIZE):
+            chunk = view[start:start + _CHUNK_SIZE]
+            self.wfile.write(b"%x\r\n" % len(chunk))
+            self.wfile.write(chunk)
+            self.wfile.write(b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = _handle
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    """A local HTTP server with canned JSON responses, used to exercise the client without a real backend"""
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _StandInHandler)
+        self._payloads: dict[tuple[int, str | None], bytes] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def payload_cache(self, size: int, encoding: str | None = None) -> bytes:
+        """
+        Get the canned payload for a size, building it the first time it is asked for
+        :param size: Approximate size of the payload in bytes
+        :param encoding: Optional, compress the payload with "gzip" or "zstd"
+        :return: Encoded JSON
+        """
+        with self._lock:
+            if (size, None) not in self._payloads:
+                self._payloads[(size, None)] = canned_payload(size)
+            if (size, encoding) not in self._payloads:
+                self._payloads[(size, encoding)] = compress(self._payloads[(size, None)], encoding)
+            return self._payloads[(size, encoding)]
+
+    def start(self) -> "StandInServer":
+        """
+        Starts serving on a background thread
+        :return: self
+        """
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops serving and closes the socket
+        :return: None
+        """
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    # run on its own, e.g. by the benchmark, so its payloads don't count towards the memory of the client
+    parser = argparse.ArgumentParser(description="Serve canned JSON for benchmarks and load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="Port to listen on, any free port if omitted")
+    arguments = parser.parse_args()
+    server = StandInServer(arguments.host, arguments.port)
+    # the first line of output is the URL, whoever started the server reads it to know where to send requests
+    print(server.url, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
@@ -0,0 +1,349 @@
+import codecs
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtNetwork import QNetworkReply, QNetworkRequest
+
+from backend.compression import StreamDecoder
+
+# how Request treats streaming responses: never (the default, the body is buffered until the reply finishes), only
+# when the content type is a known stream format, or always
+STREAM_AUTO = "auto"
+STREAM_ALWAYS = "always"
+
+FORMAT_SSE = "sse"
+FORMAT_NDJSON = "ndjson"
+FORMAT_CHUNKS = "chunks"
+
+STREAM_CONTENT_TYPES = {
+    "text/event-stream": FORMAT_SSE,
+    "application/x-ndjson": FORMAT_NDJSON,
+    "application/ndjson": FORMAT_NDJSON,
+    "application/jsonl": FORMAT_NDJSON,
+    "application/x-jsonlines": FORMAT_NDJSON,
+}
+
+DEFAULT_RETAINED_EVENTS = 10_000
+
+_line_break = re.compile(r"\r\n|\r|\n")
+
+
+def stream_format(content_type: str | None) -> str | None:
+    """
+    Get the stream format of a content type
+    :param content_type: Value of the Content-Type header, may be empty
+    :return: FORMAT_SSE, FORMAT_NDJSON or None if it isn't a stream format
+    """
+    return STREAM_CONTENT_TYPES.get((content_type or "").split(";")[0].strip().lower())
+
+
+@dataclass(slots=True)
+class StreamEvent:
+    received: float
+    data: str
+    event: str | None = None
+    id: str | None = None
+    size: int = 0
+
+
+class _LineSplitter:
+    """Splits decoded text into lines as it arrives, a line ending split across two chunks still counts once"""
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._pending = ""
+        self._after_cr = False
+
+    def feed(self, chunk: bytes) -> list[str]:
+        text = self._decoder.decode(chunk)
+        if self._after_cr and text.startswith("\n"):
+            text = text[1:]
+        self._after_cr = text.endswith("\r")
+        # the last part is an incomplete line, empty if the text ended on a line break
+        lines = _line_break.split(self._pending + text)
+        self._pending = lines.pop()
+        return lines
+
+    def flush(self) -> list[str]:
+        line = self._pending + self._decoder.decode(b"", final=True)
+        self._pending = ""
+        return [line] if line else []
+
+
+class SseParser:
+    """Parses Server-Sent Events incrementally, as described by the HTML living standard"""
+    def __init__(self):
+        self._lines = _LineSplitter()
+        self._data: list[str] = []
+        self._event: str | None = None
+        self._id: str | None = None
+        self._size = 0
+
+    def feed(self, chunk: bytes) -> list[StreamEvent]:
+        """
+        Parses the next chunk of the stream
+        :param chunk: Decoded bytes
+        :return: Events completed by this chunk
+        """
+        events = []
+        received = time.time()
+        for line in self._lines.feed(chunk):
+            if not line:
+                if self._data:
+                    events.append(StreamEvent(received, "\n".join(self._data), self._event, self._id, self._size))
+                self._data = []
+                self._event = None
+                self._size = 0
+                continue
+            self._size += len(line) + 1
+            if line.startswith(":"):
+                continue
+            name, _, value = line.partition(":")
+            if value.startswith(" "):
+                value = value[1:]
+            if name == "data":
+                self._data.append(value)
+            elif name == "event":
+                self._event = value
+            elif name == "id" and "\0" not in value:
+                self._id = value
+        return events
+
+    def flush(self) -> list[StreamEvent]:
+        # an event without its closing blank line is discarded, as a browser would
+        self._lines.flush()
+        return []
+
+
+class NdjsonParser:
+    """Parses newline delimited JSON incrementally, one event per non-empty line"""
+    def __init__(self):
+        self._lines = _LineSplitter()
+
+    def feed(self, chunk: bytes) -> list[StreamEvent]:
+        received = time.time()
+        return [StreamEvent(received, x, size=len(x) + 1) for x in self._lines.feed(chunk) if x.strip()]
+
+    def flush(self) -> list[StreamEvent]:
+        received = time.time()
+        return [StreamEvent(received, x, size=len(x)) for x in self._lines.flush() if x.strip()]
+
+
+class ChunkParser:
+    """Treats every chunk read from the reply as an event, for chunked and long-poll responses in no stream format"""
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def feed(self, chunk: bytes) -> list[StreamEvent]:
+        text = self._decoder.decode(chunk)
+        return [StreamEvent(time.time(), text, size=len(chunk))] if text else []
+
+    def flush(self) -> list[StreamEvent]:
+        text = self._decoder.decode(b"", final=True)
+        return [StreamEvent(time.time(), text, size=len(text))] if text else []
+
+
+def frame_parser(stream_format_: str) -> SseParser | NdjsonParser | ChunkParser:
+    if stream_format_ == FORMAT_SSE:
+        return SseParser()
+    if stream_format_ == FORMAT_NDJSON:
+        return NdjsonParser()
+    return ChunkParser()
+
+
+class RingBuffer:
+    """
+    Keeps at most `capacity` items, appending to a full buffer drops the oldest one. Storage is allocated once and
+    indexing is from the oldest item kept, both in constant time.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._items: list = [None] * self.capacity
+        self._start = 0
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int):
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return self._items[(self._start + index) % self.capacity]
+
+    def extend(self, items: list) -> int:
+        """
+        Appends items, dropping the oldest ones once full
+        :param items: Items to append
+        :return: Amount of items dropped
+        """
+        dropped = 0
+        for item in items:
+            if self._length == self.capacity:
+                self.drop(1)
+                dropped += 1
+            self._items[(self._start + self._length) % self.capacity] = item
+            self._length += 1
+        return dropped
+
+    def drop(self, count: int) -> None:
+        """
+        Drops the oldest items
+        :param count: Amount of items to drop
+        :return: None
+        """
+        for _ in range(min(count, self._length)):
+            self._items[self._start] = None
+            self._start = (self._start + 1) % self.capacity
+            self._length -= 1
+
+    def resize(self, capacity: int) -> None:
+        """
+        Changes the capacity, keeping the newest items that fit
+        :param capacity: New capacity
+        :return: None
+        """
+        kept = [self[x] for x in range(max(0, self._length - capacity), self._length)]
+        self.__init__(capacity)
+        self.extend(kept)
+
+    def clear(self) -> None:
+        self.__init__(self.capacity)
+
+
+class EventRateStats:
+    """Counts events and bytes, and the event rate over the last `window_seconds`"""
+    def __init__(self, window_seconds: int = 10):
+        self.window_seconds = window_seconds
+        self.started = time.time()
+        self.events = 0
+        self.bytes = 0
+        # [second, events in that second], oldest first
+        self._seconds: deque[list[int]] = deque()
+
+    def add(self, events: list[StreamEvent]) -> None:
+        for event in events:
+            self.events += 1
+            self.bytes += event.size
+            second = int(event.received)
+            if self._seconds and self._seconds[-1][0] == second:
+                self._seconds[-1][1] += 1
+            else:
+                self._seconds.append([second, 1])
+
+    def rate(self, now: float | None = None) -> float:
+        """
+        Get the amount of events per second over the window
+        :param now: Optional, the current time
+        :return: Events per second
+        """
+        now = now or time.time()
+        while self._seconds and self._seconds[0][0] <= now - self.window_seconds:
+            self._seconds.popleft()
+        window = min(self.window_seconds, max(now - self.started, 1))
+        return sum(x[1] for x in self._seconds) / window
+
+
+class ResponseStream(QObject):
+    """
+    Takes over a reply that is a stream of events, parsing frames as chunks arrive instead of buffering the body.
+    Events are emitted in batches, one per read. When `finished` is emitted, `error` says why the stream ended if the
+    server didn't simply close it and it wasn't stopped.
+    """
+    events = Signal(list)
+    finished = Signal()
+
+    def __init__(self, parent: QObject, reply: QNetworkReply, stream_format_: str, decoder: StreamDecoder | None,
+                 method: str, status_code: int, response_headers: dict):
+        super().__init__(parent)
+        self.stream_format = stream_format_
+        self.method = method
+        self.url = reply.url().toString()
+        self.status_code = status_code
+        self.response_headers = response_headers
+        self.stats = EventRateStats()
+        self.done = False
+        self.error: str | None = None
+
+        # variables
+        self._stopped = False
+        self._reply = reply
+        self._decoder = decoder
+        self._parser = frame_parser(stream_format_)
+        reply.readyRead.connect(self._read)
+        reply.finished.connect(self._finish)
+
+    def stop(self) -> None:
+        """
+        Closes the stream, the events received so far are kept
+        :return: None
+        """
+        if not self.done:
+            self._stopped = True
+            self._reply.abort()
+
+    def feed(self, chunk: bytes) -> None:
+        """
+        Parses bytes read from the reply, still encoded with its Content-Encoding
+        :param chunk: Bytes
+        :return: None
+        """
+        if self._decoder is not None:
+            try:
+                chunk = self._decoder.decompress(chunk)
+            except ValueError:
+                self._decoder = None
+                self.error = "The stream could not be decoded"
+                self.stop()
+                return
+        self._emit(self._parser.feed(chunk))
+
+    def _emit(self, events: list[StreamEvent]) -> None:
+        if events:
+            self.stats.add(events)
+            self.events.emit(events)
+
+    def _read(self) -> None:
+        self.feed(self._reply.readAll().data())
+
+    def _finish(self) -> None:
+        if self.done:
+            return
+        # an aborted reply is closed, there is nothing left to read
+        if self._reply.isOpen():
+            self._read()
+        if self._decoder is not None:
+            try:
+                self._emit(self._parser.feed(self._decoder.flush()))
+            except ValueError:
+                self.error = "The stream could not be decoded"
+        self._emit(self._parser.flush())
+        if self.error is None and not self._stopped and self._reply.error() != QNetworkReply.NetworkError.NoError:
+            self.error = self._reply.errorString()
+        self.done = True
+        self._reply.deleteLater()
+        self.finished.emit()
+
+
+def response_stream(parent: QObject, reply: QNetworkReply, stream_mode: str | None, decoder: StreamDecoder | None,
+                    method: str) -> ResponseStream | None:
+    """
+    Builds a ResponseStream for a reply whose headers have arrived, if it should be streamed
+    :param parent: Parent QObject
+    :param reply: Reply to take over
+    :param stream_mode: None, STREAM_AUTO or STREAM_ALWAYS
+    :param decoder: Decoder for the reply's Content-Encoding, if any
+    :param method: HTTP method of the request
+    :return: ResponseStream, None if the reply should be buffered as usual
+    """
+    if stream_mode is None:
+        return None
+    format_ = stream_format(reply.header(QNetworkRequest.KnownHeaders.ContentTypeHeader))
+    if format_ is None:
+        if stream_mode != STREAM_ALWAYS:
+            return None
+        format_ = FORMAT_CHUNKS
+    headers = {key.data().decode("latin-1"): value.data().decode("latin-1") for key, value in reply.rawHeaderPairs()}
+    status_code = reply.attribute(QNetworkRequest.Attribute.HttpStatusCodeAttribute)
+    return ResponseStream(parent, reply, format_, decoder, method, status_code, headers)
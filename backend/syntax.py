@@ -1,5 +1,74 @@
-from PySide6.QtGui import QSyntaxHighlighter
+import re
+
+from PySide6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QTextDocument
 
 
 class JsonSyntaxHighlighter(QSyntaxHighlighter):
-    pass
\ No newline at end of file
+    """
+    Highlights JSON one block (line) at a time. A string left open at the end of a block is carried over through the
+    block state, so Qt only has to re-highlight the blocks that changed (and any that follow while that state changes).
+    """
+    STATE_NORMAL = 0
+    STATE_IN_STRING = 1
+
+    # precompiled once, shared by every highlighter
+    _token = re.compile(r"""
+        (?P<string>"(?:[^"\\]|\\.)*")(?P<key>\s*:)?
+        | (?P<open_string>"(?:[^"\\]|\\.)*\\?$)
+        | (?P<number>-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?)
+        | (?P<literal>\b(?:true|false|null)\b)
+        | (?P<punctuation>[{}\[\],:])
+    """, re.VERBOSE)
+    _string_end = re.compile(r'(?:[^"\\]|\\.)*"')
+
+    def __init__(self, document: QTextDocument):
+        super().__init__(document)
+        self._formats = {
+            "key": _format("#9876aa"),
+            "string": _format("#6a8759"),
+            "number": _format("#6897bb"),
+            "literal": _format("#cc7832"),
+            "punctuation": _format("#adadad"),
+        }
+
+    def highlightBlock(self, text: str) -> None:
+        """
+        Called by Qt whenever a block needs highlighting
+        :param text: Text of the block
+        :return: None
+        """
+        position = 0
+        self.setCurrentBlockState(self.STATE_NORMAL)
+
+        # finish a string that was opened on a previous line
+        if self.previousBlockState() == self.STATE_IN_STRING:
+            match = self._string_end.match(text)
+            if match is None:
+                self.setFormat(0, len(text), self._formats["string"])
+                self.setCurrentBlockState(self.STATE_IN_STRING)
+                return
+            position = match.end()
+            self.setFormat(0, position, self._formats["string"])
+
+        for match in self._token.finditer(text, position):
+            kind = match.lastgroup
+            if match.group("string") is not None:
+                kind = "key" if match.group("key") else "string"
+                self.setFormat(match.start(), len(match.group("string")), self._formats[kind])
+                continue
+            if kind == "open_string":
+                self.setFormat(match.start(), len(text) - match.start(), self._formats["string"])
+                self.setCurrentBlockState(self.STATE_IN_STRING)
+                return
+            self.setFormat(match.start(), match.end() - match.start(), self._formats[kind])
+
+
+def _format(color: str) -> QTextCharFormat:
+    """
+    Builds a character format with the given foreground color
+    :param color: Hex color
+    :return: QTextCharFormat
+    """
+    char_format = QTextCharFormat()
+    char_format.setForeground(QColor(color))
+    return char_format
@@ -0,0 +1,307 @@
+import os
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass, field, replace, asdict
+from datetime import datetime, timezone
+from typing import Callable
+
+import orjson
+
+from backend.network import RequestSpec, Response
+
+_placeholder = re.compile(r"\{\{\s*(\$?[\w.-]+)\s*}}")
+
+# values generated on every send, a request that uses the same one twice gets the same value both times
+DYNAMIC_VALUES: dict[str, Callable[[], str]] = {
+    "$timestamp": lambda: str(int(time.time())),
+    "$timestamp_ms": lambda: str(int(time.time() * 1000)),
+    "$iso_timestamp": lambda: datetime.now(timezone.utc).isoformat(),
+    "$uuid": lambda: str(uuid.uuid4()),
+    "$random_int": lambda: str(random.randint(0, 1000)),
+}
+
+Lookup = Callable[[str], str | None]
+
+
+class CompiledValue:
+    """
+    A string, dict or list with its `{{name}}` placeholders located once. Rendering only rebuilds the strings,
+    dicts and lists that contain a placeholder, everything else is shared with the original value.
+    """
+    __slots__ = ("value", "names", "_render")
+
+    def __init__(self, value, names: frozenset[str] = frozenset(), render: Callable[[Lookup], object] | None = None):
+        self.value = value
+        self.names = names
+        self._render = render
+
+    def render(self, lookup: Lookup):
+        return self._render(lookup) if self._render is not None else self.value
+
+
+_STATIC = CompiledValue(None)
+
+
+def compile_value(value) -> CompiledValue:
+    """
+    Locates the placeholders of a value
+    :param value: String, UTF-8 bytes, or a JSON-like structure of dicts and lists
+    :return: CompiledValue
+    """
+    if isinstance(value, str):
+        return _compile_string(value)
+    if isinstance(value, bytes):
+        return _compile_bytes(value)
+    if isinstance(value, dict):
+        return _compile_dict(value)
+    if isinstance(value, list):
+        return _compile_list(value)
+    return CompiledValue(value)
+
+
+def _compile_string(text: str) -> CompiledValue:
+    if "{{" not in text:
+        return CompiledValue(text)
+    # literals[i] is the text before the i-th placeholder, the last literal is the text after the final one
+    literals = []
+    placeholders = []
+    last = 0
+    for match in _placeholder.finditer(text):
+        literals.append(text[last:match.start()])
+        placeholders.append((match.group(1), match.group(0)))
+        last = match.end()
+    if not placeholders:
+        return CompiledValue(text)
+    literals.append(text[last:])
+
+    def _render(lookup: Lookup) -> str:
+        parts = [literals[0]]
+        for (name, original), literal in zip(placeholders, literals[1:]):
+            value = lookup(name)
+            parts.append(original if value is None else value)
+            parts.append(literal)
+        return "".join(parts)
+    return CompiledValue(text, frozenset(x for x, _ in placeholders), _render)
+
+
+def _compile_bytes(data: bytes) -> CompiledValue:
+    """
+    Locates the placeholders of a body kept as bytes, such as JSON that only parses once its placeholders are filled
+    (`{"id": {{id}}}`). It is rendered as text and encoded again, bytes that aren't UTF-8 are left alone.
+    :param data: Bytes
+    :return: CompiledValue
+    """
+    if b"{{" not in data:
+        return CompiledValue(data)
+    try:
+        text = _compile_string(data.decode())
+    except UnicodeDecodeError:
+        return CompiledValue(data)
+    if not text.names:
+        return CompiledValue(data)
+    return CompiledValue(data, text.names, lambda lookup: text.render(lookup).encode())
+
+
+def _compile_dict(value: dict) -> CompiledValue:
+    dynamic = []
+    names = set()
+    for key, item in value.items():
+        compiled_key = _compile_string(key) if isinstance(key, str) else _STATIC
+        compiled_item = compile_value(item)
+        if compiled_key.names or compiled_item.names:
+            dynamic.append((key, compiled_key, compiled_item))
+            names |= compiled_key.names | compiled_item.names
+    if not dynamic:
+        return CompiledValue(value)
+
+    def _render(lookup: Lookup) -> dict:
+        rendered = dict(value)
+        for key, compiled_key, compiled_item in dynamic:
+            item = compiled_item.render(lookup)
+            if compiled_key.names:
+                del rendered[key]
+                key = compiled_key.render(lookup)
+            rendered[key] = item
+        return rendered
+    return CompiledValue(value, frozenset(names), _render)
+
+
+def _compile_list(value: list) -> CompiledValue:
+    dynamic = []
+    names = set()
+    for index, item in enumerate(value):
+        compiled_item = compile_value(item)
+        if compiled_item.names:
+            dynamic.append((index, compiled_item))
+            names |= compiled_item.names
+    if not dynamic:
+        return CompiledValue(value)
+
+    def _render(lookup: Lookup) -> list:
+        rendered = list(value)
+        for index, compiled_item in dynamic:
+            rendered[index] = compiled_item.render(lookup)
+        return rendered
+    return CompiledValue(value, frozenset(names), _render)
+
+
+@dataclass
+class Environment:
+    name: str
+    variables: dict[str, str] = field(default_factory=dict)
+    # variable name to where its value is taken from in each response, see extract()
+    extractions: dict[str, str] = field(default_factory=dict)
+    captured: dict[str, str] = field(default_factory=dict)
+
+    def value(self, name: str) -> str | None:
+        if name in self.variables:
+            return self.variables[name]
+        return self.captured.get(name)
+
+    def capture(self, response: Response) -> dict[str, str]:
+        """
+        Takes the value of every extraction out of a response, extractions the response doesn't have are left alone
+        :param response: Response to extract from
+        :return: Dictionary of the values that were captured
+        """
+        values = {}
+        for name, source in self.extractions.items():
+            value = extract(response, source)
+            if value is not None:
+                values[name] = value
+        self.captured.update(values)
+        return values
+
+
+def extract(response: Response, source: str) -> str | None:
+    """
+    Get a value out of a response
+    :param response: Response to extract from
+    :param source: `status`, `header.<name>` or `body` followed by a dotted path such as `body.data.items.0.id`
+    :return: The value as a string, None if the response doesn't have it
+    """
+    kind, _, path = source.strip().partition(".")
+    if kind == "status":
+        return str(response.status_code) if response.status_code is not None else None
+    if kind == "header":
+        name = path.lower()
+        for key, value in response.response_headers.items():
+            if key.lower() == name:
+                return str(value)
+        return None
+    if kind != "body" or response.response_body is None:
+        return None
+
+    value = response.response_body
+    for part in path.split(".") if path else []:
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        elif isinstance(value, list) and part.lstrip("-").isdigit() and -len(value) <= int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return None
+    if isinstance(value, str):
+        return value
+    return orjson.dumps(value).decode()
+
+
+def make_lookup(environment: Environment | None = None, variables: dict | None = None) -> Lookup:
+    """
+    Builds the lookup used to render one request. Explicit variables come first, then the environment, then the
+    dynamic values, which are generated at most once per lookup.
+    :param environment: Optional, environment to read variables and captured values from
+    :param variables: Optional, variables that override the environment
+    :return: Function of a placeholder name to its value, None if it is unknown
+    """
+    generated = {}
+
+    def _lookup(name: str) -> str | None:
+        if variables and name in variables:
+            return str(variables[name])
+        if environment is not None:
+            value = environment.value(name)
+            if value is not None:
+                return value
+        if name in DYNAMIC_VALUES:
+            if name not in generated:
+                generated[name] = DYNAMIC_VALUES[name]()
+            return generated[name]
+        return None
+    return _lookup
+
+
+class RequestTemplate:
+    """A RequestSpec compiled once so it can be rendered against variables any number of times"""
+    def __init__(self, spec: RequestSpec, body_cache: dict[int, CompiledValue] | None = None):
+        """
+        :param spec: Request with placeholders in its url, query parameters, headers or body
+        :param body_cache: Optional, compiled bodies by id, shared between templates of requests with the same body
+        """
+        self.spec = spec
+        self._url = compile_value(spec.url)
+        self._query_params = compile_value(spec.query_params)
+        self._headers = compile_value(spec.headers)
+        if body_cache is None:
+            self._body = compile_value(spec.body)
+        else:
+            if id(spec.body) not in body_cache:
+                body_cache[id(spec.body)] = compile_value(spec.body)
+            self._body = body_cache[id(spec.body)]
+        self.names = self._url.names | self._query_params.names | self._headers.names | self._body.names
+
+    @property
+    def dynamic(self) -> bool:
+        """True if every render may differ, even against the same variables"""
+        return any(x in DYNAMIC_VALUES for x in self.names)
+
+    def render(self, environment: Environment | None = None, variables: dict | None = None) -> RequestSpec:
+        """
+        Fills the placeholders, unknown placeholders are left as they are
+        :param environment: Optional, environment to take values from
+        :param variables: Optional, variables that override the environment
+        :return: A new RequestSpec, or the original one if it has no placeholders
+        """
+        if not self.names:
+            return self.spec
+        lookup = make_lookup(environment, variables)
+        return replace(
+            self.spec,
+            url=self._url.render(lookup),
+            query_params=self._query_params.render(lookup),
+            headers=self._headers.render(lookup),
+            body=self._body.render(lookup)
+        )
+
+
+class EnvironmentStore:
+    """Named environments and which one is active, saved as JSON"""
+    def __init__(self, path: str):
+        self.path = path
+        self.environments: list[Environment] = []
+        self.active_name: str | None = None
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                content = orjson.loads(f.read())
+            self.environments = [Environment(**x) for x in content.get("environments", [])]
+            self.active_name = content.get("active")
+
+    @property
+    def active(self) -> Environment | None:
+        return self.get(self.active_name) if self.active_name is not None else None
+
+    def get(self, name: str) -> Environment | None:
+        for environment in self.environments:
+            if environment.name == name:
+                return environment
+        return None
+
+    def save(self) -> None:
+        content = orjson.dumps({
+            "active": self.active_name,
+            "environments": [asdict(x) for x in self.environments]
+        }, option=orjson.OPT_INDENT_2)
+        with open(self.path + ".tmp", "wb") as f:
+            f.write(content)
+        os.replace(self.path + ".tmp", self.path)
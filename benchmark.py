@@ -0,0 +1,348 @@
+"""
+Benchmarks the request/response pipeline against a local stand-in server and writes the results as JSON.
+
+    python main.py benchmark [--sizes 1K,1M,...] [--variants identity,chunked,gzip,zstd] [--repeat N] [--in-memory]
+        [--output FILE] [--baseline FILE] [--max-regression PERCENT]
+
+Every case (payload size and how it is sent) is sent once to warm up and then --repeat times. A sample records the
+time spent in Request.custom, the network and parse stages of the response, and how long the header table and the
+body tree take to populate. Widgets are built on the offscreen platform unless QT_QPA_PLATFORM says otherwise, they
+are never shown.
+
+The stand-in server runs in its own process so its payloads don't count towards the peak RSS, which is that of this
+process since it started. Cases run from the smallest payload up, so each case's peak is the one it reached.
+
+Exits 0, 1 when --baseline and --max-regression are given and a median regressed by more than that, and 2 when a
+request failed or the stand-in server couldn't be started.
+"""
+import argparse
+import os
+import platform
+import subprocess
+import sys
+import time
+from statistics import median
+
+# not available on Windows, peak RSS isn't reported there
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import orjson
+import PySide6
+from PySide6.QtCore import QEventLoop, QTimer, QEvent
+from PySide6.QtWidgets import QApplication
+
+import global_objects
+from backend.network import Request, RequestError, Response, DEFAULT_DOWNLOAD_THRESHOLD
+from backend.retry import RetryPolicy
+
+EXIT_OK = 0
+EXIT_REGRESSED = 1
+EXIT_ERROR = 2
+
+# bumped when the layout of the results file changes
+RESULTS_FORMAT = 1
+DEFAULT_SIZES = "1K,100K,1M,10M,100M,500M"
+# query string the stand-in server is asked for, see backend.stand_in_server
+VARIANTS = {
+    "identity": "",
+    "chunked": "chunked=1",
+    "gzip": "encoding=gzip",
+    "zstd": "encoding=zstd",
+}
+# medians compared with the baseline
+COMPARED_METRICS = ("send_ms", "parse_ms", "headers_ms", "render_ms", "total_ms")
+_UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _parse_size(text: str) -> int:
+    """
+    Parses a size such as `1K`, `10M` or `512`
+    :param text: Size with an optional K, M or G suffix
+    :return: Bytes
+    """
+    text = text.strip().upper()
+    if text[-1:] in _UNITS:
+        return int(float(text[:-1]) * _UNITS[text[-1]])
+    return int(text)
+
+
+def _parse_arguments(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="restcutie benchmark", description="Benchmark the request/response pipeline")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma separated payload sizes, such as 1K,10M")
+    parser.add_argument("--variants", default=",".join(VARIANTS),
+                        help=f"Comma separated ways to send the payload, of {', '.join(VARIANTS)}")
+    parser.add_argument("--repeat", type=int, default=3, help="Samples per case, after one warm up")
+    parser.add_argument("--in-memory", action="store_true",
+                        help="Parse every payload in memory, by default payloads larger than "
+                             f"{DEFAULT_DOWNLOAD_THRESHOLD // 1024 ** 2} MiB are downloaded to disk as in the app")
+    parser.add_argument("--timeout", type=float, default=600, help="Give up on a request after this many seconds")
+    parser.add_argument("--output", default="benchmark.json", help="Write the results here")
+    parser.add_argument("--baseline", default=None, help="Compare the medians with an earlier results file")
+    parser.add_argument("--max-regression", type=float, default=None, metavar="PERCENT",
+                        help="Exit 1 if a median is this much slower than in the baseline")
+    arguments = parser.parse_args(argv)
+    arguments.sizes = sorted(_parse_size(x) for x in arguments.sizes.split(",") if x.strip())
+    arguments.variants = [x.strip() for x in arguments.variants.split(",") if x.strip()]
+    unknown = [x for x in arguments.variants if x not in VARIANTS]
+    if unknown:
+        parser.error(f"unknown variants: {', '.join(unknown)}")
+    return arguments
+
+
+def _peak_rss() -> int | None:
+    """
+    Get the peak resident set size of this process since it started
+    :return: Bytes, None where it can't be measured
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes everywhere but macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _milliseconds(start: float | None, end: float | None) -> float | None:
+    if start is None or end is None:
+        return None
+    return round((end - start) * 1000, 3)
+
+
+def _start_server() -> tuple[subprocess.Popen, str]:
+    """
+    Starts the stand-in server in its own process
+    :return: Tuple of the process and the URL it serves on
+    """
+    process = subprocess.Popen(
+        [sys.executable, "-m", "backend.stand_in_server"], cwd=_ROOT, stdout=subprocess.PIPE, text=True
+    )
+    url = process.stdout.readline().strip()
+    if not url:
+        process.wait()
+        raise RuntimeError("the stand-in server didn't start")
+    return process, url
+
+
+class _Benchmark:
+    """Sends the cases one request at a time, waiting for each response in a nested event loop"""
+    def __init__(self, url: str, arguments: argparse.Namespace):
+        # deferred, widgets can only be imported once there is a QApplication
+        from ui.response_viewer import _ResponseBodyWidget, _ResponseHeadersWidget
+
+        self._body_widget = _ResponseBodyWidget
+        self._headers_widget = _ResponseHeadersWidget
+        self.url = url
+        self.timeout_ms = int(arguments.timeout * 1000)
+        # the transfer timeout is off, the server takes a while to build and compress a large payload the first time
+        self.request = Request(
+            None,
+            download_threshold=sys.maxsize if arguments.in_memory else None,
+            timeout_ms=0,
+            retry_policy=RetryPolicy(max_attempts=1)
+        )
+
+    def _send(self, url: str) -> tuple[float, Response]:
+        """
+        Sends a GET and waits for its response
+        :param url: URL to send to
+        :return: Tuple of the time spent in Request.custom in ms, and the response
+        :raises RuntimeError: The request failed or timed out
+        """
+        loop = QEventLoop()
+        outcome: list[Response | RequestError] = []
+
+        def _done(result: Response | RequestError):
+            outcome.append(result)
+            loop.quit()
+
+        self.request.response.connect(_done)
+        self.request.error.connect(_done)
+        timer = QTimer()
+        timer.setSingleShot(True)
+        timer.timeout.connect(self.request.cancel)
+        timer.start(self.timeout_ms)
+        try:
+            start = time.perf_counter()
+            self.request.custom("GET", url, None, None, None)
+            send_ms = (time.perf_counter() - start) * 1000
+            if not outcome:
+                loop.exec()
+        finally:
+            timer.stop()
+            self.request.response.disconnect(_done)
+            self.request.error.disconnect(_done)
+        if isinstance(outcome[0], RequestError):
+            raise RuntimeError(f"{outcome[0].kind}: {outcome[0].message}")
+        return send_ms, outcome[0]
+
+    def sample(self, url: str) -> dict:
+        """
+        Sends one request and populates the response views with it
+        :param url: URL to send to
+        :return: Dictionary of the measurements, stages that didn't happen are None
+        """
+        send_ms, response = self._send(url)
+        timings = response.timings
+
+        headers = self._headers_widget()
+        start = time.perf_counter()
+        headers.set_headers(response.response_headers)
+        headers_ms = (time.perf_counter() - start) * 1000
+
+        render_ms = None
+        if response.response_body is not None:
+            body = self._body_widget()
+            start = time.perf_counter()
+            body.set_json(response.response_body)
+            render_ms = (time.perf_counter() - start) * 1000
+            body.deleteLater()
+        headers.deleteLater()
+        # the views and the response are dropped before the next sample, so they don't add up in the peak RSS
+        QApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+        response.release()
+
+        return {
+            "send_ms": round(send_ms, 3),
+            "ttfb_ms": _milliseconds(timings.sent, timings.first_byte),
+            "download_ms": _milliseconds(timings.first_byte, timings.finished),
+            "parse_ms": _milliseconds(timings.finished, timings.parsed),
+            "total_ms": _milliseconds(timings.sent, timings.parsed or timings.finished),
+            "headers_ms": round(headers_ms, 3),
+            "render_ms": round(render_ms, 3) if render_ms is not None else None,
+            "wire_size": response.wire_size,
+            "body_size": response.body_size,
+            "parsed": response.response_body is not None,
+        }
+
+    def run_case(self, size: int, variant: str, repeat: int) -> dict:
+        """
+        Sends a case once to warm up, then `repeat` times
+        :param size: Payload size in bytes
+        :param variant: Key of VARIANTS
+        :param repeat: Samples to take
+        :return: Dictionary of the case, its samples and their medians
+        """
+        url = f"{self.url}/bytes/{size}"
+        if VARIANTS[variant]:
+            url += "?" + VARIANTS[variant]
+        self.sample(url)
+        samples = [self.sample(url) for _ in range(repeat)]
+        medians = {}
+        for metric, value in samples[0].items():
+            values = [x[metric] for x in samples if x[metric] is not None]
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and values:
+                medians[metric] = round(median(values), 3)
+        return {
+            "case": f"{size}/{variant}",
+            "size": size,
+            "variant": variant,
+            "median": medians,
+            "samples": samples,
+            "peak_rss_bytes": _peak_rss(),
+        }
+
+
+def _commit() -> str | None:
+    """
+    Get the commit of the checkout being benchmarked
+    :return: Commit hash, None if it isn't a git checkout
+    """
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=_ROOT, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def _compare(results: dict, baseline_path: str, max_regression: float | None) -> bool:
+    """
+    Prints how the medians changed since the baseline
+    :param results: Results of this run
+    :param baseline_path: Path of an earlier results file
+    :param max_regression: Optional, percentage above which a slower median counts as a regression
+    :return: True if a median regressed by more than max_regression
+    """
+    with open(baseline_path, "rb") as f:
+        baseline = {x["case"]: x for x in orjson.loads(f.read())["results"]}
+    regressed = False
+    print(f"\ncompared with {baseline_path}", file=sys.stderr)
+    for case in results["results"]:
+        before = baseline.get(case["case"])
+        if before is None:
+            continue
+        for metric in COMPARED_METRICS:
+            old = before["median"].get(metric)
+            new = case["median"].get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            flag = ""
+            if max_regression is not None and change > max_regression:
+                regressed = True
+                flag = "  REGRESSED"
+            print(f"{case['case']:<24}{metric:<12}{old:>12.3f}{new:>12.3f}{change:>+9.1f}%{flag}", file=sys.stderr)
+    return regressed
+
+
+def main(argv: list[str]) -> int:
+    arguments = _parse_arguments(argv)
+    # nothing is shown, the offscreen platform keeps the numbers independent of the display
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QApplication.instance() or QApplication([sys.argv[0]])
+    global_objects.app = app
+
+    try:
+        server, url = _start_server()
+    except (OSError, RuntimeError) as e:
+        print(f"restcutie: {e}", file=sys.stderr)
+        return EXIT_ERROR
+    results = {
+        "format": RESULTS_FORMAT,
+        "timestamp": time.time(),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "pyside": PySide6.__version__,
+        "platform": platform.platform(),
+        "settings": {
+            "sizes": arguments.sizes,
+            "variants": arguments.variants,
+            "repeat": arguments.repeat,
+            "in_memory": arguments.in_memory,
+        },
+        "results": [],
+    }
+    try:
+        benchmark = _Benchmark(url, arguments)
+        print(f"{'case':<24}{'total':>12}{'parse':>12}{'headers':>12}{'render':>12}{'peak RSS':>12}", file=sys.stderr)
+        for size in arguments.sizes:
+            for variant in arguments.variants:
+                case = benchmark.run_case(size, variant, max(1, arguments.repeat))
+                results["results"].append(case)
+                columns = [case["median"].get(x) for x in ("total_ms", "parse_ms", "headers_ms", "render_ms")]
+                rss = case["peak_rss_bytes"]
+                print(
+                    f"{case['case']:<24}"
+                    + "".join(f"{x:>9.1f} ms" if x is not None else f"{'-':>12}" for x in columns)
+                    + (f"{rss / 1024 ** 2:>8.0f} MiB" if rss is not None else f"{'-':>12}"),
+                    file=sys.stderr
+                )
+    except RuntimeError as e:
+        print(f"restcutie: {e}", file=sys.stderr)
+        return EXIT_ERROR
+    finally:
+        server.terminate()
+        server.wait()
+        global_objects.remove_download_directory()
+
+    with open(arguments.output, "wb") as f:
+        f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+    if arguments.baseline is not None and _compare(results, arguments.baseline, arguments.max_regression):
+        return EXIT_REGRESSED
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,151 @@
+"""
+Headless entry point, runs the requests of a session without building any widgets and reports them as NDJSON.
+
+    python main.py run session.sesh [--entry NAME ...] [--parallel N] [--timeout SECONDS] [--output FILE]
+        [--env NAME] [--var NAME=VALUE ...]
+
+Exits 0 when every request passed, 1 when any request failed its assertion (the entry's expected status, or any
+status below 400 if it has none) and 2 when the run timed out or the session couldn't be opened.
+"""
+import argparse
+import sys
+import time
+
+import orjson
+from PySide6.QtCore import QCoreApplication, QTimer
+
+import global_objects
+from backend.downloads import sweep_stale_downloads
+from backend.retry import RetryPolicy
+from backend.runner import CollectionRunner, RunResult
+from backend.session import Session, SessionEntry, SessionFormatError
+
+EXIT_OK = 0
+EXIT_ASSERTION_FAILED = 1
+EXIT_ERROR = 2
+
+
+def _parse_arguments(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="restcutie", description="Run saved requests without the GUI")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="Run the requests of a session")
+    run.add_argument("session", help="Path of the .sesh file")
+    run.add_argument("--entry", action="append", default=[], help="Only run the entry with this name, repeatable")
+    run.add_argument("--parallel", type=int, default=8, help="Requests in flight at once")
+    run.add_argument("--timeout", type=float, default=None, help="Give up after this many seconds")
+    run.add_argument("--output", default=None, help="Write NDJSON results here instead of stdout")
+    run.add_argument("--request-timeout", type=float, default=None,
+                     help="Give up on a request when no data has moved for this many seconds")
+    run.add_argument("--retries", type=int, default=0,
+                     help="Retry idempotent requests this many times on network errors, 429, 502, 503 and 504")
+    run.add_argument("--env", default=None, help="Fill {{placeholders}} from this saved environment")
+    run.add_argument("--var", action="append", default=[], metavar="NAME=VALUE",
+                     help="Fill a placeholder, overrides the environment, repeatable")
+    return parser.parse_args(argv)
+
+
+def _passed(entry: SessionEntry, result: RunResult) -> bool:
+    if result.status_code is None:
+        return False
+    if entry.expected_status is not None:
+        return result.status_code == entry.expected_status
+    return result.status_code < 400
+
+
+def run(arguments: argparse.Namespace) -> int:
+    """
+    Runs the requests of a session, writing one NDJSON line per result
+    :param arguments: Parsed command line
+    :return: Exit code
+    """
+    try:
+        session = Session.open(arguments.session)
+    except (OSError, SessionFormatError) as e:
+        print(f"restcutie: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+    # only the selected entries are read from disk
+    indexes = [
+        x for x in range(len(session)) if not arguments.entry or session.summary(x)[0] in arguments.entry
+    ]
+    entries = [session.get(x) for x in indexes]
+
+    app = QCoreApplication.instance() or QCoreApplication([sys.argv[0]])
+    global_objects.app = app
+    sweep_stale_downloads()
+
+    environment = None
+    if arguments.env is not None:
+        environment = global_objects.get_environments().get(arguments.env)
+        if environment is None:
+            print(f"restcutie: no environment named {arguments.env}", file=sys.stderr)
+            session.close()
+            return EXIT_ERROR
+    variables = dict(x.partition("=")[::2] for x in arguments.var)
+
+    output = open(arguments.output, "wb") if arguments.output else sys.stdout.buffer
+    outcome = {"code": EXIT_OK}
+
+    def _result(result: RunResult):
+        entry = entries[result.index]
+        passed = _passed(entry, result)
+        if not passed:
+            outcome["code"] = EXIT_ASSERTION_FAILED
+        timings = result.response.timings.stages() if result.response is not None else []
+        output.write(orjson.dumps({
+            "name": entry.name,
+            "method": result.spec.method,
+            "url": result.spec.url,
+            "status": result.status_code,
+            "expected_status": entry.expected_status,
+            "passed": passed,
+            "latency_ms": round(result.elapsed_ms, 3),
+            "size": result.size,
+            "timings": {name: round(end - start, 3) for name, start, end in timings},
+            "error": result.error.kind if result.error is not None else None,
+            "error_message": result.error.message if result.error is not None else None,
+            "timestamp": time.time(),
+        }, option=orjson.OPT_APPEND_NEWLINE))
+        output.flush()
+        # the result is written out, its body isn't needed any more
+        if result.response is not None:
+            result.response.release()
+            result.response = None
+
+    def _timeout():
+        print(f"restcutie: timed out after {arguments.timeout} s", file=sys.stderr)
+        # cancelled requests report as failed, the timeout takes precedence
+        runner.cancel()
+        outcome["code"] = EXIT_ERROR
+        app.quit()
+
+    runner = CollectionRunner(
+        None, [x.to_spec() for x in entries], arguments.parallel, [variables] * len(entries), environment,
+        timeout_ms=int(arguments.request_timeout * 1000) if arguments.request_timeout is not None else None,
+        retry_policy=RetryPolicy(max_attempts=1 + max(0, arguments.retries))
+    )
+    runner.result.connect(_result)
+    runner.finished.connect(app.quit)
+    if arguments.timeout is not None:
+        QTimer.singleShot(int(arguments.timeout * 1000), _timeout)
+
+    if entries:
+        QTimer.singleShot(0, runner.start)
+        app.exec()
+
+    session.close()
+    global_objects.remove_download_directory()
+    if output is not sys.stdout.buffer:
+        output.close()
+    return outcome["code"]
+
+
+def main(argv: list[str]) -> int:
+    arguments = _parse_arguments(argv)
+    if arguments.command == "run":
+        return run(arguments)
+    return EXIT_ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
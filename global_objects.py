@@ -1,8 +1,145 @@
-from PySide6.QtGui import QFont
+from __future__ import annotations
+
+import os
+import sys
+from typing import TYPE_CHECKING
+
+from PySide6.QtCore import QStandardPaths, QCoreApplication
 from PySide6.QtNetwork import QNetworkAccessManager
-from PySide6.QtWidgets import QApplication
 
-app: QApplication | None = None
+from backend.cache import ResponseCache
+from backend.connections import ConnectionSettings, ConnectionTracker
+from backend.retry import RetryPolicy
+
+# only imported for annotations, the headless entry point must not pull in QtGui/QtWidgets
+if TYPE_CHECKING:
+    from PySide6.QtGui import QFont
+    from backend.downloads import DownloadDirectory
+    from backend.history import HistoryStore
+    from backend.network import Response
+    from backend.variables import EnvironmentStore
+
+# a QApplication in the GUI, a QCoreApplication when running headless
+app: QCoreApplication | None = None
 mono_font_id: int | None = None
 mono_font: QFont | None = None
-nam = QNetworkAccessManager(app)
+connection_settings = ConnectionSettings()
+retry_policy = RetryPolicy()
+connection_tracker: ConnectionTracker | None = None
+# opt-in, None while the response cache is disabled
+response_cache: ResponseCache | None = None
+history: HistoryStore | None = None
+environments: EnvironmentStore | None = None
+# created on the first download, removed on exit
+download_directory: DownloadDirectory | None = None
+# the response other responses are compared with by default, pinned from a response viewer
+pinned_response: Response | None = None
+_nam: QNetworkAccessManager | None = None
+
+
+def get_nam() -> QNetworkAccessManager:
+    """
+    Get the shared network access manager, it is created on first use so it can be parented to the application
+    :return: QNetworkAccessManager
+    """
+    global _nam
+    if _nam is None:
+        _nam = QNetworkAccessManager(app)
+    return _nam
+
+
+def get_mono_font() -> QFont:
+    """
+    Get the monospace font, it is loaded from the bundled resources the first time a widget asks for it
+    :return: QFont
+    """
+    # deferred, QtGui isn't available to the headless entry point
+    from PySide6.QtGui import QFont, QFontDatabase
+
+    global mono_font_id, mono_font
+    if mono_font is None:
+        # resolved against the bundle when frozen, the checkout otherwise, never the working directory
+        root = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+        mono_font_id = QFontDatabase.addApplicationFont(os.path.join(root, "resources", "jetbrains_mono.ttf"))
+        families = QFontDatabase.applicationFontFamilies(mono_font_id) if mono_font_id != -1 else []
+        mono_font = QFont(families[0] if families else "JetBrains Mono NL")
+    return mono_font
+
+
+def get_connection_tracker() -> ConnectionTracker:
+    """
+    Get the shared connection tracker, created on first use
+    :return: ConnectionTracker
+    """
+    global connection_tracker
+    if connection_tracker is None:
+        connection_tracker = ConnectionTracker()
+    return connection_tracker
+
+
+def get_history() -> HistoryStore:
+    """
+    Get the shared request history, opened on first use in the application data directory
+    :return: HistoryStore
+    """
+    # deferred, backend.history imports backend.network which imports this module
+    from backend.history import HistoryStore
+
+    global history
+    if history is None:
+        directory = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
+        os.makedirs(directory, exist_ok=True)
+        history = HistoryStore(os.path.join(directory, "history.sqlite3"))
+    return history
+
+
+def get_download_directory() -> DownloadDirectory:
+    """
+    Get the directory large response bodies are streamed into, created on first use
+    :return: DownloadDirectory
+    """
+    # deferred, most sessions never download a body
+    from backend.downloads import DownloadDirectory
+
+    global download_directory
+    if download_directory is None:
+        download_directory = DownloadDirectory()
+    return download_directory
+
+
+def remove_download_directory() -> None:
+    """
+    Deletes the downloaded bodies, called on exit
+    :return: None
+    """
+    global download_directory
+    if download_directory is not None:
+        download_directory.remove()
+        download_directory = None
+
+
+def close_response_cache() -> None:
+    """
+    Stops using the response cache, writing what it still holds in memory. Called when it is disabled and on exit.
+    :return: None
+    """
+    global response_cache
+    if response_cache is not None:
+        response_cache.close()
+        response_cache = None
+
+
+def get_environments() -> EnvironmentStore:
+    """
+    Get the saved environments, loaded on first use from the application data directory
+    :return: EnvironmentStore
+    """
+    # deferred for the same reason as get_history
+    from backend.variables import EnvironmentStore
+
+    global environments
+    if environments is None:
+        directory = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
+        os.makedirs(directory, exist_ok=True)
+        environments = EnvironmentStore(os.path.join(directory, "environments.json"))
+    return environments
@@ -1,20 +1,52 @@
 import sys
+import time
 
-from PySide6.QtCore import Qt, qDebug
-from PySide6.QtGui import QPalette, QColor, QFontDatabase, QFont
+# headless commands are dispatched before anything pulls in QtGui/QtWidgets
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == "run":
+    import cli
+    sys.exit(cli.main(sys.argv[1:]))
+# the benchmark builds widgets offscreen, it never gets as far as the dark palette below
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == "benchmark":
+    import benchmark
+    sys.exit(benchmark.main(sys.argv[2:]))
+
+
+class _StartupProfile:
+    """Records how long each step of startup took, reported on stderr with --profile-startup"""
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self._start = time.perf_counter()
+        self._last = self._start
+        self._steps: list[tuple[str, float]] = []
+
+    def mark(self, step: str) -> None:
+        now = time.perf_counter()
+        self._steps.append((step, (now - self._last) * 1000))
+        self._last = now
+
+    def report(self) -> None:
+        if not self.enabled:
+            return
+        for step, elapsed_ms in self._steps:
+            print(f"{step:<24}{elapsed_ms:>10.1f} ms", file=sys.stderr)
+        print(f"{'total':<24}{(self._last - self._start) * 1000:>10.1f} ms", file=sys.stderr)
+
+
+profile = _StartupProfile("--profile-startup" in sys.argv)
+if profile.enabled:
+    sys.argv.remove("--profile-startup")
+
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QPalette, QColor
 from PySide6.QtWidgets import QApplication
 
 import global_objects
-from ui.home import WindowHome
+profile.mark("import qt")
 
 
 if __name__ == "__main__":
-    global_objects.app = QApplication()
-
-    # populate font
-    font_database = QFontDatabase()
-    global_objects.mono_font_id = font_database.addApplicationFont("resources/jetbrains_mono.ttf")
-    global_objects.mono_font = QFont("JetBrains Mono NL")
+    global_objects.app = QApplication(sys.argv)
+    profile.mark("create application")
 
     global_objects.app.setStyle("Fusion")
     dark_palette = QPalette()
@@ -38,9 +70,26 @@ if __name__ == "__main__":
     dark_palette.setColor(QPalette.Disabled, QPalette.Light, QColor(53, 53, 53))
     global_objects.app.setPalette(dark_palette)
     global_objects.app.setStyleSheet("QToolTip { color: #ffffff; background-color: #2a82da; border: 1px solid white; }")
+    profile.mark("style")
+
+    from ui.home import WindowHome
+    profile.mark("import home")
 
     login = WindowHome()
+    profile.mark("build home")
     login.show()
+    profile.mark("show home")
+
+    # the first turn of the event loop is when the window is actually painted
+    def _first_frame():
+        profile.mark("first event loop turn")
+        profile.report()
+        # bodies downloaded by instances that crashed, looked for once the window is up
+        from backend.downloads import sweep_stale_downloads
+        sweep_stale_downloads()
+    QTimer.singleShot(0, _first_frame)
+    global_objects.app.aboutToQuit.connect(global_objects.remove_download_directory)
+    global_objects.app.aboutToQuit.connect(global_objects.close_response_cache)
 
     try:
         sys.exit(global_objects.app.exec())
@@ -0,0 +1,132 @@
+import os
+
+import pytest
+
+from backend.cache import ResponseCache, parse_cache_control
+
+URL = "http://localhost/items"
+
+
+@pytest.fixture
+def open_cache(tmp_path):
+    caches = []
+
+    def _open(max_bytes: int = 256 * 1024 * 1024) -> ResponseCache:
+        caches.append(ResponseCache(str(tmp_path), max_bytes))
+        return caches[-1]
+    yield _open
+    for cache in caches:
+        cache.close()
+
+
+def test_parse_cache_control():
+    directives = parse_cache_control({"Cache-Control": 'max-age=60, No-Cache, private="x"'})
+    assert directives == {"max-age": "60", "no-cache": None, "private": "x"}
+
+
+def test_store_and_read(open_cache):
+    cache = open_cache()
+    key = cache.key("get", URL)
+    assert cache.store(key, 200, [("Cache-Control", "max-age=60")], b"body") is not None
+    entry = cache.lookup(key)
+    assert entry.fresh
+    assert cache.read_body(entry) == b"body"
+    assert cache.size == 4
+
+
+def test_not_cacheable(open_cache):
+    cache = open_cache()
+    key = cache.key("GET", URL)
+    assert cache.store(key, 200, [("Cache-Control", "no-store, max-age=60")], b"body") is None
+    assert cache.store(key, 404, [("Cache-Control", "max-age=60")], b"body") is None
+    # neither fresh nor revalidatable
+    assert cache.store(key, 200, [], b"body") is None
+    assert cache.store(key, 200, [("Cache-Control", "max-age=60"), ("Vary", "*")], b"body") is None
+    assert cache.lookup(key) is None
+
+
+def test_revalidatable(open_cache):
+    cache = open_cache()
+    key = cache.key("GET", URL)
+    entry = cache.store(key, 200, [("ETag", '"1"'), ("Cache-Control", "no-cache")], b"body")
+    assert not entry.fresh
+    assert entry.conditional_headers() == {"If-None-Match": '"1"'}
+    cache.refresh(entry, [("Cache-Control", "max-age=60")])
+    assert entry.fresh
+
+
+def test_credentials_are_part_of_the_key(open_cache):
+    cache = open_cache()
+    anonymous = cache.key("GET", URL, {"accept": "*/*"})
+    alice = cache.key("GET", URL, {"authorization": "Bearer alice"})
+    bob = cache.key("GET", URL, {"authorization": "Bearer bob"})
+    assert anonymous == cache.key("GET", URL)
+    assert len({anonymous, alice, bob}) == 3
+    assert "alice" not in alice
+    assert cache.key("GET", URL, {"cookie": "session=1"}) != anonymous
+
+
+def test_vary(open_cache):
+    cache = open_cache()
+    key = cache.key("GET", URL)
+    headers = [("Cache-Control", "max-age=60"), ("Vary", "Accept-Language")]
+    cache.store(key, 200, headers, b"hello", {"accept-language": "en"})
+    assert cache.lookup(key, {"accept-language": "en"}) is not None
+    assert cache.lookup(key, {"accept-language": "fr"}) is None
+    assert cache.lookup(key) is None
+
+
+def test_eviction_is_least_recently_used(open_cache):
+    cache = open_cache(8)
+    headers = [("Cache-Control", "max-age=60")]
+    cache.store("a", 200, headers, b"1234")
+    cache.store("b", 200, headers, b"1234")
+    cache.lookup("a")
+    cache.store("c", 200, headers, b"1234")
+    assert cache.lookup("b") is None
+    assert cache.lookup("a") is not None
+
+
+def test_order_survives_restart(open_cache):
+    headers = [("Cache-Control", "max-age=60")]
+    cache = open_cache(8)
+    cache.store("a", 200, headers, b"1234")
+    cache.store("b", 200, headers, b"1234")
+    cache.lookup("a")
+    cache.close()
+
+    cache = open_cache(8)
+    cache.store("c", 200, headers, b"1234")
+    assert cache.lookup("b") is None
+    assert cache.lookup("a") is not None
+
+
+def test_body_is_readable_before_and_after_it_is_written(open_cache):
+    cache = open_cache()
+    key = cache.key("GET", URL)
+    cache.store(key, 200, [("Cache-Control", "max-age=60")], memoryview(b"body"))
+    assert cache.read_body(cache.lookup(key)) == b"body"
+    cache.close()
+
+    cache = open_cache()
+    assert cache.read_body(cache.lookup(key)) == b"body"
+
+
+def test_missing_body_file(open_cache):
+    cache = open_cache()
+    key = cache.key("GET", URL)
+    cache.store(key, 200, [("Cache-Control", "max-age=60")], b"body")
+    cache.close()
+    os.remove(cache._body_path(key))
+
+    cache = open_cache()
+    assert cache.lookup(key) is None
+    assert cache.size == 0
+
+
+def test_clear(open_cache, tmp_path):
+    cache = open_cache()
+    cache.store(cache.key("GET", URL), 200, [("Cache-Control", "max-age=60")], b"body")
+    cache.clear()
+    cache.close()
+    assert os.listdir(tmp_path) == ["index.json"]
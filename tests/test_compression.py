@@ -0,0 +1,53 @@
+import gzip
+import zlib
+
+import pytest
+import zstandard
+
+from backend.compression import REQUEST_ENCODINGS, accept_encoding, brotli, compress, stream_decoder
+
+PAYLOAD = b'{"items": [' + b",".join(b'{"id": %d}' % x for x in range(2000)) + b"]}"
+
+
+def _decode_in_chunks(encoding: str, data: bytes, size: int = 1000) -> bytes:
+    decoder = stream_decoder(encoding)
+    output = b"".join(decoder.decompress(data[x:x + size]) for x in range(0, len(data), size))
+    return output + decoder.flush()
+
+
+@pytest.mark.parametrize("encoding", REQUEST_ENCODINGS)
+def test_compress_round_trip(encoding):
+    compressed = compress(PAYLOAD, encoding)
+    assert len(compressed) < len(PAYLOAD)
+    assert _decode_in_chunks(encoding, compressed) == PAYLOAD
+
+
+def test_compress_unsupported():
+    with pytest.raises(ValueError):
+        compress(PAYLOAD, "br")
+
+
+def test_stream_decoders():
+    assert _decode_in_chunks("GZIP", gzip.compress(PAYLOAD)) == PAYLOAD
+    assert _decode_in_chunks("deflate", zlib.compress(PAYLOAD)) == PAYLOAD
+    # zstd frames without a content size in their header
+    compressor = zstandard.ZstdCompressor(write_content_size=False)
+    assert _decode_in_chunks("zstd", compressor.compress(PAYLOAD), 7) == PAYLOAD
+
+
+@pytest.mark.skipif(brotli is None, reason="brotli isn't installed")
+def test_brotli():
+    assert "br" in accept_encoding()
+    assert _decode_in_chunks("br", brotli.compress(PAYLOAD)) == PAYLOAD
+
+
+def test_no_decoder():
+    assert stream_decoder("") is None
+    assert stream_decoder("identity") is None
+    assert stream_decoder("compress") is None
+
+
+def test_corrupt_body():
+    decoder = stream_decoder("gzip")
+    with pytest.raises(ValueError):
+        decoder.decompress(b"not gzip at all")
@@ -0,0 +1,71 @@
+import codecs
+
+import pytest
+
+from backend.content import VIEW_JSON, VIEW_TEXT, VIEW_IMAGE, VIEW_BINARY, body_view, content_charset, decode_text, \
+    detect_charset, hex_dump, media_type, parse_body
+
+
+def test_media_type():
+    assert media_type("Application/JSON; charset=utf-8") == "application/json"
+    assert media_type(None) == ""
+
+
+def test_content_charset():
+    assert content_charset('text/html; charset="ISO-8859-1"') == "iso8859-1"
+    assert content_charset("text/html; charset=made-up") is None
+    assert content_charset("text/html") is None
+
+
+@pytest.mark.parametrize("content_type, view", [
+    ("application/json", VIEW_JSON),
+    ("application/problem+json", VIEW_JSON),
+    ("text/html", VIEW_TEXT),
+    ("application/xml", VIEW_TEXT),
+    ("image/svg+xml", VIEW_TEXT),
+    ("image/png", VIEW_IMAGE),
+    ("application/octet-stream", VIEW_BINARY),
+])
+def test_body_view_by_content_type(content_type, view):
+    assert body_view(content_type, b"") == view
+
+
+@pytest.mark.parametrize("body, view", [
+    (b'  [1, 2]', VIEW_JSON),
+    ("héllo".encode(), VIEW_TEXT),
+    ("héllo".encode("utf-16"), VIEW_TEXT),
+    ("héllo".encode("utf-32"), VIEW_TEXT),
+    (b"\x89PNG\r\n\x1a\n\0\0", VIEW_BINARY),
+    (b"\xc3\x28\xa0\xa1", VIEW_BINARY),
+])
+def test_body_view_sniffed(body, view):
+    assert body_view(None, body) == view
+
+
+def test_sniffing_tolerates_a_character_cut_at_the_sniff_length():
+    body = b"a" * 4095 + "é".encode() * 10
+    assert body_view(None, body) == VIEW_TEXT
+
+
+def test_detect_charset():
+    assert detect_charset("text/plain; charset=latin-1", b"") == "iso8859-1"
+    assert detect_charset(None, codecs.BOM_UTF8 + b"x") == "utf-8-sig"
+    assert detect_charset(None, "é".encode()) == "utf-8"
+    assert detect_charset(None, "é".encode("cp1252")) == "cp1252"
+
+
+def test_decode_text_replaces_invalid_bytes():
+    assert decode_text(memoryview(b"a\xffb"), "utf-8") == "a�b"
+
+
+def test_parse_body():
+    assert parse_body(b'{"a": 1}', "application/json") == ({"a": 1}, None)
+    assert parse_body(b'{"a": 1}', None) == ({"a": 1}, None)
+    assert parse_body(b'{"a": 1}', "text/plain") == (None, None)
+    assert parse_body(b"", "application/json") == (None, None)
+    parsed, error = parse_body(b'{"a": ', "application/json")
+    assert parsed is None and error
+
+
+def test_hex_dump():
+    assert hex_dump(b"AB\x00", 16) == "00000010  41 42 00" + " " * 39 + "  |AB.|"
@@ -0,0 +1,55 @@
+import mmap
+import os
+import subprocess
+import sys
+
+from backend.downloads import DownloadDirectory, sweep_stale_downloads
+from backend.network import Response
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_directory_of_a_running_process_is_kept(tmp_path):
+    directory = DownloadDirectory(str(tmp_path))
+    try:
+        assert sweep_stale_downloads(str(tmp_path)) == 0
+        assert os.path.isdir(directory.path)
+    finally:
+        directory.remove()
+    assert not os.path.exists(directory.path)
+
+
+def test_directory_of_an_exited_process_is_swept(tmp_path):
+    # a process that exits without removing its directory, as if it crashed
+    script = "import sys; from backend.downloads import DownloadDirectory; DownloadDirectory(sys.argv[1]).new_file()"
+    subprocess.run([sys.executable, "-c", script, str(tmp_path)], check=True, cwd=ROOT)
+    assert len(os.listdir(tmp_path)) == 1
+    assert sweep_stale_downloads(str(tmp_path)) == 1
+    assert not os.listdir(tmp_path)
+
+
+def test_release_deletes_temporary_body(tmp_path):
+    directory = DownloadDirectory(str(tmp_path))
+    try:
+        with directory.new_file() as f:
+            f.write(b"body")
+            f.flush()
+            body_mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        response = Response(200, None, {}, "", "GET", body_path=f.name, body_mmap=body_mmap, temporary_body=True)
+        view = response.body_bytes()
+        assert bytes(view) == b"body"
+        # a view that is still alive keeps the mapping, not the file
+        response.release()
+        assert not os.path.exists(f.name)
+        assert response.body_path is None and response.body_mmap is None
+        view.release()
+        response.release()
+    finally:
+        directory.remove()
+
+
+def test_release_keeps_chosen_download_path(tmp_path):
+    path = tmp_path / "saved.json"
+    path.write_bytes(b"{}")
+    Response(200, None, {}, "", "GET", body_path=str(path)).release()
+    assert path.exists()
@@ -0,0 +1,118 @@
+import mmap
+import sqlite3
+
+import pytest
+
+from backend.content import BODY_JSON, BODY_RAW, BODY_FORM
+from backend.history import HistoryStore, HistoryQuery
+from backend.network import RequestSpec, Response
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"))
+    yield store
+    store.close()
+
+
+def _response(url: str, body: bytes = b'{"ok": true}') -> Response:
+    return Response(
+        status_code=200,
+        response_body=None,
+        response_headers={"Content-Type": "application/json"},
+        request_url=url,
+        request_method="POST",
+        body_size=len(body),
+        raw_body=memoryview(body)
+    )
+
+
+def test_round_trip(store):
+    spec = RequestSpec(
+        "POST", "http://localhost/items", query_params={"page": ["2"]}, headers={"X-Test": "1"},
+        body={"name": "x"}, body_type=BODY_JSON
+    )
+    row_id = store.record(spec, _response("http://localhost/items?page=2")).result()
+    loaded_spec, loaded_response = store.load(row_id)
+    assert loaded_spec.url == "http://localhost/items"
+    assert loaded_spec.query_params == {"page": ["2"]}
+    assert loaded_spec.headers == {"X-Test": "1"}
+    assert loaded_spec.body == {"name": "x"}
+    assert loaded_response.request_url == "http://localhost/items?page=2"
+    assert loaded_response.response_body == {"ok": True}
+
+
+def test_bytes_body_is_kept_as_bytes(store):
+    body = b'{"id": 5,}\xff'
+    spec = RequestSpec("POST", "http://localhost/items", body=body, body_type=BODY_RAW)
+    row_id = store.record(spec, _response(spec.url)).result()
+    loaded_spec, _ = store.load(row_id)
+    assert loaded_spec.body == body
+    assert loaded_spec.body_type == BODY_RAW
+
+
+def test_form_body(store):
+    spec = RequestSpec("POST", "http://localhost/login", body={"user": "a"}, body_type=BODY_FORM)
+    row_id = store.record(spec, _response(spec.url)).result()
+    loaded_spec, _ = store.load(row_id)
+    assert loaded_spec.body == {"user": "a"}
+    assert loaded_spec.body_type == BODY_FORM
+
+
+def test_search_and_filter(store):
+    store.record(RequestSpec("POST", "http://localhost/items"), _response("http://localhost/items")).result()
+    store.record(RequestSpec("POST", "http://localhost/users"), _response("http://localhost/users")).result()
+    assert store.count(HistoryQuery()) == 2
+    assert store.count(HistoryQuery(text="users")) == 1
+    assert store.count(HistoryQuery(method="GET")) == 0
+    rows = store.page(HistoryQuery(), 0, 10)
+    assert [x.url for x in rows] == ["http://localhost/users", "http://localhost/items"]
+
+
+def test_database_without_added_columns(tmp_path):
+    path = str(tmp_path / "history.db")
+    connection = sqlite3.connect(path)
+    connection.executescript(
+        "CREATE TABLE history (id INTEGER PRIMARY KEY, timestamp REAL NOT NULL, method TEXT NOT NULL, "
+        "url TEXT NOT NULL, status INTEGER, latency_ms REAL, size INTEGER NOT NULL, request_headers BLOB NOT NULL, "
+        "response_headers BLOB NOT NULL);"
+        "CREATE TABLE history_bodies (id INTEGER PRIMARY KEY REFERENCES history (id) ON DELETE CASCADE, "
+        "request_body BLOB, response_body BLOB);"
+    )
+    connection.close()
+
+    store = HistoryStore(path)
+    try:
+        spec = RequestSpec("POST", "http://localhost/items", query_params={"a": "1"}, body=b"raw")
+        row_id = store.record(spec, _response("http://localhost/items?a=1")).result()
+        loaded_spec, _ = store.load(row_id)
+        assert loaded_spec.query_params == {"a": "1"}
+        assert loaded_spec.body == b"raw"
+    finally:
+        store.close()
+
+
+def test_body_is_copied_before_the_response_is_released(store, tmp_path):
+    path = tmp_path / "body"
+    path.write_bytes(b'{"ok": true}')
+    with open(path, "r+b") as f:
+        body_mmap = mmap.mmap(f.fileno(), 0)
+    response = Response(200, None, {"Content-Type": "application/json"}, "http://localhost/items", "GET",
+                        body_path=str(path), body_mmap=body_mmap, temporary_body=True, body_size=12)
+    future = store.record(RequestSpec("GET", "http://localhost/items"), response)
+    response.release()
+    _, loaded_response = store.load(future.result())
+    assert loaded_response.response_body == {"ok": True}
+
+
+def test_large_body_is_truncated(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"), max_body_size=10)
+    try:
+        body = b'{"items": [1, 2, 3]}'
+        row_id = store.record(RequestSpec("GET", "http://localhost/items"), _response("", body)).result()
+        _, loaded_response = store.load(row_id)
+        assert bytes(loaded_response.raw_body) == body[:10]
+        assert loaded_response.response_body is None
+        assert loaded_response.body_error
+    finally:
+        store.close()
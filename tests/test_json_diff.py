@@ -0,0 +1,112 @@
+import hashlib
+
+import pytest
+
+from backend.json_diff import ADDED, REMOVED, CHANGED, MODIFIED, DiffCancelled, diff_json, diff_responses
+from backend.network import Response
+
+
+def _children(node) -> dict:
+    return {x.key: x for x in node.children}
+
+
+def test_identical_documents():
+    assert diff_json({"a": [1, 2], "b": {"c": None}}, {"b": {"c": None}, "a": [1, 2]}) is None
+
+
+def test_scalar_types_differ():
+    node = diff_json({"a": 1}, {"a": True})
+    assert _children(node)["a"].kind == CHANGED
+
+
+def test_added_removed_changed():
+    node = diff_json({"a": 1, "b": 2, "c": {"d": 3}}, {"a": 1, "c": {"d": 4}, "e": 5})
+    assert node.kind == MODIFIED
+    assert node.changes == 3
+    children = _children(node)
+    assert children["b"].kind == REMOVED and children["b"].before == 2
+    assert children["e"].kind == ADDED and children["e"].after == 5
+    d = _children(children["c"])["d"]
+    assert (d.kind, d.before, d.after) == (CHANGED, 3, 4)
+
+
+def test_arrays_by_index():
+    node = diff_json([1, 2, 3], [1, 5])
+    children = _children(node)
+    assert children["[1]"].kind == CHANGED
+    assert children["[2]"].kind == REMOVED
+    assert [x.key for x in node.children] == ["[1]", "[2]"]
+
+
+def test_arrays_by_key():
+    before = [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]
+    after = [{"id": 2, "name": "b"}, {"id": 1, "name": "c"}, {"id": 3, "name": "d"}]
+    children = _children(diff_json(before, after, array_key="id"))
+    assert set(children) == {"[id=1]", "[id=3]"}
+    assert children["[id=1]"].kind == MODIFIED
+    assert children["[id=3]"].kind == ADDED
+
+
+def test_arrays_with_duplicate_keys_fall_back_to_index():
+    before = [{"id": 1}, {"id": 1}]
+    after = [{"id": 1}, {"id": 2}]
+    children = _children(diff_json(before, after, array_key="id"))
+    assert set(children) == {"[1]"}
+
+
+def test_nested_types_differ():
+    node = diff_json({"a": {"b": [1, 1.0, True]}}, {"a": {"b": [1.0, True, 1]}})
+    assert node.changes == 3
+
+
+def test_key_order_is_ignored_at_any_depth():
+    assert diff_json({"a": {"x": 1, "y": [{"p": 1, "q": 2}]}}, {"a": {"y": [{"q": 2, "p": 1}], "x": 1}}) is None
+
+
+def test_deep_documents():
+    before = after = None
+    for x in range(5000):
+        before, after = {"next": before, "x": x}, {"next": after, "x": x}
+    after["next"]["x"] = -1
+    node = diff_json(before, after)
+    assert node.changes == 1
+
+
+def test_every_container_is_hashed_once(monkeypatch):
+    digests = []
+    blake2b = hashlib.blake2b
+    monkeypatch.setattr(hashlib, "blake2b", lambda **kwargs: digests.append(1) or blake2b(**kwargs))
+    before = after = None
+    for x in range(200):
+        before, after = [before, {"x": x}], [after, {"x": x}]
+    after[1]["x"] = -1
+    diff_json(before, after)
+    # 200 lists and 200 objects on each side, at most
+    assert len(digests) <= 800
+
+
+def test_cancelled():
+    with pytest.raises(DiffCancelled):
+        diff_json(list(range(10_000)), list(range(1, 10_001)), is_cancelled=lambda: True)
+
+
+def _response(status: int, headers: dict, body) -> Response:
+    return Response(status, body, headers, "http://localhost/items", "GET")
+
+
+def test_responses():
+    before = _response(200, {"Content-Type": "application/json", "ETag": "1"}, {"items": [1]})
+    after = _response(201, {"content-type": "application/json", "etag": "2"}, {"items": [1]})
+    diff = diff_responses(before, after)
+    children = _children(diff.root)
+    assert set(children) == {"status", "headers"}
+    assert set(_children(children["headers"])) == {"etag"}
+    assert diff.changes == 2
+    assert not diff.truncated
+
+
+def test_raw_bodies_are_parsed():
+    before = Response(200, None, {"Content-Type": "application/json"}, "", "GET", raw_body=memoryview(b'{"a": 1}'))
+    after = Response(200, None, {"Content-Type": "application/json"}, "", "GET", raw_body=memoryview(b'{"a": 2}'))
+    body = _children(diff_responses(before, after).root)["body"]
+    assert _children(body)["a"].kind == CHANGED
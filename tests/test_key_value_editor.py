@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+from ui.key_value_editor import KeyValueEditor, KeyValueTableModel, parse_pairs
+
+
+@pytest.fixture(scope="module")
+def app():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+
+def test_parse_pairs_lines():
+    text = "Accept: text/html\nX-A=1\n\n  X-B\t2  \nhost:localhost:8080\nflag"
+    assert parse_pairs(text) == [("Accept", "text/html"), ("X-A", "1"), ("X-B", "2"), ("host", "localhost:8080"),
+                                 ("flag", "")]
+
+
+def test_parse_pairs_query_string():
+    assert parse_pairs("?a=1&b=x%20y&a=&c") == [("a", "1"), ("b", "x y"), ("a", ""), ("c", "")]
+
+
+def test_parse_pairs_separator_priority():
+    assert parse_pairs("Authorization: Bearer a=b") == [("Authorization", "Bearer a=b")]
+    assert parse_pairs("a=b: c") == [("a=b", "c")]
+
+
+def test_remove_rows():
+    model = KeyValueTableModel()
+    model.set_pairs([(str(x), "") for x in range(8)])
+    removed = []
+    model.rowsAboutToBeRemoved.connect(lambda parent, first, last: removed.append((first, last)))
+    model.remove_rows([6, 1, 2, 7, 4, 2])
+    assert removed == [(6, 7), (4, 4), (1, 2)]
+    assert [key for key, _ in model.pairs()] == ["0", "3", "5"]
+
+
+def test_repeated_keys(app):
+    editor = KeyValueEditor()
+    editor.set({"tag": ["a", "b"], "page": "1"})
+    editor.add("tag", "c")
+    editor.add("", "skipped")
+    editor.add("page", "2")
+    assert editor.get() == {"tag": ["a", "b", "c"], "page": ["1", "2"]}
@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from backend.load_test import LatencyHistogram, LoadTestResults
+
+
+def test_empty_histogram():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) == 0.0
+    assert histogram.count == 0
+
+
+def test_percentiles_within_one_percent():
+    rng = random.Random(1)
+    samples = sorted(rng.uniform(1, 2000) for _ in range(10_000))
+    histogram = LatencyHistogram()
+    for sample in samples:
+        histogram.add(sample)
+    assert histogram.count == len(samples)
+    assert histogram.max_ms == samples[-1]
+    for percent in (50, 90, 99):
+        exact = samples[int(len(samples) * percent / 100) - 1]
+        assert histogram.percentile(percent) == pytest.approx(exact, rel=0.015)
+
+
+def test_percentile_never_exceeds_max():
+    histogram = LatencyHistogram()
+    histogram.add(10.0)
+    assert histogram.percentile(100) == 10.0
+
+
+def test_sub_microsecond_and_huge_latencies():
+    histogram = LatencyHistogram()
+    histogram.add(0.0)
+    histogram.add(10 ** 9)
+    assert histogram.percentile(50) <= 0.002
+    assert histogram.percentile(100) <= 10 ** 9
+
+
+def test_results_summary():
+    results = LoadTestResults()
+    for status in (200, 200, 404, 0):
+        results.add(results.started, 5.0, status, 100)
+    results.stopped = results.started + 2
+    summary = results.summary()
+    assert summary.completed == 4
+    assert summary.errors == 2
+    assert summary.requests_per_second == 2.0
+    assert summary.bytes_per_second == 200.0
+    assert summary.statuses == {"error": 1, "200": 2, "404": 1}
@@ -0,0 +1,113 @@
+from dataclasses import replace
+
+import orjson
+import zstandard
+
+from backend.connections import ConnectionSettings
+from backend.content import BODY_FORM, BODY_RAW
+from backend.network import RequestSpec, build_qt_request, build_url, encode_query, _quote
+
+
+def _header(qt_request, name: bytes) -> str:
+    return qt_request.rawHeader(name).data().decode()
+
+
+def test_quote():
+    assert _quote("a b/c&d=e") == "a%20b%2Fc%26d%3De"
+    assert _quote("é") == "%C3%A9"
+
+
+def test_quote_keeps_percent_encoded_bytes():
+    assert _quote("a%20b") == "a%20b"
+    assert _quote("100%") == "100%25"
+    assert _quote("%zz%2F") == "%25zz%2F"
+
+
+def test_encode_query():
+    assert encode_query({"q": "a b", "page": 2}) == "q=a%20b&page=2"
+    assert encode_query({}) == ""
+
+
+def test_encode_query_repeated_keys():
+    assert encode_query({"tag": ["a", "b"], "x": []}) == "tag=a&tag=b"
+
+
+def test_build_url():
+    assert build_url("http://localhost/items", None).toString() == "http://localhost/items"
+    assert build_url("http://localhost/items", {"q": "a b&c"}).toEncoded().data() == \
+        b"http://localhost/items?q=a%20b%26c"
+
+
+def test_build_url_keeps_query_and_fragment():
+    url = build_url("http://localhost/items?sort=id#top", {"page": "2"})
+    assert url.query() == "sort=id&page=2"
+    assert url.fragment() == "top"
+    assert url.path() == "/items"
+
+
+def test_headers():
+    headers = {"Accept": ["text/html", "application/json"], "X-N": 1, "": "ignored"}
+    spec = RequestSpec("GET", "http://localhost/", headers=headers)
+    qt_request, _ = build_qt_request(spec, ConnectionSettings())
+    assert _header(qt_request, b"Accept") == "text/html, application/json"
+    assert _header(qt_request, b"X-N") == "1"
+
+
+def test_json_body():
+    spec = RequestSpec("POST", "http://localhost/", body={"a": 1})
+    qt_request, payload = build_qt_request(spec, ConnectionSettings())
+    assert orjson.loads(payload) == {"a": 1}
+    assert _header(qt_request, b"Content-Type") == "application/json"
+
+
+def test_content_type_is_not_overridden():
+    spec = RequestSpec("POST", "http://localhost/", headers={"content-type": "text/csv"}, body="a,b",
+                       body_type=BODY_RAW)
+    qt_request, payload = build_qt_request(spec, ConnectionSettings())
+    assert payload == b"a,b"
+    assert _header(qt_request, b"content-type") == "text/csv"
+
+
+def test_form_body():
+    spec = RequestSpec("POST", "http://localhost/", body={"user": "a b", "tag": ["x", "y"]}, body_type=BODY_FORM)
+    qt_request, payload = build_qt_request(spec, ConnectionSettings())
+    assert payload == b"user=a%20b&tag=x&tag=y"
+    assert _header(qt_request, b"Content-Type") == "application/x-www-form-urlencoded"
+
+
+def test_compressed_body():
+    spec = RequestSpec("POST", "http://localhost/", body={"a": 1}, body_encoding="zstd")
+    qt_request, payload = build_qt_request(spec, ConnectionSettings())
+    assert _header(qt_request, b"Content-Encoding") == "zstd"
+    assert orjson.loads(zstandard.ZstdDecompressor().decompress(payload)) == {"a": 1}
+
+
+def test_accept_encoding():
+    spec = RequestSpec("GET", "http://localhost/", accept_compressed=False)
+    qt_request, _ = build_qt_request(spec, ConnectionSettings())
+    assert not qt_request.hasRawHeader(b"Accept-Encoding")
+    qt_request, _ = build_qt_request(replace(spec, accept_compressed=True), ConnectionSettings())
+    assert "gzip" in _header(qt_request, b"Accept-Encoding")
+
+
+def test_prepared_request_is_reused_until_the_spec_changes():
+    settings = ConnectionSettings()
+    spec = RequestSpec("POST", "http://localhost/", body={"a": 1})
+    qt_request, payload = build_qt_request(spec, settings)
+    reused_request, reused_payload = build_qt_request(spec, settings)
+    assert reused_request is qt_request and reused_payload is payload
+    assert build_qt_request(spec, ConnectionSettings())[0] is qt_request
+
+    changed = replace(spec, body={"a": 2})
+    assert changed == RequestSpec("POST", "http://localhost/", body={"a": 2})
+    changed_request, changed_payload = build_qt_request(changed, settings)
+    assert changed_request is not qt_request
+    assert orjson.loads(changed_payload) == {"a": 2}
+
+
+def test_prepared_request_is_rebuilt_when_the_settings_change():
+    spec = RequestSpec("GET", "http://localhost/")
+    qt_request, _ = build_qt_request(spec, ConnectionSettings())
+    rebuilt, _ = build_qt_request(spec, ConnectionSettings(keep_alive=False))
+    assert rebuilt is not qt_request
+    assert _header(rebuilt, b"Connection") == "close"
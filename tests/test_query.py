@@ -0,0 +1,81 @@
+import pytest
+
+from backend.query import PathIndex, QueryCancelled, QuerySyntaxError, evaluate, format_path
+
+DOCUMENT = {
+    "items": [
+        {"id": 1, "name": "a", "price": 5, "tags": ["x"]},
+        {"id": 2, "name": "b", "price": 15},
+        {"id": 3, "name": "c", "price": 25, "owner": {"id": 9}},
+    ],
+    "content-type": "application/json",
+}
+
+
+def _values(expression: str, index: PathIndex | None = None) -> list:
+    return [value for _, value in evaluate(DOCUMENT, expression, index)]
+
+
+def test_root():
+    assert _values("$") == [DOCUMENT]
+    assert _values(".") == [DOCUMENT]
+
+
+def test_children_and_indexes():
+    assert _values("$.items[0].name") == ["a"]
+    assert _values("$.items[-1].id") == [3]
+    assert _values("$.items[5]") == []
+    assert _values("$['content-type']") == ["application/json"]
+
+
+def test_jq_shorthand():
+    assert _values(".items[].id") == _values("$.items[*].id") == [1, 2, 3]
+
+
+def test_slices():
+    assert _values("$.items[1:].id") == [2, 3]
+    assert _values("$.items[::2].id") == [1, 3]
+
+
+def test_names():
+    assert _values("$.items[0]['id', 'name']") == [1, "a"]
+
+
+def test_filters():
+    assert _values("$.items[?(@.price > 10)].name") == ["b", "c"]
+    assert _values("$.items[?(@.name == 'a')].id") == [1]
+    assert _values("$.items[?(@.owner)].id") == [3]
+    # comparing different types doesn't match instead of failing
+    assert _values("$.items[?(@.name < 3)]") == []
+
+
+def test_descend_in_document_order():
+    assert _values("$..id") == [1, 2, 3, 9]
+
+
+def test_descend_with_index():
+    index = PathIndex(DOCUMENT)
+    assert _values("$..id", index) == _values("$..id")
+    paths = [path for path, _ in evaluate(DOCUMENT, "$..id", index)]
+    assert paths[-1] == ("items", 2, "owner", "id")
+
+
+def test_format_path():
+    assert format_path(("items", 0, "content-type")) == "$.items[0].content-type"
+    assert format_path(("items", 0, "content type", "it's")) == "$.items[0]['content type']['it\\'s']"
+
+
+def test_formatted_paths_evaluate_to_their_value():
+    for path, value in evaluate(DOCUMENT, "$..*"):
+        assert _values(format_path(path)) == [value]
+
+
+@pytest.mark.parametrize("expression", ["items", "$[", "$['a", "$[1:2:3:4]", "$[?(@.a ==)]", "$.items[x]"])
+def test_syntax_errors(expression):
+    with pytest.raises(QuerySyntaxError):
+        evaluate(DOCUMENT, expression)
+
+
+def test_cancelled():
+    with pytest.raises(QueryCancelled):
+        evaluate(list(range(10_000)), "$..x", is_cancelled=lambda: True)
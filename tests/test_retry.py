@@ -0,0 +1,39 @@
+from backend.retry import RetryPolicy
+
+
+def test_single_attempt_never_retries():
+    assert not RetryPolicy().should_retry("GET", 1, 503)
+
+
+def test_retries_idempotent_methods_only():
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.should_retry("get", 1, 503)
+    assert policy.should_retry("PUT", 2, None)
+    assert not policy.should_retry("POST", 1, 503)
+    assert not policy.should_retry("PATCH", 1, None)
+
+
+def test_retry_conditions():
+    policy = RetryPolicy(max_attempts=3, retry_network_errors=False)
+    assert policy.should_retry("GET", 1, 429)
+    assert not policy.should_retry("GET", 1, 500)
+    assert not policy.should_retry("GET", 1, None)
+    assert not policy.should_retry("GET", 3, 503)
+
+
+def test_exponential_delay():
+    policy = RetryPolicy(base_delay_ms=100, max_delay_ms=1000, jitter=False)
+    assert [policy.delay_ms(x) for x in range(1, 6)] == [100, 200, 400, 800, 1000]
+
+
+def test_jitter_stays_within_bound():
+    policy = RetryPolicy(base_delay_ms=100, max_delay_ms=1000)
+    assert all(0 <= policy.delay_ms(3) <= 400 for _ in range(100))
+
+
+def test_retry_after():
+    policy = RetryPolicy(max_delay_ms=5000)
+    assert policy.delay_ms(1, " 2 ") == 2000
+    assert policy.delay_ms(1, "60") == 5000
+    # the HTTP-date form isn't honoured, the usual backoff is used instead
+    assert policy.delay_ms(1, "Wed, 21 Oct 2015 07:28:00 GMT") <= policy.base_delay_ms
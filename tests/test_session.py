@@ -0,0 +1,91 @@
+import pytest
+
+from backend.content import BODY_JSON, BODY_RAW, BODY_FORM
+from backend.network import Response
+from backend.session import MAX_SAVED_RESPONSES, Session, SessionEntry, SessionFormatError
+
+
+def _session(count: int) -> Session:
+    session = Session()
+    for x in range(count):
+        session.append(SessionEntry(f"entry {x}", "POST", "http://localhost", f"/items/{x}", body=f'{{"id": {x}}}'))
+    return session
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_round_trip(tmp_path, compress):
+    path = str(tmp_path / "test.sesh")
+    session = _session(3)
+    session.save(path, compress)
+    session.close()
+
+    session = Session.open(path)
+    try:
+        assert len(session) == 3
+        assert session.summary(1) == ("entry 1", "POST", "http://localhost/items/1")
+        assert session.get(2) == SessionEntry("entry 2", "POST", "http://localhost", "/items/2", body='{"id": 2}')
+    finally:
+        session.close()
+
+
+def test_entries_are_read_lazily(tmp_path):
+    path = str(tmp_path / "test.sesh")
+    _session(3).save(path)
+    session = Session.open(path)
+    try:
+        assert session.summary(0)[0] == "entry 0"
+        assert not any(isinstance(x, SessionEntry) for x in session._entries)
+        session.get(0)
+        assert isinstance(session._entries[0], SessionEntry)
+    finally:
+        session.close()
+
+
+def test_save_over_opened_file(tmp_path):
+    path = str(tmp_path / "test.sesh")
+    _session(3).save(path)
+    session = Session.open(path)
+    try:
+        session.get(1).name = "renamed"
+        session.remove(0)
+        session.append(SessionEntry("new"))
+        # the unread entry is copied as stored, then switched to not compressing
+        session.save(path)
+        session.save(path, compress=False)
+    finally:
+        session.close()
+
+    session = Session.open(path)
+    try:
+        assert [session.summary(x)[0] for x in range(len(session))] == ["renamed", "entry 2", "new"]
+        assert session.get(1).body == '{"id": 2}'
+    finally:
+        session.close()
+
+
+def test_not_a_session_file(tmp_path):
+    path = tmp_path / "test.sesh"
+    path.write_bytes(b"not a session")
+    with pytest.raises(SessionFormatError):
+        Session.open(str(path))
+
+
+def test_to_spec_bodies():
+    assert SessionEntry("a", body='{"id": 1}').to_spec().body == {"id": 1}
+    assert SessionEntry("a", body="  ").to_spec().body is None
+    # a JSON body that only parses once its placeholders are filled
+    assert SessionEntry("a", body='{"id": {{id}}}').to_spec().body == b'{"id": {{id}}}'
+    assert SessionEntry("a", body="x=1", body_type=BODY_RAW).to_spec().body == "x=1"
+    spec = SessionEntry("a", body_type=BODY_FORM, body_fields={"x": "1"}).to_spec()
+    assert (spec.body, spec.body_type) == ({"x": "1"}, BODY_FORM)
+    assert SessionEntry("a").to_spec().body_type == BODY_JSON
+
+
+def test_saved_responses_are_capped():
+    entry = SessionEntry("a")
+    for status in range(MAX_SAVED_RESPONSES + 2):
+        entry.save_response(Response(status, None, {"Content-Type": "text/plain"}, "", "GET",
+                                     raw_body=memoryview(b"hello")))
+    assert len(entry.responses) == MAX_SAVED_RESPONSES
+    assert entry.responses[0]["status_code"] == 2
+    assert entry.responses[-1]["response_body"] == "hello"
@@ -0,0 +1,92 @@
+import pytest
+
+from backend.streaming import FORMAT_NDJSON, FORMAT_SSE, NdjsonParser, RingBuffer, SseParser, stream_format
+
+
+def _feed(parser, *chunks: bytes) -> list:
+    events = []
+    for chunk in chunks:
+        events += parser.feed(chunk)
+    return events + parser.flush()
+
+
+def test_stream_format():
+    assert stream_format("text/event-stream; charset=utf-8") == FORMAT_SSE
+    assert stream_format("application/x-ndjson") == FORMAT_NDJSON
+    assert stream_format("application/json") is None
+    assert stream_format(None) is None
+
+
+def test_sse_multi_line_data():
+    events = _feed(SseParser(), b"event: update\ndata: first\ndata:second\ndata\n\n")
+    assert len(events) == 1
+    assert events[0].data == "first\nsecond\n"
+    assert events[0].event == "update"
+
+
+def test_sse_id_and_retry():
+    events = _feed(SseParser(), b"id: 1\nretry: 5000\ndata: a\n\ndata: b\n\nid\ndata: c\n\n")
+    assert [(x.data, x.id) for x in events] == [("a", "1"), ("b", "1"), ("c", "")]
+
+
+def test_sse_comments_and_empty_events():
+    events = _feed(SseParser(), b": keep-alive\n\nevent: ping\n\ndata: x\n\n")
+    assert [(x.data, x.event) for x in events] == [("x", None)]
+
+
+@pytest.mark.parametrize("separator", [b"\r\n", b"\r", b"\n"])
+def test_sse_line_endings(separator):
+    stream = separator.join([b"data: a", b"", b"data: b", b"", b""])
+    assert [x.data for x in _feed(SseParser(), stream)] == ["a", "b"]
+
+
+def test_sse_crlf_split_across_chunks():
+    assert [x.data for x in _feed(SseParser(), b"data: a\r", b"\n\r", b"\ndata: b\r\n\r\n")] == ["a", "b"]
+
+
+def test_sse_event_split_across_chunks():
+    stream = "data: héllo\n\n".encode()
+    parser = SseParser()
+    events = []
+    for x in range(len(stream)):
+        events += parser.feed(stream[x:x + 1])
+    assert [x.data for x in events] == ["héllo"]
+    assert events[0].size == len("data: héllo") + 1
+
+
+def test_sse_unterminated_event_is_discarded():
+    assert [x.data for x in _feed(SseParser(), b"data: a\n\ndata: b\n")] == ["a"]
+
+
+def test_ndjson():
+    events = _feed(NdjsonParser(), b'{"a": 1}\n\n  \n{"a": 2}\r\n')
+    assert [x.data for x in events] == ['{"a": 1}', '{"a": 2}']
+
+
+def test_ndjson_partial_trailing_line():
+    parser = NdjsonParser()
+    assert [x.data for x in parser.feed(b'{"a": 1}\n{"a"')] == ['{"a": 1}']
+    assert [x.data for x in parser.feed(b": 2}\n{")] == ['{"a": 2}']
+    assert [x.data for x in parser.flush()] == ["{"]
+
+
+def test_ring_buffer_wraparound():
+    buffer = RingBuffer(3)
+    assert buffer.extend([1, 2]) == 0
+    assert buffer.extend([3, 4, 5]) == 2
+    assert len(buffer) == 3
+    assert [buffer[x] for x in range(len(buffer))] == [3, 4, 5]
+    with pytest.raises(IndexError):
+        buffer[3]
+
+
+def test_ring_buffer_drop_and_resize():
+    buffer = RingBuffer(4)
+    buffer.extend(range(6))
+    buffer.drop(1)
+    assert [buffer[x] for x in range(len(buffer))] == [3, 4, 5]
+    buffer.resize(2)
+    assert (buffer.capacity, [buffer[x] for x in range(len(buffer))]) == (2, [4, 5])
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer.extend(range(3)) == 1
@@ -0,0 +1,63 @@
+from backend.network import RequestSpec, BODY_RAW
+from backend.variables import Environment, RequestTemplate, compile_value, make_lookup
+
+
+def test_string_placeholders():
+    compiled = compile_value("{{host}}/items/{{ id }}")
+    assert compiled.names == {"host", "id"}
+    assert compiled.render(make_lookup(variables={"host": "http://localhost", "id": 5})) == "http://localhost/items/5"
+
+
+def test_unknown_placeholder_is_kept():
+    assert compile_value("/items/{{id}}").render(make_lookup()) == "/items/{{id}}"
+
+
+def test_structure_without_placeholders_is_shared():
+    body = {"items": [1, 2, {"name": "x"}]}
+    assert compile_value(body).render(make_lookup()) is body
+
+
+def test_nested_placeholders():
+    compiled = compile_value({"user": {"id": "{{id}}"}, "tags": ["{{tag}}", "fixed"]})
+    rendered = compiled.render(make_lookup(variables={"id": "7", "tag": "new"}))
+    assert rendered == {"user": {"id": "7"}, "tags": ["new", "fixed"]}
+
+
+def test_variables_override_environment():
+    environment = Environment("dev", variables={"id": "1", "host": "dev"}, captured={"token": "abc"})
+    lookup = make_lookup(environment, {"id": "2"})
+    assert lookup("id") == "2"
+    assert lookup("host") == "dev"
+    assert lookup("token") == "abc"
+    assert lookup("missing") is None
+
+
+def test_dynamic_value_is_generated_once_per_lookup():
+    lookup = make_lookup()
+    assert lookup("$uuid") == lookup("$uuid")
+    assert make_lookup()("$uuid") != lookup("$uuid")
+
+
+def test_template_without_placeholders_returns_spec():
+    spec = RequestSpec("GET", "http://localhost/items")
+    assert RequestTemplate(spec).render() is spec
+
+
+def test_unquoted_numeric_placeholder_in_bytes_body():
+    # not valid JSON until it is rendered, so the body is kept as bytes
+    spec = RequestSpec("POST", "http://localhost/items", body=b'{"id": {{id}}}')
+    rendered = RequestTemplate(spec).render(variables={"id": 5})
+    assert rendered.body == b'{"id": 5}'
+
+
+def test_raw_text_body():
+    spec = RequestSpec("POST", "http://localhost/items", body="name={{name}}", body_type=BODY_RAW)
+    assert RequestTemplate(spec).render(variables={"name": "x"}).body == "name=x"
+
+
+def test_binary_body_is_left_alone():
+    body = b"\xff{{id}}"
+    spec = RequestSpec("POST", "http://localhost/items", body=body)
+    template = RequestTemplate(spec)
+    assert not template.names
+    assert template.render(variables={"id": 5}).body is body
@@ -0,0 +1,178 @@
+from dataclasses import replace
+
+from PySide6 import QtWidgets
+from PySide6.QtCore import QObject, Qt
+from PySide6.QtWidgets import QDialog, QGridLayout, QTableWidget, QAbstractItemView, QTableWidgetItem, QTextEdit, \
+    QPushButton, QSpinBox, QLabel
+
+import global_objects
+from backend.network import RequestSpec
+from backend.runner import CollectionRunner, RunResult
+
+
+class _ResultsTable(QTableWidget):
+    def __init__(self):
+        super().__init__()
+        # do some pre-requisites
+        self.verticalHeader().setVisible(False)
+        self.setSortingEnabled(True)
+        self.setEditTriggers(self.EditTrigger.NoEditTriggers)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+
+        # variables
+        headers = ["#", "Method", "URL", "Status", "Latency (ms)", "Size (bytes)"]
+
+        # set headers
+        self.setColumnCount(len(headers))
+        self.setHorizontalHeaderLabels(headers)
+
+        # realign headers
+        self.horizontalHeader().setSectionResizeMode(2, QtWidgets.QHeaderView.ResizeMode.Stretch)
+
+    def add_result(self, result: RunResult):
+        """
+        Appends a result to the table, numeric columns are stored as numbers so they sort correctly
+        :param result: Result of a single request
+        :return: None
+        """
+        # inserting while sorted would move the row out from under us
+        self.setSortingEnabled(False)
+        row = self.rowCount()
+        self.insertRow(row)
+        self.setItem(row, 0, _number_item(result.index + 1))
+        self.setItem(row, 1, QTableWidgetItem(result.spec.method))
+        self.setItem(row, 2, QTableWidgetItem(result.spec.url))
+        if result.status_code:
+            self.setItem(row, 3, _number_item(result.status_code))
+        else:
+            error = QTableWidgetItem(result.error.kind.capitalize() if result.error is not None else "Error")
+            error.setToolTip(result.error.message if result.error is not None else "")
+            self.setItem(row, 3, error)
+        self.setItem(row, 4, _number_item(round(result.elapsed_ms, 1)))
+        self.setItem(row, 5, _number_item(result.size))
+        self.setSortingEnabled(True)
+
+
+class WindowCollectionRunner(QDialog):
+    """Runs the assembled request against a list of paths, streaming the results into a sortable table"""
+    def __init__(self, parent: QObject, template: RequestSpec, base_url: str):
+        # setup window
+        super().__init__(parent)
+        self._layout = QGridLayout()
+        self.setLayout(self._layout)
+        self.setMinimumSize(900, 700)
+        self.setWindowTitle(f"Collection Runner - {template.method} - {base_url}")
+
+        # widgets
+        self._layout.addWidget(
+            QLabel("Paths, one per line, each optionally followed by name=value variables for that request only"),
+            0, 0, 1, 4
+        )
+        self.paths = QTextEdit()
+        self.paths.setAcceptRichText(False)
+        self.paths.setFont(global_objects.get_mono_font())
+        self._layout.addWidget(self.paths, 1, 0, 1, 4)
+
+        self._layout.addWidget(QLabel("Concurrency"), 2, 0)
+        self.concurrency = QSpinBox()
+        self.concurrency.setRange(1, 256)
+        self.concurrency.setValue(8)
+        self._layout.addWidget(self.concurrency, 2, 1)
+
+        self.run_button = QPushButton("Run")
+        self.run_button.clicked.connect(self.run)
+        self._layout.addWidget(self.run_button, 2, 2)
+
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop)
+        self._layout.addWidget(self.stop_button, 2, 3)
+
+        self.results = _ResultsTable()
+        self._layout.addWidget(self.results, 3, 0, 1, 4)
+
+        self.summary = QLabel()
+        self._layout.addWidget(self.summary, 4, 0, 1, 4)
+
+        # variables
+        self._template = template
+        self._base_url = base_url
+        self._runner: CollectionRunner | None = None
+        self._total = 0
+        self._completed = 0
+        self._failed = 0
+
+    def run(self):
+        """
+        Called when self.run_button is clicked, sends the template request once for every path
+        :return: None
+        """
+        lines = [_parse_line(x) for x in self.paths.toPlainText().splitlines() if x.strip()]
+        if not lines:
+            return
+        specs = [replace(self._template, url=self._base_url + path) for path, _ in lines]
+
+        self.results.setRowCount(0)
+        self._total = len(specs)
+        self._completed = 0
+        self._failed = 0
+        self._update_summary()
+
+        self._runner = CollectionRunner(
+            self, specs, self.concurrency.value(), [variables for _, variables in lines],
+            global_objects.get_environments().active
+        )
+        self._runner.result.connect(self._add_result)
+        self._runner.finished.connect(self._finished)
+        self.run_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self._runner.start()
+
+    def stop(self):
+        """
+        Called when self.stop_button is clicked, stops sending queued requests
+        :return: None
+        """
+        if self._runner is not None:
+            self._runner.stop()
+
+    def _add_result(self, result: RunResult):
+        self._completed += 1
+        if result.status_code is None or result.status_code >= 400:
+            self._failed += 1
+        self.results.add_result(result)
+        self._update_summary()
+        # the row is all that is shown of a result, its body isn't needed any more
+        if result.response is not None:
+            result.response.release()
+            result.response = None
+
+    def _finished(self):
+        self.run_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
+        self._runner.deleteLater()
+        self._runner = None
+
+    def _update_summary(self):
+        self.summary.setText(f"{self._completed} of {self._total} completed, {self._failed} failed")
+
+
+def _parse_line(line: str) -> tuple[str, dict[str, str]]:
+    """
+    Splits a line of the paths box into its path and variables
+    :param line: Line such as `/items/{{id}} id=5 expand=true`
+    :return: Tuple of the path and a dictionary of variables
+    """
+    path, *variables = line.split()
+    return path, dict(x.partition("=")[::2] for x in variables)
+
+
+def _number_item(value: int | float) -> QTableWidgetItem:
+    """
+    Builds a table item that sorts numerically
+    :param value: Number to display
+    :return: QTableWidgetItem
+    """
+    item = QTableWidgetItem()
+    item.setData(Qt.ItemDataRole.DisplayRole, value)
+    return item
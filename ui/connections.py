@@ -0,0 +1,156 @@
+from PySide6 import QtWidgets
+from PySide6.QtCore import QObject, Qt
+from PySide6.QtWidgets import QDialog, QGridLayout, QTableWidget, QAbstractItemView, QTableWidgetItem, QCheckBox, \
+    QPushButton, QGroupBox, QVBoxLayout, QSpinBox, QFormLayout, QLineEdit
+
+import global_objects
+
+
+class _ConnectionsTable(QTableWidget):
+    def __init__(self):
+        super().__init__()
+        # do some pre-requisites
+        self.verticalHeader().setVisible(False)
+        self.setSortingEnabled(True)
+        self.setEditTriggers(self.EditTrigger.NoEditTriggers)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+
+        # variables
+        headers = ["Host", "Requests", "Connections Opened", "Reused", "Reuse %", "HTTP/2", "Encrypted"]
+
+        # set headers
+        self.setColumnCount(len(headers))
+        self.setHorizontalHeaderLabels(headers)
+
+        # realign headers
+        self.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.ResizeMode.Stretch)
+
+    def refresh(self):
+        """
+        Rebuilds the table from the shared connection tracker
+        :return: None
+        """
+        hosts = global_objects.get_connection_tracker().hosts
+        self.setSortingEnabled(False)
+        self.setRowCount(len(hosts))
+        for row, (host, stats) in enumerate(hosts.items()):
+            reuse = round(100 * stats.reused / stats.requests, 1) if stats.requests else 0.0
+            values = [stats.requests, stats.connections_opened, stats.reused, reuse, stats.http2, stats.encrypted]
+            self.setItem(row, 0, QTableWidgetItem(host))
+            for column, value in enumerate(values, 1):
+                item = QTableWidgetItem()
+                item.setData(Qt.ItemDataRole.DisplayRole, value)
+                self.setItem(row, column, item)
+        self.setSortingEnabled(True)
+
+
+class WindowConnections(QDialog):
+    """Edits the global connection, timeout and retry settings and shows how connections are being reused per host"""
+    def __init__(self, parent: QObject):
+        # setup window
+        super().__init__(parent)
+        self._layout = QGridLayout()
+        self.setLayout(self._layout)
+        self.setMinimumSize(800, 400)
+        self.setWindowTitle("Connections")
+
+        # settings, bound directly to the global settings
+        settings = global_objects.connection_settings
+        settings_box = QGroupBox("Settings")
+        settings_layout = QVBoxLayout()
+        settings_box.setLayout(settings_layout)
+        self._layout.addWidget(settings_box, 0, 0, 1, 2)
+
+        self.http2 = QCheckBox("Allow HTTP/2")
+        self.http2.setChecked(settings.http2)
+        self.http2.toggled.connect(lambda x: setattr(settings, "http2", x))
+        settings_layout.addWidget(self.http2)
+
+        self.keep_alive = QCheckBox("Keep connections alive")
+        self.keep_alive.setChecked(settings.keep_alive)
+        self.keep_alive.toggled.connect(lambda x: setattr(settings, "keep_alive", x))
+        settings_layout.addWidget(self.keep_alive)
+
+        self.pipelining = QCheckBox("Allow HTTP/1.1 pipelining")
+        self.pipelining.setChecked(settings.pipelining)
+        self.pipelining.toggled.connect(lambda x: setattr(settings, "pipelining", x))
+        settings_layout.addWidget(self.pipelining)
+
+        self.prewarm = QCheckBox("Pre-warm a connection when the base URL changes")
+        self.prewarm.setChecked(settings.prewarm)
+        self.prewarm.toggled.connect(lambda x: setattr(settings, "prewarm", x))
+        settings_layout.addWidget(self.prewarm)
+
+        self.timeout = QSpinBox()
+        self.timeout.setRange(0, 3600)
+        self.timeout.setSuffix(" s")
+        self.timeout.setSpecialValueText("Never")
+        self.timeout.setValue(settings.timeout_ms // 1000)
+        self.timeout.valueChanged.connect(lambda x: setattr(settings, "timeout_ms", x * 1000))
+        timeout_layout = QFormLayout()
+        timeout_layout.addRow("Give up when idle for", self.timeout)
+
+        self.download_threshold = QSpinBox()
+        self.download_threshold.setRange(1, 64 * 1024)
+        self.download_threshold.setSuffix(" MiB")
+        self.download_threshold.setValue(settings.download_threshold // (1024 * 1024))
+        self.download_threshold.valueChanged.connect(
+            lambda x: setattr(settings, "download_threshold", x * 1024 * 1024)
+        )
+        timeout_layout.addRow("Download bodies to disk above", self.download_threshold)
+        settings_layout.addLayout(timeout_layout)
+
+        # retries, bound directly to the global retry policy
+        policy = global_objects.retry_policy
+        retry_box = QGroupBox("Retries (idempotent methods only)")
+        retry_layout = QFormLayout()
+        retry_box.setLayout(retry_layout)
+        self._layout.addWidget(retry_box, 0, 2)
+
+        self.retry_attempts = QSpinBox()
+        self.retry_attempts.setRange(0, 10)
+        self.retry_attempts.setSpecialValueText("Never")
+        self.retry_attempts.setValue(policy.max_attempts - 1)
+        self.retry_attempts.valueChanged.connect(lambda x: setattr(policy, "max_attempts", x + 1))
+        retry_layout.addRow("Retries", self.retry_attempts)
+
+        self.retry_delay = QSpinBox()
+        self.retry_delay.setRange(0, 60_000)
+        self.retry_delay.setSuffix(" ms")
+        self.retry_delay.setValue(policy.base_delay_ms)
+        self.retry_delay.valueChanged.connect(lambda x: setattr(policy, "base_delay_ms", x))
+        retry_layout.addRow("First delay, doubling", self.retry_delay)
+
+        self.retry_jitter = QCheckBox("Randomize delays")
+        self.retry_jitter.setChecked(policy.jitter)
+        self.retry_jitter.toggled.connect(lambda x: setattr(policy, "jitter", x))
+        retry_layout.addRow(self.retry_jitter)
+
+        self.retry_network_errors = QCheckBox("Retry network errors and timeouts")
+        self.retry_network_errors.setChecked(policy.retry_network_errors)
+        self.retry_network_errors.toggled.connect(lambda x: setattr(policy, "retry_network_errors", x))
+        retry_layout.addRow(self.retry_network_errors)
+
+        self.retry_statuses = QLineEdit(", ".join(str(x) for x in policy.retry_statuses))
+        self.retry_statuses.editingFinished.connect(self._set_retry_statuses)
+        retry_layout.addRow("Retry statuses", self.retry_statuses)
+
+        # table
+        self.table = _ConnectionsTable()
+        self._layout.addWidget(self.table, 1, 0, 1, 3)
+
+        self.clear_button = QPushButton("Clear")
+        self.clear_button.clicked.connect(global_objects.get_connection_tracker().clear)
+        self._layout.addWidget(self.clear_button, 2, 2)
+
+        global_objects.get_connection_tracker().changed.connect(self.table.refresh)
+        self.table.refresh()
+
+    def _set_retry_statuses(self):
+        statuses = tuple(int(x) for x in self.retry_statuses.text().replace(",", " ").split() if x.isdigit())
+        global_objects.retry_policy.retry_statuses = statuses
+        self.retry_statuses.setText(", ".join(str(x) for x in statuses))
+
+    def done(self, result: int):
+        global_objects.get_connection_tracker().changed.disconnect(self.table.refresh)
+        super().done(result)
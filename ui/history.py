@@ -0,0 +1,160 @@
+from datetime import datetime
+
+from PySide6 import QtWidgets
+from PySide6.QtCore import QObject, Qt, QAbstractTableModel, QModelIndex, QTimer
+from PySide6.QtWidgets import QDialog, QGridLayout, QLineEdit, QTableView, QAbstractItemView, QComboBox, QLabel
+
+import global_objects
+from backend.history import HistoryQuery, HistoryRow, HistoryStore
+from backend.network import Response
+from ui.response_viewer import WindowResponseViewer
+
+
+class HistoryTableModel(QAbstractTableModel):
+    """Pages rows out of the history store as the view scrolls, only the rows seen so far are kept in memory"""
+    headers = ["Time", "Method", "URL", "Status", "Latency (ms)", "Size (bytes)"]
+    page_size = 200
+
+    def __init__(self, store: HistoryStore):
+        super().__init__()
+        self._store = store
+        self._query = HistoryQuery()
+        self._rows: list[HistoryRow] = []
+        self._total = 0
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    def set_query(self, query: HistoryQuery) -> None:
+        """
+        Replaces the filters, the first page is fetched when the view asks for it
+        :param query: Filters to apply
+        :return: None
+        """
+        self.beginResetModel()
+        self._query = query
+        self._rows = []
+        self._total = self._store.count(query)
+        self.endResetModel()
+
+    def row_id(self, row: int) -> int:
+        return self._rows[row].id
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return len(self.headers)
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        return not parent.isValid() and len(self._rows) < self._total
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        rows = self._store.page(self._query, len(self._rows), self.page_size)
+        if not rows:
+            self._total = len(self._rows)
+            return
+        self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(rows) - 1)
+        self._rows += rows
+        self.endInsertRows()
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        row = self._rows[index.row()]
+        column = index.column()
+        if column == 0:
+            return datetime.fromtimestamp(row.timestamp).strftime("%Y-%m-%d %H:%M:%S")
+        if column == 1:
+            return row.method
+        if column == 2:
+            return row.url
+        if column == 3:
+            return row.status
+        if column == 4:
+            return round(row.latency_ms, 1) if row.latency_ms is not None else None
+        return row.size
+
+
+class WindowHistory(QDialog):
+    """
+    Searchable list of every request sent, double-clicking a row opens its response. When picking, it picks the
+    response instead and closes.
+    """
+    def __init__(self, parent: QObject, pick: bool = False):
+        # setup window
+        super().__init__(parent)
+        self._layout = QGridLayout()
+        self.setLayout(self._layout)
+        self.setMinimumSize(1000, 600)
+        self.setWindowTitle("Pick a Response" if pick else "History")
+
+        # widgets
+        self.search = QLineEdit()
+        self.search.setPlaceholderText("Search URLs, headers and bodies")
+        self._layout.addWidget(self.search, 0, 0)
+
+        self.method = QComboBox()
+        self.method.addItems(["Any method", "GET", "POST", "PUT", "DELETE", "PATCH"])
+        self._layout.addWidget(self.method, 0, 1)
+
+        self.status = QLineEdit()
+        self.status.setPlaceholderText("Status")
+        self.status.setMaximumWidth(80)
+        self._layout.addWidget(self.status, 0, 2)
+
+        self.model = HistoryTableModel(global_objects.get_history())
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.horizontalHeader().setSectionResizeMode(2, QtWidgets.QHeaderView.ResizeMode.Stretch)
+        self.table.doubleClicked.connect(self._open_response)
+        self._layout.addWidget(self.table, 1, 0, 1, 3)
+
+        self.summary = QLabel()
+        self._layout.addWidget(self.summary, 2, 0, 1, 3)
+
+        # wait for typing to pause before querying
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(250)
+        self._search_timer.timeout.connect(self.refresh)
+        self.search.textChanged.connect(self._search_timer.start)
+        self.status.textChanged.connect(self._search_timer.start)
+        self.method.currentIndexChanged.connect(self.refresh)
+
+        # variables
+        self._pick = pick
+        self.picked: Response | None = None
+
+        self.refresh()
+
+    def refresh(self):
+        """
+        Re-runs the query with the current filters
+        :return: None
+        """
+        status = self.status.text().strip()
+        self.model.set_query(HistoryQuery(
+            text=self.search.text(),
+            method=self.method.currentText() if self.method.currentIndex() > 0 else None,
+            status=int(status) if status.isdigit() else None
+        ))
+        self.summary.setText(f"{self.model.total} requests")
+
+    def _open_response(self, index: QModelIndex):
+        _, response = global_objects.get_history().load(self.model.row_id(index.row()))
+        if self._pick:
+            self.picked = response
+            self.accept()
+            return
+        response_viewer = WindowResponseViewer(self, response)
+        response_viewer.show()
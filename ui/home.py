@@ -1,14 +1,24 @@
 import os.path
 
 import orjson
-from PySide6 import QtWidgets
-from PySide6.QtWidgets import QMainWindow, QMenuBar, QGroupBox, QGridLayout, QWidget, QTabWidget, QTableWidget, \
-    QPushButton, QAbstractItemView, QComboBox, QSizePolicy, QLineEdit, QTableWidgetItem, QTextEdit, QFileDialog
+from PySide6.QtCore import QStandardPaths, Signal, Qt
+from PySide6.QtWidgets import QMainWindow, QMenuBar, QGroupBox, QGridLayout, QWidget, QTabWidget, QPushButton, \
+    QComboBox, QSizePolicy, QTextEdit, QFileDialog, QListWidget, QMessageBox, QVBoxLayout, QCheckBox, \
+    QHBoxLayout, QStackedWidget, QLineEdit, QSpinBox
 
 import global_objects
-from backend.network import Request, Response
+from backend.compression import REQUEST_ENCODINGS
+from backend.connections import prewarm
+from backend.content import BODY_JSON, BODY_RAW, BODY_FORM, BODY_MULTIPART, BODY_FILE
+from backend.network import Request, Response, RequestSpec, RequestError, ERROR_CANCELLED
+from backend.session import Session, SessionEntry, SessionFormatError
+from backend.streaming import ResponseStream, STREAM_AUTO, STREAM_ALWAYS
+from backend.syntax import JsonSyntaxHighlighter
+from backend.variables import RequestTemplate, compile_value, make_lookup
 from ui.custom_widgets import LineEditWithLabel
-from ui.response_viewer import WindowResponseViewer
+from ui.instrumentation import InstrumentationOverlay
+from ui.key_value_editor import KeyValueEditor
+from ui.response_workspace import ResponseWorkspace
 
 
 class WindowHome(QMainWindow):
@@ -31,11 +41,130 @@ class WindowHome(QMainWindow):
 
         self._edit_menu = self._menu_bar.addMenu("Edit")
         edit_variables = self._edit_menu.addAction("Variables")
+        edit_variables.triggered.connect(self.open_variables)
         self._edit_menu.addSeparator()
+
+        self._tools_menu = self._menu_bar.addMenu("Tools")
+        tools_collection_runner = self._tools_menu.addAction("Collection Runner")
+        tools_collection_runner.triggered.connect(self.open_collection_runner)
+        tools_load_test = self._tools_menu.addAction("Load Test")
+        tools_load_test.triggered.connect(self.open_load_test)
+        tools_connections = self._tools_menu.addAction("Connections")
+        tools_connections.triggered.connect(self.open_connections)
+        tools_history = self._tools_menu.addAction("History")
+        tools_history.triggered.connect(self.open_history)
+        self._tools_menu.addSeparator()
+        tools_response_cache = self._tools_menu.addAction("Response Cache")
+        tools_response_cache.setCheckable(True)
+        tools_response_cache.toggled.connect(self.toggle_response_cache)
+        tools_clear_response_cache = self._tools_menu.addAction("Clear Response Cache")
+        tools_clear_response_cache.triggered.connect(self.clear_response_cache)
+
+        # responses open in docked tabs, shown once the first one arrives
+        self._responses = ResponseWorkspace(self)
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self._responses)
+        self._responses.hide()
+        self._view_menu = self._menu_bar.addMenu("View")
+        self._view_menu.addAction(self._responses.toggleViewAction())
+        view_instrumentation = self._view_menu.addAction("Instrumentation Overlay")
+        view_instrumentation.setCheckable(True)
+        view_instrumentation.setShortcut("Ctrl+Shift+I")
         self.setMenuBar(self._menu_bar)
 
+        self._session_widget = _SessionWidget()
+        self._session_widget.entries.currentRowChanged.connect(self._load_session_entry)
+        self._session_widget.add_button.clicked.connect(self._add_session_entry)
+        self._session_widget.update_button.clicked.connect(self._update_session_entry)
+        self._session_widget.remove_button.clicked.connect(self._remove_session_entry)
+        self._layout.addWidget(self._session_widget, 0, 0)
+
         self._assemble_request = AssembleRequestWidget()
-        self._layout.addWidget(self._assemble_request)
+        self._assemble_request.response_received.connect(self._save_session_response)
+        self._assemble_request.response_received.connect(self._responses.add_response)
+        self._layout.addWidget(self._assemble_request, 0, 1)
+        self._layout.setColumnStretch(1, 1)
+
+        # per-stage timings of the last response, over the request editor
+        self._instrumentation = InstrumentationOverlay(self._widget)
+        self._assemble_request.response_received.connect(self._instrumentation.set_response)
+        self._responses.response_rendered.connect(self._instrumentation.refresh)
+        view_instrumentation.toggled.connect(self._instrumentation.setVisible)
+
+        # variables
+        self._session = Session()
+        self._session_path: str | None = None
+
+    def open_variables(self):
+        """
+        Opens the environment and variable editor
+        :return: None
+        """
+        from ui.variable_editor import WindowVariableEditor
+
+        variables = WindowVariableEditor(self)
+        variables.exec()
+
+    def open_collection_runner(self):
+        """
+        Opens the collection runner for the request currently being assembled
+        :return: None
+        """
+        from ui.collection_runner import WindowCollectionRunner
+
+        runner = WindowCollectionRunner(self, self._assemble_request.build_spec(), str(self._assemble_request.base_url))
+        runner.show()
+
+    def open_load_test(self):
+        """
+        Opens a load test for the request currently being assembled
+        :return: None
+        """
+        from ui.load_test import WindowLoadTest
+
+        load_test = WindowLoadTest(self, self._assemble_request.build_spec())
+        load_test.show()
+
+    def open_connections(self):
+        """
+        Opens the connection settings and pool status panel
+        :return: None
+        """
+        from ui.connections import WindowConnections
+
+        connections = WindowConnections(self)
+        connections.show()
+
+    def open_history(self):
+        """
+        Opens the request history
+        :return: None
+        """
+        from ui.history import WindowHistory
+
+        history = WindowHistory(self)
+        history.show()
+
+    def toggle_response_cache(self, enabled: bool):
+        """
+        Enables or disables the on-disk response cache for every request sent from now on
+        :param enabled: Whether the cache should be used
+        :return: None
+        """
+        from backend.cache import ResponseCache
+
+        if not enabled:
+            global_objects.close_response_cache()
+            return
+        directory = os.path.join(QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation), "http")
+        global_objects.response_cache = ResponseCache(directory)
+
+    def clear_response_cache(self):
+        """
+        Removes every cached response
+        :return: None
+        """
+        if global_objects.response_cache is not None:
+            global_objects.response_cache.clear()
 
     def open_session(self):
         """
@@ -43,7 +172,15 @@ class WindowHome(QMainWindow):
         :return:
         """
         def _open(path: str):
-            print(path)
+            try:
+                session = Session.open(path)
+            except (OSError, SessionFormatError) as e:
+                QMessageBox.critical(self, "Open Session", str(e))
+                return
+            self._session.close()
+            self._session = session
+            self._session_path = path
+            self._session_widget.set_session(session)
         file = QFileDialog(self, "Open Session", os.path.expanduser("~"), ".sesh")
         file.fileSelected.connect(_open)
         file.exec()
@@ -54,18 +191,101 @@ class WindowHome(QMainWindow):
         :return: None
         """
         def _save(path: str):
-            print(path)
-        file = QFileDialog(self, "Save Session", os.path.expanduser("~"), ".sesh")
+            try:
+                self._session.save(path)
+            except OSError as e:
+                QMessageBox.critical(self, "Save Session", str(e))
+                return
+            self._session_path = path
+        file = QFileDialog(self, "Save Session", self._session_path or os.path.expanduser("~"), ".sesh")
+        file.setAcceptMode(QFileDialog.AcceptMode.AcceptSave)
         file.fileSelected.connect(_save)
         file.exec()
 
+    def _load_session_entry(self, row: int):
+        """
+        Called when a session entry is selected, reads it (from disk, the first time) into the request widget
+        :param row: Selected row
+        :return: None
+        """
+        if row < 0:
+            return
+        self._assemble_request.set_entry(self._session.get(row))
+
+    def _add_session_entry(self):
+        entry = self._assemble_request.get_entry()
+        row = self._session.append(entry)
+        self._session_widget.add(entry.name, entry.method, entry.url)
+        self._session_widget.entries.setCurrentRow(row)
+
+    def _update_session_entry(self):
+        row = self._session_widget.entries.currentRow()
+        if row < 0:
+            return
+        entry = self._assemble_request.get_entry(self._session.get(row))
+        self._session.replace(row, entry)
+        self._session_widget.set_row(row, entry.name, entry.method, entry.url)
+
+    def _remove_session_entry(self):
+        row = self._session_widget.entries.currentRow()
+        if row < 0:
+            return
+        self._session.remove(row)
+        self._session_widget.entries.takeItem(row)
+
+    def _save_session_response(self, response: Response):
+        row = self._session_widget.entries.currentRow()
+        if row >= 0:
+            self._session.get(row).save_response(response)
+
+
+class _SessionWidget(QGroupBox):
+    """Lists the requests saved in the session, only their names are needed to fill the list"""
+    def __init__(self):
+        super().__init__(title="Session")
+        self.setSizePolicy(QSizePolicy.Policy.Maximum, QSizePolicy.Policy.Expanding)
+        self._layout = QGridLayout()
+        self.setLayout(self._layout)
+
+        self.add_button = QPushButton("Add")
+        self._layout.addWidget(self.add_button, 0, 0)
+        self.update_button = QPushButton("Update")
+        self._layout.addWidget(self.update_button, 0, 1)
+        self.remove_button = QPushButton("Remove")
+        self._layout.addWidget(self.remove_button, 0, 2)
+
+        self.entries = QListWidget()
+        self.entries.setUniformItemSizes(True)
+        self._layout.addWidget(self.entries, 1, 0, 1, 3)
+
+    def set_session(self, session: Session):
+        """
+        Lists the entries of a session from its index
+        :param session: Session to list
+        :return: None
+        """
+        self.entries.clear()
+        self.entries.addItems([_entry_label(*session.summary(x)) for x in range(len(session))])
+
+    def add(self, name: str, method: str, url: str):
+        self.entries.addItem(_entry_label(name, method, url))
+
+    def set_row(self, row: int, name: str, method: str, url: str):
+        self.entries.item(row).setText(_entry_label(name, method, url))
+
+
+def _entry_label(name: str, method: str, url: str) -> str:
+    return f"{method} {name}" if name else f"{method} {url}"
+
 
 class _EditRequestBodyWidget(QWidget):
     """Widget for editing the request body"""
     class _Editor(QTextEdit):
         def __init__(self):
             super().__init__()
-            self.setFont(global_objects.mono_font)
+            self.setFont(global_objects.get_mono_font())
+            self.setAcceptRichText(False)
+            self._highlighter = JsonSyntaxHighlighter(self.document())
             self._json: str | None = None
 
         def prettify_json(self):
@@ -77,204 +297,209 @@ class _EditRequestBodyWidget(QWidget):
                 self._json = self.toPlainText()
                 parsed_json = orjson.loads(self._json)
                 self._json = orjson.dumps(parsed_json, option=orjson.OPT_INDENT_2).decode()
-                self.setText(self._json)
+                self.setPlainText(self._json)
             except orjson.JSONDecodeError:
                 pass
 
         def set_json(self, json_: str):
             self._json = orjson.dumps(json_, option=orjson.OPT_INDENT_2).decode()
-            self._highlight_syntax()
-
-        def _highlight_syntax(self):
-            """
-            Iterates over the lines in the JSON, applying HTML syntax highlighting
-            todo needs work
-            :return: None
-            """
-            self.setText(self._json)
+            self.setPlainText(self._json)
+
+    # pages of self.pages, the text editor is shared by JSON and raw bodies, the fields by form and multipart ones
+    _TEXT_PAGE, _FIELDS_PAGE, _FILE_PAGE = range(3)
+    _body_types = {
+        BODY_JSON: ("JSON", _TEXT_PAGE),
+        BODY_RAW: ("Raw", _TEXT_PAGE),
+        BODY_FORM: ("Form", _FIELDS_PAGE),
+        BODY_MULTIPART: ("Multipart", _FIELDS_PAGE),
+        BODY_FILE: ("File", _FILE_PAGE),
+    }
 
     def __init__(self):
         super().__init__()
         self._layout = QGridLayout()
         self.setLayout(self._layout)
 
-        self.editor = self._Editor()
-        self._layout.addWidget(self.editor, 1, 0)
+        self.body_type = QComboBox()
+        for body_type, (label, _) in self._body_types.items():
+            self.body_type.addItem(label, body_type)
+        self.body_type.currentIndexChanged.connect(self._show_body_type)
+        self._layout.addWidget(self.body_type, 0, 0)
+
         self.prettify_button = QPushButton("Prettify")
-        self.prettify_button.clicked.connect(self.editor.prettify_json)
-        self._layout.addWidget(self.prettify_button, 0, 0)
+        self._layout.addWidget(self.prettify_button, 0, 1)
+
+        self.compression = QComboBox()
+        self.compression.addItem("Uncompressed", None)
+        for encoding in REQUEST_ENCODINGS:
+            self.compression.addItem(f"Compress ({encoding})", encoding)
+        self._layout.addWidget(self.compression, 0, 2)
 
-    def get(self) -> dict:
+        self.pages = QStackedWidget()
+        self.editor = self._Editor()
+        self.prettify_button.clicked.connect(self.editor.prettify_json)
+        self.pages.addWidget(self.editor)
+
+        self.fields = KeyValueEditor()
+        self.fields.setToolTip("In a multipart body, a value of @path uploads that file")
+        self.pages.addWidget(self.fields)
+
+        file_page = QWidget()
+        file_layout = QHBoxLayout(file_page)
+        file_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
+        self.file_path = QLineEdit()
+        self.file_path.setPlaceholderText("File to upload, it is streamed from disk as it is sent")
+        file_layout.addWidget(self.file_path, 1)
+        self.browse_button = QPushButton("Browse")
+        self.browse_button.clicked.connect(self._browse)
+        file_layout.addWidget(self.browse_button)
+        self.pages.addWidget(file_page)
+        self._layout.addWidget(self.pages, 1, 0, 1, 3)
+        self._layout.setColumnStretch(2, 1)
+        self._show_body_type()
+
+    def _show_body_type(self):
+        body_type = self.body_type.currentData()
+        self.pages.setCurrentIndex(self._body_types[body_type][1])
+        self.prettify_button.setEnabled(body_type == BODY_JSON)
+        # streamed bodies are never compressed
+        self.compression.setEnabled(body_type != BODY_FILE and body_type != BODY_MULTIPART)
+
+    def _browse(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Upload File")
+        if path:
+            self.file_path.setText(path)
+
+    def set(self, text: str, body_encoding: str | None = None, body_type: str = BODY_JSON,
+            fields: dict | None = None):
         """
-        Gets the content of Editor as a dictionary
-        :return: Dictionary
+        Sets the content of Editor
+        :param text: Body text, or the path of a file body
+        :param body_encoding: Optional, compression to select
+        :param body_type: Optional, how the body is encoded
+        :param fields: Optional, fields of a form or multipart body
+        :return: None
+        """
+        self.body_type.setCurrentIndex(max(0, self.body_type.findData(body_type)))
+        if body_type == BODY_FILE:
+            self.file_path.setText(text)
+        else:
+            self.editor.setPlainText(text)
+        self.fields.set(fields or {})
+        self.compression.setCurrentIndex(max(0, self.compression.findData(body_encoding)))
+
+    def get(self) -> dict | list | str | bytes | None:
+        """
+        Gets the body to send, as RequestSpec expects it for the selected body type. JSON that doesn't parse is sent
+        exactly as it was typed, so malformed requests can still be tested.
+        :return: Body, None if there is none
         """
+        body_type = self.body_type.currentData()
+        if body_type in (BODY_FORM, BODY_MULTIPART):
+            return self.fields.get()
+        if body_type == BODY_FILE:
+            return self.file_path.text() or None
+        text = self.editor.toPlainText()
+        if body_type == BODY_RAW:
+            return text
+        if not text.strip():
+            return None
         try:
-            return orjson.loads(self.editor.toPlainText())
+            return orjson.loads(text)
         except orjson.JSONDecodeError:
-            return {}
-
-
-class _EditQueryParametersWidget(QWidget):
-    """Widget for editing headers"""
-    class _Table(QTableWidget):
-        def __init__(self):
-            super().__init__()
-            # do some pre-requisites
-            self.verticalHeader().setVisible(False)
-            self.setSortingEnabled(True)
-            self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
-
-            # variables
-            headers = ["Key", "Value"]
+            return text.encode()
 
-            # set headers
-            self.setColumnCount(len(headers))
-            self.setHorizontalHeaderLabels(headers)
-
-            # realign headers
-            self.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.ResizeMode.Stretch)
-            self.horizontalHeader().setSectionResizeMode(1, QtWidgets.QHeaderView.ResizeMode.Stretch)
-
-    def __init__(self):
-        super().__init__()
-        self._layout = QGridLayout()
-        self.setLayout(self._layout)
-
-        self.add_button = QPushButton("Add")
-        self.add_button.setSizePolicy(QSizePolicy.Policy.Maximum, QSizePolicy.Policy.Maximum)
-        self.add_button.clicked.connect(self.add_new)
-        self._layout.addWidget(self.add_button, 0, 0)
-
-        self.remove_button = QPushButton("Remove")
-        self.remove_button.setSizePolicy(QSizePolicy.Policy.Maximum, QSizePolicy.Policy.Maximum)
-        self.remove_button.clicked.connect(self.remove)
-        self._layout.addWidget(self.remove_button, 0, 1)
-
-        self.search = QLineEdit()
-        self.search.setPlaceholderText("Search")
-        self._layout.addWidget(self.search, 0, 2)
-
-        self.table = self._Table()
-        self._layout.addWidget(self.table, 1, 0, 1, 3)
-
-    def add(self, key: str, value: str):
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-        self.table.setItem(row, 0, QTableWidgetItem(key))
-        self.table.setItem(row, 1, QTableWidgetItem(value))
-
-    def add_new(self):
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-        item = QTableWidgetItem()
-        self.table.setItem(row, 0, item)
-        self.table.editItem(item)
-
-    def remove(self):
-        row = self.table.currentRow()
-        self.table.removeRow(row)
-
-    def get(self) -> dict:
+    def text(self) -> str:
         """
-        Get this table as a key/value pair
-        :return: None
+        Gets the text a session keeps for this body
+        :return: Body text, or the path of a file body
         """
-        content = {}
-        for row in range(self.table.rowCount()):
-            key = self.table.item(row, 0).text()
-            value = self.table.item(row, 1).text()
-            content[key] = value
-        return content
+        if self.body_type.currentData() == BODY_FILE:
+            return self.file_path.text()
+        return self.editor.toPlainText()
 
 
-class _EditHeadersWidget(QWidget):
-    """Widget for editing headers"""
-    class _Table(QTableWidget):
-        def __init__(self):
-            super().__init__()
-            # do some pre-requisites
-            self.verticalHeader().setVisible(False)
-            self.setSortingEnabled(True)
-            self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+class _EditQueryParametersWidget(KeyValueEditor):
+    """Widget for editing query parameters"""
 
-            # variables
-            headers = ["Key", "Value"]
 
-            # set headers
-            self.setColumnCount(len(headers))
-            self.setHorizontalHeaderLabels(headers)
+class _EditHeadersWidget(KeyValueEditor):
+    """Widget for editing headers"""
 
-            # realign headers
-            self.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.ResizeMode.Stretch)
-            self.horizontalHeader().setSectionResizeMode(1, QtWidgets.QHeaderView.ResizeMode.Stretch)
+
+class _RequestAttributesWidget(QTabWidget):
+    """Widget for modifying the attributes of a request, each tab's editor is built the first time it is needed"""
+    HEADERS, QUERY_PARAMETERS, BODY = range(3)
 
     def __init__(self):
         super().__init__()
-        self._layout = QGridLayout()
-        self.setLayout(self._layout)
+        self._editors: dict[int, QWidget] = {}
+        self._factories = {
+            self.HEADERS: _EditHeadersWidget,
+            self.QUERY_PARAMETERS: _EditQueryParametersWidget,
+            self.BODY: _EditRequestBodyWidget,
+        }
+        for title in ("Headers", "Query Parameters", "Body"):
+            page = QWidget()
+            QVBoxLayout(page).setContentsMargins(0, 0, 0, 0)
+            self.addTab(page, title)
+        self.currentChanged.connect(self._editor)
+        self._editor(self.currentIndex())
+
+    def _editor(self, index: int) -> QWidget | None:
+        """
+        Get the editor of a tab, building it into its page the first time
+        :param index: Index of the tab
+        :return: The editor, None for an invalid index
+        """
+        if index not in self._factories:
+            return None
+        if index not in self._editors:
+            self._editors[index] = self._factories[index]()
+            self.widget(index).layout().addWidget(self._editors[index])
+        return self._editors[index]
 
-        self.add_button = QPushButton("Add")
-        self.add_button.setSizePolicy(QSizePolicy.Policy.Maximum, QSizePolicy.Policy.Maximum)
-        self.add_button.clicked.connect(self.add_new)
-        self._layout.addWidget(self.add_button, 0, 0)
+    def built(self, index: int) -> bool:
+        return index in self._editors
 
-        self.remove_button = QPushButton("Remove")
-        self.remove_button.setSizePolicy(QSizePolicy.Policy.Maximum, QSizePolicy.Policy.Maximum)
-        self.remove_button.clicked.connect(self.remove)
-        self._layout.addWidget(self.remove_button, 0, 1)
+    @property
+    def headers_editor(self) -> "_EditHeadersWidget":
+        return self._editor(self.HEADERS)
 
-        self.search = QLineEdit()
-        self.search.setPlaceholderText("Search")
-        self._layout.addWidget(self.search, 0, 2)
+    @property
+    def query_parameters_editor(self) -> "_EditQueryParametersWidget":
+        return self._editor(self.QUERY_PARAMETERS)
 
-        self.table = self._Table()
-        self._layout.addWidget(self.table, 1, 0, 1, 3)
+    @property
+    def request_body_editor(self) -> _EditRequestBodyWidget:
+        return self._editor(self.BODY)
 
-    def add(self, key: str, value: str):
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-        self.table.setItem(row, 0, QTableWidgetItem(key))
-        self.table.setItem(row, 1, QTableWidgetItem(value))
+    def headers(self) -> dict:
+        return self.headers_editor.get() if self.built(self.HEADERS) else {}
 
-    def add_new(self):
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-        item = QTableWidgetItem()
-        self.table.setItem(row, 0, item)
-        self.table.editItem(item)
+    def query_parameters(self) -> dict:
+        return self.query_parameters_editor.get() if self.built(self.QUERY_PARAMETERS) else {}
 
-    def remove(self):
-        row = self.table.currentRow()
-        self.table.removeRow(row)
+    def body(self) -> dict | list | str | bytes | None:
+        return self.request_body_editor.get() if self.built(self.BODY) else None
 
-    def get(self) -> dict:
-        """
-        Get this table as a key/value pair
-        :return: None
-        """
-        content = {}
-        for row in range(self.table.rowCount()):
-            key = self.table.item(row, 0).text()
-            value = self.table.item(row, 1).text()
-            content[key] = value
-        return content
+    def body_text(self) -> str:
+        return self.request_body_editor.text() if self.built(self.BODY) else ""
 
+    def body_type(self) -> str:
+        return self.request_body_editor.body_type.currentData() if self.built(self.BODY) else BODY_JSON
 
-class _RequestAttributesWidget(QTabWidget):
-    """Widget for modifying the attributes of a request"""
-    def __init__(self):
-        super().__init__()
-        self.headers_editor = _EditHeadersWidget()
-        self.addTab(self.headers_editor, "Headers")
-        self.query_parameters_editor = _EditQueryParametersWidget()
-        self.addTab(self.query_parameters_editor, "Query Parameters")
-        self.request_body_editor = _EditRequestBodyWidget()
-        self.addTab(self.request_body_editor, "Body")
+    def body_fields(self) -> dict:
+        return self.request_body_editor.fields.get() if self.built(self.BODY) else {}
+
+    def body_encoding(self) -> str | None:
+        return self.request_body_editor.compression.currentData() if self.built(self.BODY) else None
 
 
 class AssembleRequestWidget(QGroupBox):
     """Widget for creating a request"""
+    response_received = Signal(Response)
+
     def __init__(self):
         super().__init__(title="Request")
         self._layout = QGridLayout()
@@ -282,12 +507,13 @@ class AssembleRequestWidget(QGroupBox):
 
         # base url input box
         self.base_url = LineEditWithLabel(self, label="Base URL", placeholder="https://api.mysite.com")
-        self.base_url.line_edit.setFont(global_objects.mono_font)
+        self.base_url.line_edit.setFont(global_objects.get_mono_font())
+        self.base_url.line_edit.editingFinished.connect(self._prewarm)
         self._layout.addWidget(self.base_url, 0, 0)
 
         # path to resource input box
         self.path = LineEditWithLabel(self, label="Path", placeholder="/path/to/resource")
-        self.path.line_edit.setFont(global_objects.mono_font)
+        self.path.line_edit.setFont(global_objects.get_mono_font())
         self._layout.addWidget(self.path, 0, 1)
 
         # tab widget
@@ -298,31 +524,168 @@ class AssembleRequestWidget(QGroupBox):
         self.method.addItems(["GET", "POST", "PUT", "DELETE", "PATCH"])
         self._layout.addWidget(self.method, 2, 0, 2, 1)
 
-        # submit button
+        # submit and cancel buttons
+        buttons = QWidget()
+        buttons_layout = QHBoxLayout(buttons)
+        buttons_layout.setContentsMargins(0, 0, 0, 0)
         self.send_request_button = QPushButton("Send Request")
         self.send_request_button.clicked.connect(self.send_request)
-        self._layout.addWidget(self.send_request_button, 2, 1, 2, 2)
+        buttons_layout.addWidget(self.send_request_button, 1)
+        self.cancel_request_button = QPushButton("Cancel")
+        self.cancel_request_button.setEnabled(False)
+        self.cancel_request_button.clicked.connect(self.cancel_request)
+        buttons_layout.addWidget(self.cancel_request_button)
+        # the lowest value leaves the timeout to the connection settings
+        self.timeout = QSpinBox()
+        self.timeout.setRange(0, 3600)
+        self.timeout.setSuffix(" s")
+        self.timeout.setSpecialValueText("Default timeout")
+        self.timeout.setToolTip("Give up when no data has moved for this long, the connection settings decide when "
+                                "this is the default")
+        buttons_layout.addWidget(self.timeout)
+        self._layout.addWidget(buttons, 2, 1, 2, 2)
+
+        # SSE and NDJSON replies are always streamed, this streams any reply, e.g. a chunked long-poll
+        self.stream = QCheckBox("Stream response")
+        self._layout.addWidget(self.stream, 4, 0)
+
+        # variables
+        self._last_spec: RequestSpec | None = None
+        self._request: Request | None = None
 
     def _process_response(self, response: Response):
         """
-        Processes the response from the provided HTTP request
-        :param response:
-        :return:
+        Processes the response from the provided HTTP request, the home window opens it in a response tab
+        :param response: Response received
+        :return: None
+        """
+        self.response_received.emit(response)
+
+    def _process_error(self, error: RequestError):
         """
-        response_viewer = WindowResponseViewer(self, response)
-        response_viewer.exec()
+        Shows why a request failed, a cancelled request needs no explanation
+        :param error: Why the request failed
+        :return: None
+        """
+        if error.kind != ERROR_CANCELLED:
+            QMessageBox.warning(self, "Request Failed", str(error))
+
+    def _open_stream(self, stream: ResponseStream):
+        """
+        Called when a reply turned out to be a stream, shows its events as they arrive
+        :param stream: Stream that took over the reply
+        :return: None
+        """
+        from ui.stream_viewer import WindowStreamViewer
+
+        stream_viewer = WindowStreamViewer(self, stream)
+        stream_viewer.show()
+
+    def _prewarm(self):
+        """
+        Called when the base URL has been edited, opens a connection ahead of the first request if enabled
+        :return: None
+        """
+        if global_objects.connection_settings.prewarm:
+            lookup = make_lookup(global_objects.get_environments().active)
+            prewarm(global_objects.get_nam(), compile_value(str(self.base_url)).render(lookup))
+
+    def get_entry(self, entry: SessionEntry | None = None) -> SessionEntry:
+        """
+        Builds a session entry from the current state of the widget
+        :param entry: Optional, existing entry to update. Its name and saved responses are kept.
+        :return: SessionEntry
+        """
+        attributes = self._request_attributes
+        return SessionEntry(
+            name=entry.name if entry is not None else str(self.path),
+            method=self.method.currentText(),
+            base_url=str(self.base_url),
+            path=str(self.path),
+            headers=attributes.headers(),
+            query_params=attributes.query_parameters(),
+            body=attributes.body_text(),
+            body_encoding=attributes.body_encoding(),
+            body_type=attributes.body_type(),
+            body_fields=attributes.body_fields(),
+            expected_status=entry.expected_status if entry is not None else None,
+            responses=entry.responses if entry is not None else []
+        )
+
+    def set_entry(self, entry: SessionEntry):
+        """
+        Sets the state of the widget to a session entry
+        :param entry: Entry to show
+        :return: None
+        """
+        self.base_url.line_edit.setText(entry.base_url)
+        self.path.line_edit.setText(entry.path)
+        self.method.setCurrentText(entry.method)
+        self._request_attributes.headers_editor.set(entry.headers)
+        self._request_attributes.query_parameters_editor.set(entry.query_params)
+        self._request_attributes.request_body_editor.set(
+            entry.body, entry.body_encoding, entry.body_type, entry.body_fields
+        )
+
+    def build_spec(self) -> RequestSpec:
+        """
+        Builds a RequestSpec from the current state of the widget
+        :return: RequestSpec
+        """
+        return RequestSpec(
+            method=self.method.currentText(),
+            url=self.base_url + self.path,
+            query_params=self._request_attributes.query_parameters(),
+            headers=self._request_attributes.headers(),
+            body=self._request_attributes.body(),
+            body_encoding=self._request_attributes.body_encoding(),
+            body_type=self._request_attributes.body_type()
+        )
 
     def send_request(self):
         """
         Called when self.send_request_button is clicked, sends the built request
         :return:
         """
-        request = Request(self)
+        environment = global_objects.get_environments().active
+        spec = RequestTemplate(self.build_spec()).render(environment)
+        # resending an unchanged request reuses the Qt request built the last time
+        if spec == self._last_spec:
+            spec = self._last_spec
+        self._last_spec = spec
+        request = Request(self, stream_mode=STREAM_ALWAYS if self.stream.isChecked() else STREAM_AUTO,
+                          timeout_ms=self.timeout.value() * 1000 or None)
+        request.response.connect(lambda _: self._request_done(request, True))
+        request.error.connect(lambda _: self._request_done(request, True))
+        request.stream.connect(lambda _: self._request_done(request, False))
+        request.stream.connect(self._open_stream)
+        request.response.connect(lambda response: global_objects.get_history().record(spec, response))
+        if environment is not None:
+            request.response.connect(environment.capture)
         request.response.connect(self._process_response)
-        request.custom(
-            method=self.method.currentText(),
-            url=self.base_url + self.path,
-            query_params=self._request_attributes.query_parameters_editor.get(),
-            headers=self._request_attributes.headers_editor.get(),
-            body=self._request_attributes.request_body_editor.get()
-        )
\ No newline at end of file
+        request.error.connect(self._process_error)
+        self._request = request
+        self.cancel_request_button.setEnabled(True)
+        request.send(spec)
+
+    def cancel_request(self):
+        """
+        Called when self.cancel_request_button is clicked, aborts the request in flight
+        :return: None
+        """
+        if self._request is not None:
+            self._request.cancel()
+
+    def _request_done(self, request: Request, release: bool):
+        """
+        Called when a request has produced its response, error or stream
+        :param request: Request that is done
+        :param release: Delete the request once its signal has been handled, a stream is parented to its request so
+            the request is kept for as long as the stream
+        :return: None
+        """
+        if request is self._request:
+            self._request = None
+            self.cancel_request_button.setEnabled(False)
+        if release:
+            request.deleteLater()
\ No newline at end of file
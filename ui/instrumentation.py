@@ -0,0 +1,86 @@
+from PySide6.QtCore import QObject, QEvent, Qt
+from PySide6.QtWidgets import QLabel, QWidget
+
+import global_objects
+from backend.network import Response
+
+
+class InstrumentationOverlay(QLabel):
+    """
+    Per-stage timings of the last response, drawn over the top right corner of its parent. It follows the parent as it
+    is resized and lets clicks through to the widgets below it.
+    """
+    margin = 12
+
+    def __init__(self, parent: QWidget):
+        super().__init__(parent)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setTextFormat(Qt.TextFormat.PlainText)
+        self.setStyleSheet(
+            "background-color: rgba(25, 25, 25, 220); color: #ffffff; border: 1px solid #2a82da; padding: 6px;"
+        )
+        parent.installEventFilter(self)
+
+        # variables
+        self._response: Response | None = None
+
+        # exec
+        self._update()
+        self.hide()
+
+    def set_response(self, response: Response) -> None:
+        """
+        Shows the timings of a response, it becomes the last response
+        :param response: Response received
+        :return: None
+        """
+        self._response = response
+        self._update()
+
+    def refresh(self, response: Response) -> None:
+        """
+        Called when a response was rendered, the render stages of the last response are only known from then on
+        :param response: Response rendered
+        :return: None
+        """
+        if response is self._response:
+            self._update()
+
+    def setVisible(self, visible: bool) -> None:
+        if visible:
+            # the monospace font is loaded the first time the overlay is shown, not at startup
+            self.setFont(global_objects.get_mono_font())
+            self._update()
+        super().setVisible(visible)
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        if watched is self.parentWidget() and event.type() == QEvent.Type.Resize:
+            self._place()
+        return False
+
+    def _update(self):
+        response = self._response
+        if response is None:
+            self.setText("No response yet")
+        else:
+            lines = [f"{response.request_method} {response.status_code} {response.request_url}"[:60]]
+            for name, start, end in response.timings.stages():
+                lines.append(f"{name:<24}{end - start:>10.1f} ms")
+            total_ms = response.timings.total_ms
+            if total_ms is not None:
+                lines.append(f"{'Total':<24}{total_ms:>10.1f} ms")
+            lines.append(f"{'On the wire':<24}{response.wire_size:>10,} B")
+            lines.append(f"{'Decoded':<24}{response.body_size:>10,} B")
+            connection = "HTTP/2" if response.http2 else "HTTP/1.1"
+            connection += ", reused" if response.connection_reused else ", new connection"
+            if response.cache_status is not None:
+                connection += f", cache {response.cache_status}"
+            lines.append(connection)
+            self.setText("\n".join(lines))
+        self.adjustSize()
+        self._place()
+
+    def _place(self):
+        parent = self.parentWidget()
+        self.move(parent.width() - self.width() - self.margin, self.margin)
+        self.raise_()
@@ -0,0 +1,202 @@
+from itertools import islice
+from typing import Any
+
+import orjson
+from PySide6.QtCore import QAbstractItemModel, QModelIndex, QPersistentModelIndex, Qt
+
+
+class _JsonNode:
+    """A single key/value in the JSON document. Children are only built when the node is expanded."""
+    __slots__ = ("key", "value", "parent", "row", "children", "child_count", "_child_source")
+
+    def __init__(self, key: str, value: Any, parent: "_JsonNode | None", row: int):
+        self.key = key
+        self.value = value
+        self.parent = parent
+        self.row = row
+        self.children: list[_JsonNode] = []
+
+        # variables
+        if isinstance(value, dict):
+            self.child_count = len(value)
+            self._child_source = iter(value.items())
+        elif isinstance(value, list):
+            self.child_count = len(value)
+            self._child_source = None
+        else:
+            self.child_count = 0
+            self._child_source = None
+
+    @property
+    def unfetched(self) -> int:
+        return self.child_count - len(self.children)
+
+    def fetch(self, count: int) -> int:
+        """
+        Builds up to `count` more child nodes
+        :param count: Maximum amount of children to build
+        :return: Amount of children built
+        """
+        start = len(self.children)
+        if isinstance(self.value, dict):
+            pairs = islice(self._child_source, count)
+        else:
+            pairs = ((f"[{x}]", self.value[x]) for x in range(start, min(start + count, self.child_count)))
+        for row, (key, value) in enumerate(pairs, start):
+            self.children.append(_JsonNode(str(key), value, self, row))
+        return len(self.children) - start
+
+
+class JsonTreeModel(QAbstractItemModel):
+    """Read-only tree model over a parsed JSON document, children are created in batches as the view asks for them"""
+    headers = ["Key", "Type", "Value", "Children"]
+    fetch_batch_size = 500
+    max_value_length = 200
+
+    def __init__(self, document: Any = None):
+        super().__init__()
+        self._root = _root_node(document)
+        self._wrapped = not isinstance(document, (dict, list))
+
+    def set_document(self, document: Any) -> None:
+        """
+        Replaces the document shown by this model
+        :param document: Parsed JSON
+        :return: None
+        """
+        self.beginResetModel()
+        self._root = _root_node(document)
+        self._wrapped = not isinstance(document, (dict, list))
+        self.endResetModel()
+
+    def index_for_path(self, path: tuple[str | int, ...]) -> QModelIndex:
+        """
+        Get the index of a value in the document, fetching the rows on the way to it
+        :param path: Keys and indexes from the root, as found by backend.query
+        :return: QModelIndex, invalid if the path isn't in the document
+        """
+        if self._wrapped:
+            path = (0,) + tuple(path)
+        index = QModelIndex()
+        node = self._root
+        for part in path:
+            if isinstance(node.value, dict):
+                row = next((row for row, key in enumerate(node.value) if key == part), None)
+            else:
+                row = part if isinstance(part, int) and 0 <= part < node.child_count else None
+            if row is None:
+                return QModelIndex()
+            if row >= len(node.children):
+                start = len(node.children)
+                self.beginInsertRows(index, start, row)
+                node.fetch(row + 1 - start)
+                self.endInsertRows()
+            node = node.children[row]
+            index = self.createIndex(row, 0, node)
+        return index
+
+    def _node(self, index: QModelIndex | QPersistentModelIndex) -> _JsonNode:
+        return index.internalPointer() if index.isValid() else self._root
+
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        node = self._node(parent)
+        if row < 0 or row >= len(node.children) or column < 0 or column >= len(self.headers):
+            return QModelIndex()
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index: QModelIndex = QModelIndex()) -> QModelIndex:
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self._root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        return len(self._node(parent).children)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return len(self.headers)
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return self._node(parent).child_count > 0
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        return self._node(parent).unfetched > 0
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        node = self._node(parent)
+        count = min(node.unfetched, self.fetch_batch_size)
+        if count <= 0:
+            return
+        start = len(node.children)
+        self.beginInsertRows(parent, start, start + count - 1)
+        node.fetch(count)
+        self.endInsertRows()
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return None
+        node: _JsonNode = index.internalPointer()
+        column = index.column()
+        if column == 0:
+            return node.key
+        if column == 1:
+            return _type_name(node.value)
+        if column == 2:
+            return self._display_value(node.value)
+        if column == 3:
+            return node.child_count if isinstance(node.value, (dict, list)) else None
+        return None
+
+    def _display_value(self, value: Any) -> str:
+        """
+        Get a short, single line preview of a value
+        :param value: Any JSON value
+        :return: String
+        """
+        if isinstance(value, dict):
+            return "{…}"
+        if isinstance(value, list):
+            return "[…]"
+        text = orjson.dumps(value).decode()
+        if len(text) > self.max_value_length:
+            return text[:self.max_value_length] + "…"
+        return text
+
+
+def _root_node(document: Any) -> _JsonNode:
+    """
+    Builds the invisible root node, scalars are wrapped so they still show up as a row
+    :param document: Parsed JSON
+    :return: _JsonNode
+    """
+    if not isinstance(document, (dict, list)):
+        document = [document]
+    return _JsonNode("", document, None, 0)
+
+
+def _type_name(value: Any) -> str:
+    """
+    Get the JSON type name of a value
+    :param value: Any JSON value
+    :return: String
+    """
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list):
+        return "array"
+    return "object"
@@ -0,0 +1,231 @@
+from urllib.parse import parse_qsl
+
+from PySide6 import QtWidgets
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, QRegularExpression
+from PySide6.QtGui import QGuiApplication, QKeySequence
+from PySide6.QtWidgets import QWidget, QGridLayout, QPushButton, QLineEdit, QTableView, QAbstractItemView, QSizePolicy
+
+
+class KeyValueTableModel(QAbstractTableModel):
+    """
+    Ordered key/value pairs, a key may appear more than once. Replacing or extending the pairs resets or inserts them in
+    a single step so thousands of rows cost one view update rather than one per row.
+    """
+    headers = ["Key", "Value"]
+
+    def __init__(self, editable: bool = True):
+        super().__init__()
+        self.editable = editable
+        self._pairs: list[list[str]] = []
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._pairs)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return None
+        return self._pairs[index.row()][index.column()]
+
+    def setData(self, index: QModelIndex, value, role: int = Qt.ItemDataRole.EditRole) -> bool:
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        self._pairs[index.row()][index.column()] = str(value) if value is not None else ""
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        flags = super().flags(index)
+        if self.editable:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def set_pairs(self, pairs: list[tuple[str, str]]) -> None:
+        """
+        Replaces every row
+        :param pairs: Key/value pairs, in order
+        :return: None
+        """
+        self.beginResetModel()
+        self._pairs = [[str(key), str(value)] for key, value in pairs]
+        self.endResetModel()
+
+    def append_pairs(self, pairs: list[tuple[str, str]]) -> int:
+        """
+        Appends rows after the last one
+        :param pairs: Key/value pairs, in order
+        :return: Row of the first appended pair
+        """
+        first = len(self._pairs)
+        if pairs:
+            self.beginInsertRows(QModelIndex(), first, first + len(pairs) - 1)
+            self._pairs += [[str(key), str(value)] for key, value in pairs]
+            self.endInsertRows()
+        return first
+
+    def remove_rows(self, rows: list[int]) -> None:
+        """
+        Removes rows, in any order. Contiguous rows are removed together, last range first so the rows of the
+        remaining ranges don't move
+        :param rows: Rows of the source model
+        :return: None
+        """
+        ranges = []
+        for row in sorted(set(rows)):
+            if ranges and ranges[-1][1] == row - 1:
+                ranges[-1][1] = row
+            else:
+                ranges.append([row, row])
+        for first, last in reversed(ranges):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._pairs[first:last + 1]
+            self.endRemoveRows()
+
+    def pairs(self) -> list[tuple[str, str]]:
+        return [(key, value) for key, value in self._pairs]
+
+
+class KeyValueEditor(QWidget):
+    """Editable table of key/value pairs, with a search box filtering keys and values and bulk paste"""
+    def __init__(self, editable: bool = True):
+        super().__init__()
+        self._layout = QGridLayout()
+        self.setLayout(self._layout)
+
+        # variables
+        self.model = KeyValueTableModel(editable)
+        self.proxy = QSortFilterProxyModel()
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setFilterKeyColumn(-1)
+        self.proxy.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+
+        column = 0
+        if editable:
+            self.add_button = QPushButton("Add")
+            self.add_button.setSizePolicy(QSizePolicy.Policy.Maximum, QSizePolicy.Policy.Maximum)
+            self.add_button.clicked.connect(self.add_new)
+            self._layout.addWidget(self.add_button, 0, 0)
+
+            self.remove_button = QPushButton("Remove")
+            self.remove_button.setSizePolicy(QSizePolicy.Policy.Maximum, QSizePolicy.Policy.Maximum)
+            self.remove_button.clicked.connect(self.remove)
+            self._layout.addWidget(self.remove_button, 0, 1)
+
+            self.paste_button = QPushButton("Paste")
+            self.paste_button.setToolTip("Add `key: value`, `key=value`, tab separated or query string pairs from "
+                                         "the clipboard")
+            self.paste_button.setSizePolicy(QSizePolicy.Policy.Maximum, QSizePolicy.Policy.Maximum)
+            self.paste_button.clicked.connect(self.paste)
+            self._layout.addWidget(self.paste_button, 0, 2)
+            column = 3
+
+        self.search = QLineEdit()
+        self.search.setPlaceholderText("Search")
+        self.search.setClearButtonEnabled(True)
+        self.search.textChanged.connect(self._filter)
+        self._layout.addWidget(self.search, 0, column)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.verticalHeader().setVisible(False)
+        # rows keep the order they were added in until a column header is clicked
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.ResizeMode.Stretch)
+        self.table.horizontalHeader().setSectionResizeMode(1, QtWidgets.QHeaderView.ResizeMode.Stretch)
+        self._layout.addWidget(self.table, 1, 0, 1, column + 1)
+
+    def _filter(self, text: str):
+        self.proxy.setFilterRegularExpression(QRegularExpression(QRegularExpression.escape(text)))
+
+    def keyPressEvent(self, event):
+        if self.model.editable and event.matches(QKeySequence.StandardKey.Paste) and \
+                self.table.state() != QAbstractItemView.State.EditingState:
+            self.paste()
+            return
+        super().keyPressEvent(event)
+
+    def set(self, content: dict):
+        """
+        Replaces the content of the table, a list value is shown as one row per item
+        :param content: Dictionary
+        :return: None
+        """
+        pairs = []
+        for key, value in content.items():
+            pairs += [(key, x) for x in value] if isinstance(value, list) else [(key, value)]
+        self.model.set_pairs(pairs)
+
+    def add(self, key: str, value: str):
+        self.model.append_pairs([(key, value)])
+
+    def add_new(self):
+        row = self.model.append_pairs([("", "")])
+        # a new row must be visible to be edited
+        self.search.clear()
+        index = self.proxy.mapFromSource(self.model.index(row, 0))
+        self.table.scrollTo(index)
+        self.table.edit(index)
+
+    def remove(self):
+        rows = [self.proxy.mapToSource(x).row() for x in self.table.selectionModel().selectedRows()]
+        self.model.remove_rows(rows)
+
+    def paste(self):
+        """
+        Adds every pair found in the clipboard
+        :return: None
+        """
+        self.model.append_pairs(parse_pairs(QGuiApplication.clipboard().text()))
+
+    def get(self) -> dict:
+        """
+        Get this table as a dictionary, rows without a key are skipped and a repeated key maps to a list of its values
+        :return: Dictionary
+        """
+        content = {}
+        for key, value in self.model.pairs():
+            if not key:
+                continue
+            if key not in content:
+                content[key] = value
+            elif isinstance(content[key], list):
+                content[key].append(value)
+            else:
+                content[key] = [content[key], value]
+        return content
+
+
+def parse_pairs(text: str) -> list[tuple[str, str]]:
+    """
+    Parses pasted key/value pairs, one per line as `key: value`, `key=value` or `key<tab>value`, or a single query
+    string such as `a=1&b=2`
+    :param text: Pasted text
+    :return: List of key/value pairs
+    """
+    text = text.strip()
+    if "\n" not in text and "&" in text and ": " not in text:
+        return parse_qsl(text.lstrip("?"), keep_blank_values=True)
+
+    pairs = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        for separator in ("\t", ": ", "=", ":"):
+            if separator in line:
+                key, value = line.split(separator, 1)
+                pairs.append((key.strip(), value.strip()))
+                break
+        else:
+            pairs.append((line, ""))
+    return pairs
@@ -0,0 +1,167 @@
+import os.path
+from dataclasses import replace
+from urllib.parse import urlsplit
+
+from PySide6.QtCore import QObject
+from PySide6.QtWidgets import QDialog, QGridLayout, QPushButton, QSpinBox, QLabel, QDoubleSpinBox, QCheckBox, \
+    QFileDialog, QFormLayout, QGroupBox
+
+import global_objects
+from backend.load_test import LoadTest, LoadTestSettings, LoadTestSummary
+from backend.network import RequestSpec
+from backend.stand_in_server import StandInServer
+
+
+class WindowLoadTest(QDialog):
+    """Runs the assembled request as a load test, showing live latency and throughput statistics"""
+    def __init__(self, parent: QObject, spec: RequestSpec):
+        # setup window
+        super().__init__(parent)
+        self._layout = QGridLayout()
+        self.setLayout(self._layout)
+        self.setMinimumSize(600, 500)
+        self.setWindowTitle(f"Load Test - {spec.method} - {spec.url}")
+
+        # settings
+        settings_box = QGroupBox("Settings")
+        settings_layout = QFormLayout()
+        settings_box.setLayout(settings_layout)
+        self._layout.addWidget(settings_box, 0, 0, 1, 4)
+
+        self.total_requests = QSpinBox()
+        self.total_requests.setRange(0, 10_000_000)
+        self.total_requests.setValue(1000)
+        self.total_requests.setSpecialValueText("Unlimited")
+        settings_layout.addRow("Total requests", self.total_requests)
+
+        self.duration = QDoubleSpinBox()
+        self.duration.setRange(0, 86_400)
+        self.duration.setSuffix(" s")
+        self.duration.setSpecialValueText("Unlimited")
+        settings_layout.addRow("Duration", self.duration)
+
+        self.concurrency = QSpinBox()
+        self.concurrency.setRange(1, 1024)
+        self.concurrency.setValue(16)
+        settings_layout.addRow("Concurrency", self.concurrency)
+
+        self.target_rps = QDoubleSpinBox()
+        self.target_rps.setRange(0, 1_000_000)
+        self.target_rps.setSpecialValueText("Unlimited")
+        settings_layout.addRow("Target RPS", self.target_rps)
+
+        self.stand_in = QCheckBox("Send to a local stand-in server instead")
+        settings_layout.addRow(self.stand_in)
+
+        # controls
+        self.start_button = QPushButton("Start")
+        self.start_button.clicked.connect(self.start)
+        self._layout.addWidget(self.start_button, 1, 0)
+
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop)
+        self._layout.addWidget(self.stop_button, 1, 1)
+
+        self.export_csv_button = QPushButton("Export CSV")
+        self.export_csv_button.setEnabled(False)
+        self.export_csv_button.clicked.connect(lambda: self._export("csv"))
+        self._layout.addWidget(self.export_csv_button, 1, 2)
+
+        self.export_json_button = QPushButton("Export JSON")
+        self.export_json_button.setEnabled(False)
+        self.export_json_button.clicked.connect(lambda: self._export("json"))
+        self._layout.addWidget(self.export_json_button, 1, 3)
+
+        # statistics
+        self.statistics = QLabel("Not started")
+        self._layout.addWidget(self.statistics, 2, 0, 1, 4)
+
+        # variables
+        self._spec = spec
+        self._load_test: LoadTest | None = None
+        self._stand_in_server: StandInServer | None = None
+
+    def start(self):
+        """
+        Called when self.start_button is clicked, starts the load test with the current settings
+        :return: None
+        """
+        settings = LoadTestSettings(
+            total_requests=self.total_requests.value() or None,
+            duration_seconds=self.duration.value() or None,
+            concurrency=self.concurrency.value(),
+            target_rps=self.target_rps.value() or None
+        )
+        if settings.total_requests is None and settings.duration_seconds is None:
+            self.statistics.setText("Set a total request count or a duration")
+            return
+
+        spec = self._spec
+        if self.stand_in.isChecked():
+            if self._stand_in_server is None:
+                self._stand_in_server = StandInServer().start()
+            stand_in_url = urlsplit(self._stand_in_server.url)
+            url = urlsplit(spec.url)._replace(scheme=stand_in_url.scheme, netloc=stand_in_url.netloc).geturl()
+            spec = replace(spec, url=url)
+
+        self._load_test = LoadTest(self, spec, settings, global_objects.get_environments().active)
+        self._load_test.progress.connect(self._show_summary)
+        self._load_test.finished.connect(self._finished)
+        self.start_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.export_csv_button.setEnabled(False)
+        self.export_json_button.setEnabled(False)
+        self._load_test.start()
+
+    def stop(self):
+        """
+        Called when self.stop_button is clicked, stops sending and waits for requests in flight
+        :return: None
+        """
+        if self._load_test is not None:
+            self._load_test.stop()
+
+    def done(self, result: int):
+        self.stop()
+        if self._stand_in_server is not None:
+            self._stand_in_server.stop()
+            self._stand_in_server = None
+        super().done(result)
+
+    def _finished(self, summary: LoadTestSummary):
+        self._show_summary(summary)
+        self.start_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
+        self.export_csv_button.setEnabled(True)
+        self.export_json_button.setEnabled(True)
+
+    def _show_summary(self, summary: LoadTestSummary):
+        """
+        Shows the statistics of the running (or finished) load test
+        :param summary: Current statistics
+        :return: None
+        """
+        statuses = ", ".join(f"{status}: {count}" for status, count in summary.statuses.items())
+        self.statistics.setText(
+            f"Completed: {summary.completed} in {summary.elapsed_seconds:.1f} s\n"
+            f"Throughput: {summary.requests_per_second:.1f} req/s, {summary.bytes_per_second / 1024:.1f} KiB/s\n"
+            f"Latency: p50 {summary.p50_ms:.1f} ms, p90 {summary.p90_ms:.1f} ms, "
+            f"p99 {summary.p99_ms:.1f} ms, max {summary.max_ms:.1f} ms\n"
+            f"Errors: {summary.errors}\n"
+            f"Statuses: {statuses}"
+        )
+
+    def _export(self, kind: str):
+        """
+        Exports the results of the last load test
+        :param kind: "csv" or "json"
+        :return: None
+        """
+        path, _ = QFileDialog.getSaveFileName(self, "Export Results", os.path.expanduser(f"~/load_test.{kind}"))
+        if not path or self._load_test is None:
+            return
+        if kind == "csv":
+            self._load_test.results.export_csv(path)
+        else:
+            self._load_test.results.export_json(path)
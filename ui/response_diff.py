@@ -0,0 +1,207 @@
+from typing import Any
+
+import orjson
+from PySide6 import QtWidgets
+from PySide6.QtCore import QObject, Qt, QAbstractItemModel, QModelIndex, QPersistentModelIndex, QThreadPool
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import QDialog, QGridLayout, QLabel, QLineEdit, QPushButton, QTreeView
+
+import global_objects
+from backend.json_diff import DiffNode, DiffTask, ResponseDiff, ADDED, REMOVED, CHANGED, MAX_CHANGES
+from backend.network import Response
+
+
+class _DiffItem:
+    """Wraps a DiffNode with what the view needs to find its way back up the tree"""
+    __slots__ = ("node", "parent", "row", "_children")
+
+    def __init__(self, node: DiffNode, parent: "_DiffItem | None", row: int):
+        self.node = node
+        self.parent = parent
+        self.row = row
+        self._children: list[_DiffItem] | None = None
+
+    @property
+    def children(self) -> list["_DiffItem"]:
+        # built the first time the row is expanded
+        if self._children is None:
+            self._children = [_DiffItem(x, self, row) for row, x in enumerate(self.node.children)]
+        return self._children
+
+
+class DiffTreeModel(QAbstractItemModel):
+    """Read-only tree of the changes between two responses, only the changed branches are in it"""
+    headers = ["Key", "Change", "Before", "After"]
+    max_value_length = 200
+    colors = {
+        ADDED: "#6a8759",
+        REMOVED: "#cc4b4b",
+        CHANGED: "#cc7832",
+    }
+
+    def __init__(self):
+        super().__init__()
+        self._root = _DiffItem(DiffNode("", ""), None, 0)
+
+    def set_diff(self, diff: ResponseDiff | None) -> None:
+        """
+        Replaces the diff shown by this model
+        :param diff: ResponseDiff, None to show nothing
+        :return: None
+        """
+        self.beginResetModel()
+        self._root = _DiffItem(diff.root if diff is not None else DiffNode("", ""), None, 0)
+        self.endResetModel()
+
+    def _item(self, index: QModelIndex | QPersistentModelIndex) -> _DiffItem:
+        return index.internalPointer() if index.isValid() else self._root
+
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        item = self._item(parent)
+        if row < 0 or row >= len(item.node.children) or column < 0 or column >= len(self.headers):
+            return QModelIndex()
+        return self.createIndex(row, column, item.children[row])
+
+    def parent(self, index: QModelIndex = QModelIndex()) -> QModelIndex:
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self._root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        return len(self._item(parent).node.children)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return len(self.headers)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer().node
+        if role == Qt.ItemDataRole.ForegroundRole:
+            color = self.colors.get(node.kind)
+            return QColor(color) if color is not None else None
+        if role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return None
+        column = index.column()
+        if column == 0:
+            return node.key
+        if column == 1:
+            return node.kind if node.kind in self.colors else f"{node.changes:,} changes"
+        if column == 2:
+            return self._display_value(node.before) if node.kind in (REMOVED, CHANGED) else None
+        if column == 3:
+            return self._display_value(node.after) if node.kind in (ADDED, CHANGED) else None
+        return None
+
+    def _display_value(self, value: Any) -> str:
+        """
+        Get a short, single line preview of a value
+        :param value: Any JSON value
+        :return: String
+        """
+        try:
+            text = orjson.dumps(value).decode()
+        except orjson.JSONEncodeError:
+            text = str(value)
+        if len(text) > self.max_value_length:
+            return text[:self.max_value_length] + "…"
+        return text
+
+
+class WindowResponseDiff(QDialog):
+    """Structural diff of the status, headers and body of two responses, computed on a worker"""
+    def __init__(self, parent: QObject, before: Response, after: Response):
+        # setup window
+        super().__init__(parent)
+        self._layout = QGridLayout()
+        self.setLayout(self._layout)
+        self.setMinimumSize(1000, 700)
+        self.setWindowTitle(f"Compare - {before.request_url} - {after.request_url}")
+        self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+
+        # widgets
+        self.before = QLabel(f"Before: {before.request_method} {before.request_url} - {before.status_code}")
+        self._layout.addWidget(self.before, 0, 0, 1, 3)
+        self.after = QLabel(f"After: {after.request_method} {after.request_url} - {after.status_code}")
+        self._layout.addWidget(self.after, 1, 0, 1, 3)
+
+        self.array_key = QLineEdit()
+        self.array_key.setPlaceholderText("Match array items by index, or by a field such as id")
+        self.array_key.returnPressed.connect(self.compare)
+        self._layout.addWidget(self.array_key, 2, 0)
+
+        self.expand_button = QPushButton("Expand All")
+        self._layout.addWidget(self.expand_button, 2, 1)
+
+        self.compare_button = QPushButton("Compare")
+        self.compare_button.clicked.connect(self.compare)
+        self._layout.addWidget(self.compare_button, 2, 2)
+
+        self.model = DiffTreeModel()
+        self.tree = QTreeView()
+        self.tree.setModel(self.model)
+        self.tree.setUniformRowHeights(True)
+        self.tree.setFont(global_objects.get_mono_font())
+        self.tree.header().setSectionResizeMode(0, QtWidgets.QHeaderView.ResizeMode.Interactive)
+        self.expand_button.clicked.connect(self.tree.expandAll)
+        self._layout.addWidget(self.tree, 3, 0, 1, 3)
+        self._layout.setColumnStretch(0, 1)
+
+        self.summary = QLabel()
+        self._layout.addWidget(self.summary, 4, 0, 1, 3)
+
+        # variables
+        self._before = before
+        self._after = after
+        self._task: DiffTask | None = None
+        self._generation = 0
+
+        # exec
+        self.compare()
+
+    def compare(self):
+        """
+        Diffs the responses on a worker, cancelling a diff still running
+        :return: None
+        """
+        if self._task is not None:
+            self._task.cancel()
+        self._generation += 1
+        self._task = DiffTask(self._generation, self._before, self._after, self.array_key.text().strip() or None)
+        self._task.signals.finished.connect(self._compared)
+        self.model.set_diff(None)
+        self.summary.setText("Comparing…")
+        QThreadPool.globalInstance().start(self._task)
+
+    def _compared(self, generation: int, diff: ResponseDiff):
+        # a diff that was replaced may still finish before noticing it was cancelled
+        if generation != self._generation:
+            return
+        self._task = None
+        self.model.set_diff(diff)
+        # status and headers are small, open them straight away
+        for row in range(self.model.rowCount()):
+            index = self.model.index(row, 0)
+            if index.data() != "body":
+                self.tree.expand(index)
+        if diff.changes == 0:
+            self.summary.setText("The responses are identical")
+        elif diff.truncated:
+            self.summary.setText(f"Stopped after {MAX_CHANGES:,} changes")
+        else:
+            self.summary.setText(f"{diff.changes:,} changes")
+
+    def done(self, result: int):
+        if self._task is not None:
+            self._task.cancel()
+        super().done(result)
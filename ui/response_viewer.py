@@ -1,62 +1,324 @@
+import time
+
 import orjson
 from PySide6 import QtWidgets
-from PySide6.QtCore import QObject
-from PySide6.QtGui import QSyntaxHighlighter
-from PySide6.QtWidgets import QDialog, QGridLayout, QTableWidget, QAbstractItemView, QTableWidgetItem, QTextEdit
+from PySide6.QtCore import QObject, Qt, QRectF, QTimer, QThreadPool
+from PySide6.QtGui import QPainter, QColor, QPixmap
+from PySide6.QtWidgets import QDialog, QGridLayout, QTextEdit, QWidget, QPushButton, QLabel, QTabWidget, QTreeView, \
+    QLineEdit, QCheckBox, QHBoxLayout, QMenu, QPlainTextEdit, QScrollArea
 
 import global_objects
-from backend.network import Response
+from backend.content import VIEW_JSON, VIEW_TEXT, VIEW_IMAGE, body_view, decode_text, detect_charset, hex_dump, \
+    media_type
+from backend.network import Response, ResponseTimings
+from backend.query import QueryCache, QueryTask, MAX_MATCHES, format_path
+from backend.syntax import JsonSyntaxHighlighter
+from ui.json_model import JsonTreeModel
+from ui.key_value_editor import KeyValueEditor
 
 
-class _ResponseBodyWidget(QTextEdit):
+class _ResponseRawWidget(QTextEdit):
     def __init__(self):
         super().__init__()
         self.setReadOnly(True)
-        self.setFont(global_objects.mono_font)
+        self.setFont(global_objects.get_mono_font())
+        self._highlighter = JsonSyntaxHighlighter(self.document())
         self._json: str | None = None
 
     def set_json(self, json_: str):
         self._json = orjson.dumps(json_, option=orjson.OPT_INDENT_2).decode()
-        self._highlight_syntax()
+        self.setPlainText(self._json)
+
+
+class _ResponseBodyWidget(QWidget):
+    """
+    Shows the response body as a lazily populated tree, the raw text is only rendered when its tab is opened. A query
+    bar above it runs JSONPath or jq-style queries on a worker, a new expression cancels the query still running.
+    """
+    query_delay_ms = 250
+
+    def __init__(self):
+        super().__init__()
+        self._layout = QGridLayout()
+        self._layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(self._layout)
+
+        self.query = QLineEdit()
+        self.query.setPlaceholderText("Query, such as $..id, $.items[?(@.price > 10)].name or .items[].id")
+        self.query.setFont(global_objects.get_mono_font())
+        self._layout.addWidget(self.query, 0, 0)
+
+        self.matches_only = QCheckBox("Matches only")
+        self.matches_only.toggled.connect(self._show_matches)
+        self._layout.addWidget(self.matches_only, 0, 1)
+
+        self.previous_match_button = QPushButton("Previous")
+        self.previous_match_button.clicked.connect(lambda: self._go_to_match(self._match - 1))
+        self._layout.addWidget(self.previous_match_button, 0, 2)
+
+        self.next_match_button = QPushButton("Next")
+        self.next_match_button.clicked.connect(lambda: self._go_to_match(self._match + 1))
+        self._layout.addWidget(self.next_match_button, 0, 3)
+
+        self.query_status = QLabel()
+        self._layout.addWidget(self.query_status, 1, 0, 1, 4)
+
+        self.tabs = QTabWidget()
+        self.tree_model = JsonTreeModel()
+        self.tree = QTreeView()
+        self.tree.setModel(self.tree_model)
+        self.tree.setUniformRowHeights(True)
+        self.tree.setFont(global_objects.get_mono_font())
+        self.tree.header().setSectionResizeMode(0, QtWidgets.QHeaderView.ResizeMode.Interactive)
+        self.tabs.addTab(self.tree, "Tree")
 
-    def _highlight_syntax(self):
+        self.raw = _ResponseRawWidget()
+        self.tabs.addTab(self.raw, "Raw")
+        self.tabs.currentChanged.connect(self._render_raw)
+        self._layout.addWidget(self.tabs, 2, 0, 1, 4)
+        self._layout.setColumnStretch(0, 1)
+
+        # variables
+        self._document = None
+        self._raw_rendered = False
+        self._query_cache: QueryCache | None = None
+        self._query_task: QueryTask | None = None
+        self._generation = 0
+        self._matches: list[tuple[tuple, object]] = []
+        self._match = -1
+        self._filtered = False
+        self._query_timer = QTimer(self)
+        self._query_timer.setSingleShot(True)
+        self._query_timer.setInterval(self.query_delay_ms)
+        self._query_timer.timeout.connect(self.run_query)
+        self.query.textChanged.connect(self._query_timer.start)
+        self._update_match_buttons()
+
+    def set_json(self, json_: dict | list | str | None):
+        """
+        Sets the document shown by the tree, the raw view is invalidated until it is opened again
+        :param json_: Parsed JSON
+        :return: None
+        """
+        self._document = json_
+        self._raw_rendered = False
+        self._query_cache = QueryCache(json_)
+        self._filtered = False
+        self.tree_model.set_document(json_)
+        self._render_raw(self.tabs.currentIndex())
+        if self.query.text().strip():
+            self.run_query()
+
+    def run_query(self):
         """
-        Iterates over the lines in the JSON, applying HTML syntax highlighting
-        todo needs work
+        Called when the query stops changing, cancels the query still running and starts the new one on a worker
         :return: None
         """
-        self.setText(self._json)
-        '''split_json = self._json.split("\n")
-        for elem, line in enumerate(split_json):
-            if "{" in line:
-                split_json[elem] = '<p style="color:#adadad">{</p>'
+        self._query_timer.stop()
+        if self._query_task is not None:
+            self._query_task.cancel()
+            self._query_task = None
+        self._generation += 1
+        expression = self.query.text().strip()
+        if not expression or self._query_cache is None:
+            self._matches = []
+            self.query_status.clear()
+            self._show_matches()
+            return
+        self._query_task = QueryTask(self._generation, self._query_cache, expression)
+        self._query_task.signals.finished.connect(self._query_finished)
+        self._query_task.signals.failed.connect(self._query_failed)
+        self.query_status.setText("Searching…")
+        QThreadPool.globalInstance().start(self._query_task)
 
-        # convert the split list back into a string
-        new_json = ""
-        for x in split_json:
-            new_json += f"{x}\n"
-        self.setText(new_json)'''
+    def _query_finished(self, generation: int, matches: list):
+        # a query that was replaced may still finish before noticing it was cancelled
+        if generation != self._generation:
+            return
+        self._query_task = None
+        self._matches = matches
+        status = f"{len(matches):,} matches"
+        if len(matches) >= MAX_MATCHES:
+            status += f", only the first {MAX_MATCHES:,} are shown"
+        self.query_status.setText(status)
+        self._show_matches()
 
+    def _query_failed(self, generation: int, message: str):
+        if generation != self._generation:
+            return
+        self._query_task = None
+        self._matches = []
+        self.query_status.setText(message)
+        self._show_matches()
+
+    def _show_matches(self):
+        """
+        Shows the matches of the last query, either as a document of their own or by selecting them in the full one
+        :return: None
+        """
+        self._match = -1
+        if self.matches_only.isChecked() and self.query.text().strip():
+            self.tree_model.set_document({format_path(path): value for path, value in self._matches})
+            self._filtered = True
+        else:
+            if self._filtered:
+                self.tree_model.set_document(self._document)
+                self._filtered = False
+            if self._matches:
+                self._go_to_match(0)
+        self._update_match_buttons()
+
+    def _go_to_match(self, match: int):
+        """
+        Selects a match in the tree, expanding the rows above it
+        :param match: Index into the matches, wraps around
+        :return: None
+        """
+        if not self._matches or self._filtered:
+            return
+        self._match = match % len(self._matches)
+        index = self.tree_model.index_for_path(self._matches[self._match][0])
+        if index.isValid():
+            parent = index.parent()
+            while parent.isValid():
+                self.tree.expand(parent)
+                parent = parent.parent()
+            self.tree.setCurrentIndex(index)
+            self.tree.scrollTo(index)
+        self.query_status.setText(f"Match {self._match + 1:,} of {len(self._matches):,}")
+        self._update_match_buttons()
+
+    def _update_match_buttons(self):
+        enabled = len(self._matches) > 1 and not self._filtered
+        self.previous_match_button.setEnabled(enabled)
+        self.next_match_button.setEnabled(enabled)
+
+    def _render_raw(self, index: int):
+        """
+        Called when the current tab changes, renders the raw text the first time its tab is shown
+        :param index: Index of the current tab
+        :return: None
+        """
+        if self.tabs.widget(index) is not self.raw or self._raw_rendered:
+            return
+        self.raw.set_json(self._document)
+        self._raw_rendered = True
+
+
+class _ResponsePagedWidget(QWidget):
+    """
+    Pages through a raw body, as text or as a hex dump, only decoding one page at a time. The body is a view of the
+    response buffer or of the memory-mapped file it was downloaded to, it is never copied as a whole.
+    """
+    page_size = 256 * 1024
+    hex_page_size = 16 * 1024
 
-class _ResponseHeadersWidget(QTableWidget):
     def __init__(self):
         super().__init__()
-        # do some pre-requisites
-        self.verticalHeader().setVisible(False)
-        self.setSortingEnabled(True)
-        self.setEditTriggers(self.EditTrigger.NoEditTriggers)
-        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self._layout = QGridLayout()
+        self.setLayout(self._layout)
+
+        self.previous_button = QPushButton("Previous")
+        self.previous_button.clicked.connect(self.previous_page)
+        self._layout.addWidget(self.previous_button, 0, 0)
+
+        self.page_label = QLabel()
+        self._layout.addWidget(self.page_label, 0, 1)
+
+        self.hex = QCheckBox("Hex")
+        self.hex.toggled.connect(lambda: self._show_page(0))
+        self._layout.addWidget(self.hex, 0, 2)
+
+        self.next_button = QPushButton("Next")
+        self.next_button.clicked.connect(self.next_page)
+        self._layout.addWidget(self.next_button, 0, 3)
+
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setFont(global_objects.get_mono_font())
+        self._layout.addWidget(self.text, 1, 0, 1, 4)
+        self._layout.setColumnStretch(1, 1)
 
         # variables
-        headers = ["Key", "Value"]
+        self._body = memoryview(b"")
+        self._label = ""
+        self._charset = "utf-8"
+        self._page = 0
+
+    @property
+    def _page_size(self) -> int:
+        return self.hex_page_size if self.hex.isChecked() else self.page_size
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-len(self._body) // self._page_size))
+
+    def set_body(self, body: memoryview, label: str, charset: str | None = None):
+        """
+        Sets the body to page through
+        :param body: Raw body
+        :param label: Shown before the page number, such as the path of a downloaded file
+        :param charset: Codec to decode pages with, None shows a hex dump
+        :return: None
+        """
+        self._body = body
+        self._label = label
+        self._charset = charset or "utf-8"
+        self.hex.blockSignals(True)
+        self.hex.setChecked(charset is None)
+        self.hex.blockSignals(False)
+        self._show_page(0)
+
+    def previous_page(self):
+        self._show_page(self._page - 1)
+
+    def next_page(self):
+        self._show_page(self._page + 1)
+
+    def _show_page(self, page: int):
+        """
+        Decodes a single page of the body into the text box
+        :param page: Zero-based page number
+        :return: None
+        """
+        self._page = max(0, min(page, self.page_count - 1))
+        start = self._page * self._page_size
+        chunk = self._body[start:start + self._page_size]
+        if self.hex.isChecked():
+            self.text.setPlainText(hex_dump(chunk, start))
+        else:
+            self.text.setPlainText(decode_text(chunk, self._charset))
+        label = f"{self._label} - " if self._label else ""
+        self.page_label.setText(f"{label}page {self._page + 1} of {self.page_count}")
+        self.previous_button.setEnabled(self._page > 0)
+        self.next_button.setEnabled(self._page < self.page_count - 1)
 
-        # set headers
-        self.setColumnCount(len(headers))
-        self.setHorizontalHeaderLabels(headers)
 
-        # realign headers
-        self.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.ResizeMode.Stretch)
-        self.horizontalHeader().setSectionResizeMode(1, QtWidgets.QHeaderView.ResizeMode.Stretch)
+class _ResponseImageWidget(QScrollArea):
+    """Previews an image body, decoded by Qt from the raw bytes"""
+    def __init__(self):
+        super().__init__()
+        self.image = QLabel()
+        self.image.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.setWidget(self.image)
+        self.setWidgetResizable(True)
+
+    def set_image(self, body: memoryview) -> bool:
+        """
+        Decodes and shows an image
+        :param body: Raw body
+        :return: False if Qt can't decode it
+        """
+        pixmap = QPixmap()
+        if not pixmap.loadFromData(body.tobytes()):
+            return False
+        self.image.setPixmap(pixmap)
+        return True
+
+
+class _ResponseHeadersWidget(KeyValueEditor):
+    def __init__(self):
+        super().__init__(editable=False)
 
     def set_headers(self, headers: dict):
         """
@@ -64,28 +326,106 @@ class _ResponseHeadersWidget(QTableWidget):
         :param headers: Header dictionary
         :return: None
         """
-        self.setRowCount(0)
-        for header in headers.keys():
-            row = self.rowCount()
-            self.insertRow(row)
-            self.setItem(row, 0, QTableWidgetItem(header))
-            self.setItem(row, 1, QTableWidgetItem(headers[header]))
+        self.set(headers)
 
 
-class WindowResponseViewer(QDialog):
-    def __init__(self, parent: QObject, response: Response):
-        # setup window
-        super().__init__(parent)
+class _TimingWaterfallWidget(QWidget):
+    """Draws the stages of a request as a waterfall, one row per stage"""
+    row_height = 18
+    label_width = 170
+    colors = {
+        "Prepare": "#6b6b6b",
+        "Queued": "#6b6b6b",
+        "Connect (DNS, TCP)": "#cc7832",
+        "Connect (DNS, TCP, TLS)": "#cc7832",
+        "Send": "#9876aa",
+        "Waiting (TTFB)": "#2a82da",
+        "Download": "#6a8759",
+        "Parse": "#bbb529",
+        "Render": "#6897bb",
+        "Render headers": "#6897bb",
+        "Render body": "#6897bb",
+    }
+
+    def __init__(self):
+        super().__init__()
+        self._stages: list[tuple[str, float, float]] = []
+        self._total_ms = 0.0
+
+    def set_timings(self, timings: ResponseTimings):
+        """
+        Sets the timings to draw
+        :param timings: Timings of the response
+        :return: None
+        """
+        self._stages = timings.stages()
+        self._total_ms = max((end for _, _, end in self._stages), default=0.0)
+        self.setFixedHeight(self.row_height * (len(self._stages) + 1))
+        self.update()
+
+    def paintEvent(self, event) -> None:
+        painter = QPainter(self)
+        painter.setPen(self.palette().windowText().color())
+        bar_width = max(1, self.width() - self.label_width - 80)
+        scale = bar_width / self._total_ms if self._total_ms else 0
+
+        for row, (name, start, end) in enumerate(self._stages):
+            top = row * self.row_height
+            painter.drawText(QRectF(0, top, self.label_width, self.row_height), Qt.AlignmentFlag.AlignVCenter, name)
+            bar = QRectF(self.label_width + start * scale, top + 3, max(1.0, (end - start) * scale), self.row_height - 6)
+            painter.fillRect(bar, QColor(self.colors.get(name, "#adadad")))
+            painter.drawText(
+                QRectF(bar.right() + 4, top, 80, self.row_height), Qt.AlignmentFlag.AlignVCenter, f"{end - start:.1f} ms"
+            )
+
+        top = len(self._stages) * self.row_height
+        painter.drawText(
+            QRectF(0, top, self.label_width + bar_width, self.row_height), Qt.AlignmentFlag.AlignVCenter,
+            f"Total: {self._total_ms:.1f} ms"
+        )
+
+
+class ResponseView(QWidget):
+    """
+    Everything shown for a response: its summary, headers, body and timings. The view holds the text documents and
+    models built from the response, deleting it releases them while the Response itself stays as compact as it came.
+    """
+    def __init__(self, response: Response):
+        super().__init__()
         self._layout = QGridLayout()
+        self._layout.setContentsMargins(0, 0, 0, 0)
         self.setLayout(self._layout)
-        self.setMinimumSize(800, 700)
-        self.setWindowTitle(f"Response - {response.request_method} - {response.status_code} - {response.request_url}")
 
         # widgets
+        actions = QWidget()
+        actions_layout = QHBoxLayout(actions)
+        actions_layout.setContentsMargins(0, 0, 0, 0)
+        self._summary = QLabel()
+        actions_layout.addWidget(self._summary, 1)
+        self.pin_button = QPushButton("Pin")
+        self.pin_button.setToolTip("Compare other responses with this one")
+        self.pin_button.clicked.connect(self.pin)
+        actions_layout.addWidget(self.pin_button)
+        self.compare_menu = QMenu(self)
+        self.compare_pinned_action = self.compare_menu.addAction("Pinned Response", self.compare_with_pinned)
+        self.compare_menu.addAction("History…", self.compare_with_history)
+        self.compare_menu.aboutToShow.connect(self._update_compare_menu)
+        self.compare_button = QPushButton("Compare with…")
+        self.compare_button.setMenu(self.compare_menu)
+        actions_layout.addWidget(self.compare_button)
+        self._layout.addWidget(actions)
         self._response_headers = _ResponseHeadersWidget()
         self._layout.addWidget(self._response_headers)
-        self._response_body = _ResponseBodyWidget()
+        self._view = _view(response)
+        if self._view == VIEW_JSON:
+            self._response_body = _ResponseBodyWidget()
+        elif self._view == VIEW_IMAGE:
+            self._response_body = _ResponseImageWidget()
+        else:
+            self._response_body = _ResponsePagedWidget()
         self._layout.addWidget(self._response_body)
+        self._timing_waterfall = _TimingWaterfallWidget()
+        self._layout.addWidget(self._timing_waterfall)
 
         # variables
         self._response = response
@@ -93,11 +433,127 @@ class WindowResponseViewer(QDialog):
         # exec
         self._populate()
 
+    def pin(self):
+        """
+        Called when self.pin_button is clicked, makes this response the one others are compared with
+        :return: None
+        """
+        global_objects.pinned_response = self._response
+
+    def _update_compare_menu(self):
+        pinned = global_objects.pinned_response
+        self.compare_pinned_action.setEnabled(pinned is not None and pinned is not self._response)
+
+    def compare_with_pinned(self):
+        if global_objects.pinned_response is not None:
+            self._compare(global_objects.pinned_response)
+
+    def compare_with_history(self):
+        """
+        Called from self.compare_menu, compares this response with one picked from the history
+        :return: None
+        """
+        # deferred, ui.history imports this module
+        from ui.history import WindowHistory
+
+        history = WindowHistory(self.window(), pick=True)
+        if history.exec() and history.picked is not None:
+            self._compare(history.picked)
+
+    def _compare(self, before: Response):
+        # deferred, most responses are never compared
+        from ui.response_diff import WindowResponseDiff
+
+        # parented to the window, a view in a response tab is deleted when the tab is left
+        WindowResponseDiff(self.window(), before, self._response).show()
+
     def _populate(self) -> None:
         """
         Sets the UI state to reflect what is in self._response
         :return: None
         """
+        # only the first render counts, a tab renders its response again each time it is shown
+        timings = self._response.timings
+        first_render = timings.rendered is None
+        if first_render:
+            timings.render_started = time.perf_counter()
+        summary = (
+            f"Status {self._response.status_code} - {_format_size(self._response.wire_size)} on the wire, "
+            f"{_format_size(self._response.body_size)} decoded"
+        )
+        if self._response.content_type:
+            summary += f" - {media_type(self._response.content_type)}"
+        if self._response.body_error is not None:
+            summary += f" - not valid JSON: {self._response.body_error}"
+        self._summary.setText(summary)
         self._response_headers.set_headers(self._response.response_headers)
-        self._response_body.set_json(self._response.response_body)
+        if first_render:
+            timings.headers_rendered = time.perf_counter()
+        if self._view == VIEW_JSON:
+            self._response_body.set_json(self._response.response_body)
+        elif self._view == VIEW_IMAGE:
+            if not self._response_body.set_image(self._response.body_bytes()):
+                self._summary.setText(self._summary.text() + " - the image could not be decoded")
+        else:
+            body = self._response.body_bytes()
+            charset = None
+            if self._view == VIEW_TEXT:
+                charset = detect_charset(self._response.content_type, body)
+            self._response_body.set_body(body, self._response.body_path or "", charset)
+        if first_render:
+            timings.rendered = time.perf_counter()
+        self._timing_waterfall.set_timings(timings)
+
+
+class WindowResponseViewer(QDialog):
+    def __init__(self, parent: QObject, response: Response):
+        # setup window
+        super().__init__(parent)
+        self._layout = QGridLayout()
+        self.setLayout(self._layout)
+        self.setMinimumSize(800, 700)
+        self.setWindowTitle("Response - " + response_title(response))
+
+        # widgets
+        self.view = ResponseView(response)
+        self._layout.addWidget(self.view)
+
+
+def response_title(response: Response) -> str:
+    """
+    Get a one line description of a response
+    :param response: Response
+    :return: String such as `GET - 200 - https://api.mysite.com/items`
+    """
+    title = f"{response.request_method} - {response.status_code} - {response.request_url}"
+    if response.cache_status is not None:
+        title += f" - cache {response.cache_status}"
+    return title
+
+
+def _view(response: Response) -> str:
+    """
+    Decides how a response body is shown. Parsed JSON is shown as a tree, JSON that didn't parse as text, and
+    bodies downloaded to disk are paged through rather than parsed.
+    :param response: Response
+    :return: VIEW_JSON, VIEW_TEXT, VIEW_IMAGE or VIEW_BINARY
+    """
+    view = body_view(response.content_type, response.body_bytes())
+    if view == VIEW_JSON and (response.body_error is not None or response.body_path is not None):
+        return VIEW_TEXT
+    if view == VIEW_JSON and response.response_body is None and response.body_size:
+        return VIEW_TEXT
+    return view
+
 
+def _format_size(size: int) -> str:
+    """
+    Formats a byte count for humans
+    :param size: Bytes
+    :return: String such as `1.5 MiB`
+    """
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
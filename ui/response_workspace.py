@@ -0,0 +1,170 @@
+from urllib.parse import urlsplit
+
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6.QtWidgets import QDockWidget, QWidget, QGridLayout, QVBoxLayout, QTabWidget, QSpinBox, QPushButton, \
+    QLabel
+
+import global_objects
+from backend.network import Response
+
+DEFAULT_RETAINED_RESPONSES = 20
+
+
+class _ResponsePage(QWidget):
+    """The page of a response tab, it keeps the Response and only builds its view while the tab is shown"""
+    def __init__(self, response: Response):
+        super().__init__()
+        self._layout = QVBoxLayout(self)
+        self._layout.setContentsMargins(0, 0, 0, 0)
+
+        # variables
+        self.response = response
+        self.view: QWidget | None = None
+
+    def render(self) -> None:
+        """
+        Builds the view of the response, if it isn't built already
+        :return: None
+        """
+        # deferred, the response viewer isn't needed until the first response arrives
+        from ui.response_viewer import ResponseView
+
+        if self.view is None:
+            self.view = ResponseView(self.response)
+            self._layout.addWidget(self.view)
+
+    def release(self) -> None:
+        """
+        Deletes the view and the documents and models it built, only the Response is kept
+        :return: None
+        """
+        if self.view is not None:
+            self._layout.removeWidget(self.view)
+            self.view.deleteLater()
+            self.view = None
+
+
+class ResponseWorkspace(QDockWidget):
+    """
+    Docked tabs of the responses received, newest last. Only the tab being shown has its view built, the others
+    keep just their Response. Once there are more than `retained` tabs the oldest are closed.
+    """
+    # a response's view was built, its render timings are filled in the first time
+    response_rendered = Signal(Response)
+
+    def __init__(self, parent: QObject):
+        super().__init__("Responses", parent)
+        self.setObjectName("responses")
+
+        widget = QWidget()
+        self._layout = QGridLayout(widget)
+        self._layout.setContentsMargins(0, 0, 0, 0)
+        self.setWidget(widget)
+
+        # widgets
+        self.summary = QLabel()
+        self._layout.addWidget(self.summary, 0, 0)
+
+        self.retained = QSpinBox()
+        self.retained.setRange(1, 500)
+        self.retained.setValue(DEFAULT_RETAINED_RESPONSES)
+        self.retained.setPrefix("Keep ")
+        self.retained.setSuffix(" responses")
+        self.retained.valueChanged.connect(self._evict)
+        self._layout.addWidget(self.retained, 0, 1)
+
+        self.close_all_button = QPushButton("Close All")
+        self.close_all_button.clicked.connect(self.close_all)
+        self._layout.addWidget(self.close_all_button, 0, 2)
+
+        self.tabs = QTabWidget()
+        self.tabs.setTabsClosable(True)
+        self.tabs.setMovable(True)
+        self.tabs.setDocumentMode(True)
+        self.tabs.tabCloseRequested.connect(lambda index: self._remove(self.tabs.widget(index)))
+        self.tabs.currentChanged.connect(self._show_tab)
+        self._layout.addWidget(self.tabs, 1, 0, 1, 3)
+        self._layout.setColumnStretch(0, 1)
+
+        # variables
+        # oldest first, tabs can be moved so their order says nothing about their age
+        self._pages: list[_ResponsePage] = []
+        self._current: _ResponsePage | None = None
+        # the current tab is built once control returns to the event loop, a burst of responses or a quick walk
+        # through the tabs only builds the tab that ends up shown
+        self._render_timer = QTimer(self)
+        self._render_timer.setSingleShot(True)
+        self._render_timer.setInterval(0)
+        self._render_timer.timeout.connect(self._render_current)
+        self._update_summary()
+
+    def add_response(self, response: Response) -> None:
+        """
+        Opens a response in a new tab and shows it, closing the oldest tabs if there are too many
+        :param response: Response to show
+        :return: None
+        """
+        from ui.response_viewer import response_title
+
+        page = _ResponsePage(response)
+        self._pages.append(page)
+        index = self.tabs.addTab(page, _tab_title(response))
+        self.tabs.setTabToolTip(index, response_title(response))
+        self.tabs.setCurrentIndex(index)
+        self._evict()
+        self._update_summary()
+        self.show()
+
+    def close_all(self) -> None:
+        for page in list(self._pages):
+            self._remove(page)
+
+    def _show_tab(self, index: int):
+        """
+        Called when the current tab changes, releases the view of the tab that was left
+        :param index: Index of the new current tab, -1 if there are none left
+        :return: None
+        """
+        page = self.tabs.widget(index)
+        if self._current is not None and self._current is not page:
+            self._current.release()
+        self._current = page
+        self._render_timer.start()
+
+    def _render_current(self):
+        if self._current is not None and self._current.view is None:
+            self._current.render()
+            self.response_rendered.emit(self._current.response)
+
+    def _remove(self, page: _ResponsePage | None):
+        if page is None:
+            return
+        self._pages.remove(page)
+        if page is self._current:
+            self._current = None
+        page.release()
+        self.tabs.removeTab(self.tabs.indexOf(page))
+        page.deleteLater()
+        # the pinned response is still compared with after its tab is closed
+        if page.response is not global_objects.pinned_response:
+            page.response.release()
+        self._update_summary()
+
+    def _evict(self):
+        while len(self._pages) > self.retained.value():
+            self._remove(self._pages[0])
+
+    def _update_summary(self):
+        self.summary.setText(f"{len(self._pages)} responses")
+
+
+def _tab_title(response: Response) -> str:
+    """
+    Get a short tab title for a response
+    :param response: Response
+    :return: String such as `200 GET /items`
+    """
+    path = urlsplit(response.request_url).path or "/"
+    if len(path) > 32:
+        path = "…" + path[-31:]
+    return f"{response.status_code} {response.request_method} {path}"
@@ -0,0 +1,210 @@
+from datetime import datetime
+
+import orjson
+from PySide6 import QtWidgets
+from PySide6.QtCore import QObject, Qt, QAbstractTableModel, QModelIndex, QTimer
+from PySide6.QtWidgets import QDialog, QGridLayout, QLabel, QPushButton, QCheckBox, QSpinBox, QTableView, \
+    QAbstractItemView, QPlainTextEdit, QSplitter
+
+import global_objects
+from backend.streaming import ResponseStream, StreamEvent, RingBuffer, DEFAULT_RETAINED_EVENTS
+
+
+class StreamEventModel(QAbstractTableModel):
+    """
+    Events of a stream, newest last. Only the last `capacity` events are kept and events are added to the view in
+    batches, at most every `flush_ms`, however fast they arrive.
+    """
+    headers = ["Time", "Event", "ID", "Size", "Data"]
+    flush_ms = 100
+    preview_length = 300
+
+    def __init__(self, capacity: int = DEFAULT_RETAINED_EVENTS):
+        super().__init__()
+        self._events = RingBuffer(capacity)
+        self._pending: list[StreamEvent] = []
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(self.flush_ms)
+        self._flush_timer.timeout.connect(self.flush)
+
+    @property
+    def capacity(self) -> int:
+        return self._events.capacity
+
+    def set_capacity(self, capacity: int) -> None:
+        self.beginResetModel()
+        self._events.resize(capacity)
+        self.endResetModel()
+
+    def add(self, events: list[StreamEvent]) -> None:
+        self._pending += events
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self) -> None:
+        """
+        Adds the pending events to the view, dropping the oldest rows to make room
+        :return: None
+        """
+        pending, self._pending = self._pending[-self.capacity:], []
+        if not pending:
+            return
+        overflow = len(self._events) + len(pending) - self.capacity
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, min(overflow, len(self._events)) - 1)
+            self._events.drop(overflow)
+            self.endRemoveRows()
+        first = len(self._events)
+        self.beginInsertRows(QModelIndex(), first, first + len(pending) - 1)
+        self._events.extend(pending)
+        self.endInsertRows()
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._events.clear()
+        self._pending = []
+        self.endResetModel()
+
+    def event_at(self, row: int) -> StreamEvent:
+        return self._events[row]
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._events)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        event = self._events[index.row()]
+        column = index.column()
+        if column == 0:
+            return datetime.fromtimestamp(event.received).strftime("%H:%M:%S.%f")[:-3]
+        if column == 1:
+            return event.event
+        if column == 2:
+            return event.id
+        if column == 3:
+            return event.size
+        # a preview only, the full data is shown when the row is selected
+        return event.data[:self.preview_length].replace("\n", " ")
+
+
+class WindowStreamViewer(QDialog):
+    """Shows the events of a streamed response as they arrive, with the event rate"""
+    _stats_ms = 500
+
+    def __init__(self, parent: QObject, stream: ResponseStream):
+        # setup window
+        super().__init__(parent)
+        self._layout = QGridLayout()
+        self.setLayout(self._layout)
+        self.setMinimumSize(1000, 700)
+        self.setWindowTitle(f"Stream - {stream.method} - {stream.url}")
+        self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+
+        # widgets
+        self.summary = QLabel(f"{stream.status_code} - {stream.stream_format.upper()}")
+        self._layout.addWidget(self.summary, 0, 0)
+
+        self.follow = QCheckBox("Follow")
+        self.follow.setChecked(True)
+        self._layout.addWidget(self.follow, 0, 1)
+
+        self.retained = QSpinBox()
+        self.retained.setRange(100, 1_000_000)
+        self.retained.setSingleStep(1000)
+        self.retained.setValue(DEFAULT_RETAINED_EVENTS)
+        self.retained.setPrefix("Keep ")
+        self.retained.setSuffix(" events")
+        self.retained.editingFinished.connect(lambda: self.model.set_capacity(self.retained.value()))
+        self._layout.addWidget(self.retained, 0, 2)
+
+        self.clear_button = QPushButton("Clear")
+        self._layout.addWidget(self.clear_button, 0, 3)
+
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.clicked.connect(stream.stop)
+        self._layout.addWidget(self.stop_button, 0, 4)
+
+        self.model = StreamEventModel(self.retained.value())
+        self.clear_button.clicked.connect(self.model.clear)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.verticalHeader().setVisible(False)
+        # fixed row heights keep scrolling through a long stream cheap
+        self.table.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Fixed)
+        self.table.setWordWrap(False)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.horizontalHeader().setSectionResizeMode(4, QtWidgets.QHeaderView.ResizeMode.Stretch)
+        self.table.selectionModel().currentRowChanged.connect(self._show_event)
+        self.model.rowsInserted.connect(self._follow)
+
+        self.detail = QPlainTextEdit()
+        self.detail.setReadOnly(True)
+        self.detail.setFont(global_objects.get_mono_font())
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        splitter.addWidget(self.table)
+        splitter.addWidget(self.detail)
+        splitter.setSizes([500, 200])
+        self._layout.addWidget(splitter, 1, 0, 1, 5)
+        self._layout.setColumnStretch(0, 1)
+
+        self.stats = QLabel()
+        self._layout.addWidget(self.stats, 2, 0, 1, 5)
+
+        # variables
+        self._stream = stream
+        self._stats_timer = QTimer(self)
+        self._stats_timer.setInterval(self._stats_ms)
+        self._stats_timer.timeout.connect(self._update_stats)
+        self._stats_timer.start()
+
+        stream.events.connect(self.model.add)
+        stream.finished.connect(self._finished)
+        self._update_stats()
+
+    def _follow(self):
+        if self.follow.isChecked():
+            self.table.scrollToBottom()
+
+    def _show_event(self, current: QModelIndex):
+        if not current.isValid():
+            self.detail.clear()
+            return
+        data = self.model.event_at(current.row()).data
+        try:
+            data = orjson.dumps(orjson.loads(data), option=orjson.OPT_INDENT_2).decode()
+        except orjson.JSONDecodeError:
+            pass
+        self.detail.setPlainText(data)
+
+    def _update_stats(self):
+        stats = self._stream.stats
+        self.stats.setText(
+            f"{stats.events:,} events ({self.model.rowCount():,} kept), {stats.rate():.1f} events/s, "
+            f"{stats.bytes:,} bytes"
+        )
+
+    def _finished(self):
+        self.model.flush()
+        self._update_stats()
+        self._stats_timer.stop()
+        self.stop_button.setEnabled(False)
+        if self._stream.error is not None:
+            self.summary.setText(f"{self.summary.text()} - closed: {self._stream.error}")
+        else:
+            self.summary.setText(self.summary.text() + " - closed")
+
+    def done(self, result: int):
+        self._stream.stop()
+        super().done(result)
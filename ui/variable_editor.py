@@ -0,0 +1,119 @@
+from PySide6.QtCore import QObject
+from PySide6.QtWidgets import QDialog, QGridLayout, QComboBox, QPushButton, QCheckBox, QTabWidget, QInputDialog, \
+    QLabel
+
+import global_objects
+from backend.variables import Environment, DYNAMIC_VALUES
+from ui.key_value_editor import KeyValueEditor
+
+
+class WindowVariableEditor(QDialog):
+    """Edits the saved environments, `{{name}}` placeholders in requests are filled from the active one"""
+    def __init__(self, parent: QObject):
+        # setup window
+        super().__init__(parent)
+        self._layout = QGridLayout()
+        self.setLayout(self._layout)
+        self.setMinimumSize(700, 500)
+        self.setWindowTitle("Variables")
+
+        # widgets
+        self.environment = QComboBox()
+        self.environment.currentIndexChanged.connect(self._show_environment)
+        self._layout.addWidget(self.environment, 0, 0)
+
+        self.new_button = QPushButton("New")
+        self.new_button.clicked.connect(self.new_environment)
+        self._layout.addWidget(self.new_button, 0, 1)
+
+        self.remove_button = QPushButton("Remove")
+        self.remove_button.clicked.connect(self.remove_environment)
+        self._layout.addWidget(self.remove_button, 0, 2)
+
+        self.active = QCheckBox("Use for requests")
+        self.active.toggled.connect(self._set_active)
+        self._layout.addWidget(self.active, 0, 3)
+
+        self.tabs = QTabWidget()
+        self.variables = KeyValueEditor()
+        self.tabs.addTab(self.variables, "Variables")
+        self.extractions = KeyValueEditor()
+        self.extractions.setToolTip("Variable name and where to take it from in each response: status, "
+                                    "header.<name> or body.<path>, such as body.data.0.id")
+        self.tabs.addTab(self.extractions, "Extract")
+        self.captured = KeyValueEditor(editable=False)
+        self.tabs.addTab(self.captured, "Captured")
+        self._layout.addWidget(self.tabs, 1, 0, 1, 4)
+
+        self.help = QLabel("Dynamic values: " + ", ".join("{{" + x + "}}" for x in DYNAMIC_VALUES))
+        self.help.setWordWrap(True)
+        self._layout.addWidget(self.help, 2, 0, 1, 4)
+        self._layout.setColumnStretch(0, 1)
+
+        # variables
+        self._store = global_objects.get_environments()
+        self._shown: Environment | None = None
+
+        self.environment.addItems([x.name for x in self._store.environments])
+        if self._store.active_name is not None:
+            self.environment.setCurrentText(self._store.active_name)
+        self._show_environment()
+
+    def _show_environment(self):
+        """
+        Called when self.environment changes, keeps the edits of the previous environment and shows the new one
+        :return: None
+        """
+        self._keep_edits()
+        self._shown = self._store.get(self.environment.currentText())
+        enabled = self._shown is not None
+        for widget in (self.remove_button, self.active, self.tabs):
+            widget.setEnabled(enabled)
+        self.variables.set(self._shown.variables if enabled else {})
+        self.extractions.set(self._shown.extractions if enabled else {})
+        self.captured.set(self._shown.captured if enabled else {})
+        self.active.blockSignals(True)
+        self.active.setChecked(enabled and self._store.active_name == self._shown.name)
+        self.active.blockSignals(False)
+
+    def _keep_edits(self):
+        if self._shown is None:
+            return
+        # a repeated name keeps its last value
+        self._shown.variables = {key: value for key, value in self.variables.model.pairs() if key}
+        self._shown.extractions = {key: value for key, value in self.extractions.model.pairs() if key}
+
+    def _set_active(self, checked: bool):
+        if self._shown is not None:
+            self._store.active_name = self._shown.name if checked else None
+
+    def new_environment(self):
+        """
+        Called when self.new_button is clicked, asks for a name and adds an empty environment
+        :return: None
+        """
+        name, ok = QInputDialog.getText(self, "New Environment", "Name")
+        name = name.strip()
+        if not ok or not name or self._store.get(name) is not None:
+            return
+        self._store.environments.append(Environment(name))
+        self.environment.addItem(name)
+        self.environment.setCurrentText(name)
+
+    def remove_environment(self):
+        """
+        Called when self.remove_button is clicked, removes the environment being shown
+        :return: None
+        """
+        if self._shown is None:
+            return
+        self._store.environments.remove(self._shown)
+        if self._store.active_name == self._shown.name:
+            self._store.active_name = None
+        self._shown = None
+        self.environment.removeItem(self.environment.currentIndex())
+
+    def done(self, result: int):
+        self._keep_edits()
+        self._store.save()
+        super().done(result)